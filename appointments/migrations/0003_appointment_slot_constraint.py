@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0002_appointment_indexes'),
+        ('doctors', '0003_doctor_user'),
+        ('patients', '0004_patient_user'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'cancelled'), _negated=True), fields=('doctor', 'date', 'time'), name='unique_active_doctor_slot'),
+        ),
+    ]
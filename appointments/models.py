@@ -15,6 +15,26 @@ class Appointment(models.Model):
     time = models.TimeField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # appointment_list for patients and doctors, newest first
+            models.Index(fields=['patient', '-date', '-time'], name='appt_patient_date_time_idx'),
+            models.Index(fields=['doctor', '-date', '-time'], name='appt_doctor_date_time_idx'),
+            # appointment_list for admin/staff
+            models.Index(fields=['-date', '-time'], name='appt_date_time_idx'),
+            # prescription_add: a doctor's completed appointments
+            models.Index(fields=['doctor', 'status', '-date'], name='appt_doctor_status_date_idx'),
+        ]
+        constraints = [
+            # A doctor's slot can only hold one appointment that is not cancelled
+            models.UniqueConstraint(
+                fields=['doctor', 'date', 'time'],
+                condition=~models.Q(status='cancelled'),
+                name='unique_active_doctor_slot',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.patient.name} with {self.doctor.name} on {self.date}"
@@ -1,10 +1,30 @@
 from rest_framework import serializers
+from medicare_core.serializers import DynamicFieldsModelSerializer
 from .models import Appointment
+from .services import slot_is_taken
 
-class AppointmentSerializer(serializers.ModelSerializer):
+class AppointmentSerializer(DynamicFieldsModelSerializer):
     patient_name = serializers.ReadOnlyField(source='patient.name')
     doctor_name = serializers.ReadOnlyField(source='doctor.name')
 
     class Meta:
         model = Appointment
         fields = '__all__'
+        expandable_fields = {
+            'patient': 'patients.serializers.PatientSerializer',
+            'doctor': 'doctors.serializers.DoctorSerializer',
+        }
+        # DRF would turn unique_active_doctor_slot into an unconditional
+        # unique-together check; validate() applies the status condition
+        validators = []
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        current = self.instance
+        doctor = attrs.get('doctor', getattr(current, 'doctor', None))
+        date = attrs.get('date', getattr(current, 'date', None))
+        time = attrs.get('time', getattr(current, 'time', None))
+        status = attrs.get('status', getattr(current, 'status', 'pending'))
+        if status != 'cancelled' and slot_is_taken(doctor.pk, date, time, exclude_pk=getattr(current, 'pk', None)):
+            raise serializers.ValidationError("This time slot is already booked.")
+        return attrs
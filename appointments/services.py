@@ -0,0 +1,52 @@
+import random
+import time
+
+from django.db import IntegrityError, OperationalError, transaction
+
+from .models import Appointment
+
+
+class SlotUnavailable(Exception):
+    pass
+
+
+def slot_is_taken(doctor_id, date, time_, exclude_pk=None):
+    queryset = Appointment.objects.filter(doctor_id=doctor_id, date=date, time=time_).exclude(status='cancelled')
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    return queryset.exists()
+
+
+def book_appointment(appointment, retries=8):
+    """
+    Saves a new appointment atomically. The unique_active_doctor_slot
+    constraint decides the race between concurrent bookings, so no table
+    lock is taken; the loser gets SlotUnavailable. Transient lock errors
+    (SQLite allows a single writer) are retried with jittered backoff.
+    """
+    def insert():
+        try:
+            with transaction.atomic():
+                appointment.save()
+        except IntegrityError as e:
+            return e
+        return None
+
+    error = _retry_when_locked(insert, retries)
+    if error is None:
+        return appointment
+    if _retry_when_locked(lambda: slot_is_taken(appointment.doctor_id, appointment.date, appointment.time), retries):
+        raise SlotUnavailable(
+            f"{appointment.doctor} is already booked on {appointment.date} at {appointment.time}."
+        )
+    raise error
+
+
+def _retry_when_locked(operation, retries):
+    for attempt in range(retries + 1):
+        try:
+            return operation()
+        except OperationalError:
+            if attempt == retries:
+                raise
+            time.sleep(random.uniform(0, min(0.2, 0.005 * 2 ** attempt)))
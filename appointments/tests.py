@@ -1,3 +1,99 @@
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time
+from threading import Event
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from doctors.models import Doctor
+from patients.models import Patient
+from .models import Appointment
+from .services import SlotUnavailable, book_appointment
+
+User = get_user_model()
+
+
+def create_patient(name='John Doe'):
+    return Patient.objects.create(name=name, age=30, gender='M', phone='1', address='1 St', image='x.png')
+
+
+def create_doctor(name='Dr. House'):
+    return Doctor.objects.create(name=name, phone='2', specialty='GP', available_days='Mon', image='x.png')
+
+
+class BookingTests(TestCase):
+    def setUp(self):
+        self.doctor = create_doctor()
+        self.patient = create_patient()
+        self.slot = {'doctor': self.doctor, 'date': date(2025, 1, 6), 'time': time(10, 0)}
+
+    def test_second_booking_for_slot_is_rejected(self):
+        book_appointment(Appointment(patient=self.patient, **self.slot))
+        with self.assertRaises(SlotUnavailable):
+            book_appointment(Appointment(patient=create_patient('Jane Roe'), **self.slot))
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_cancelled_slot_can_be_rebooked(self):
+        book_appointment(Appointment(patient=self.patient, status='cancelled', **self.slot))
+        book_appointment(Appointment(patient=create_patient('Jane Roe'), **self.slot))
+        self.assertEqual(Appointment.objects.count(), 2)
+
+    def test_patient_booking_view_reports_taken_slot(self):
+        Appointment.objects.create(patient=create_patient('Jane Roe'), **self.slot)
+        user = User.objects.create_user(username='john', password='pw', role='patient')
+        self.patient.user = user
+        self.patient.save()
+        self.client.force_login(user)
+
+        data = {'doctor': self.doctor.pk, 'date': '2025-01-06', 'time': '10:00'}
+        response = self.client.post(reverse('appointment_add'), data)
+        self.assertContains(response, 'already booked')
+
+        data['time'] = '11:00'
+        response = self.client.post(reverse('appointment_add'), data)
+        self.assertRedirects(response, reverse('appointment_list'), fetch_redirect_response=False)
+        self.assertTrue(Appointment.objects.filter(patient=self.patient, time=time(11, 0)).exists())
+
+    def test_api_rejects_taken_slot(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='staff', password='pw', role='staff'))
+        data = {'patient': self.patient.pk, 'doctor': self.doctor.pk, 'date': '2025-01-06', 'time': '10:00'}
+        self.assertEqual(client.post('/api/appointments/', data).status_code, 201)
+        self.assertEqual(client.post('/api/appointments/', data).status_code, 400)
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    bookings = 200
+
+    def test_parallel_bookings_for_one_slot_produce_one_appointment(self):
+        doctor = create_doctor()
+        patients = Patient.objects.bulk_create(
+            Patient(name=f'Patient {i}', age=30, gender='O', phone='1', address='1 St', image='x.png')
+            for i in range(self.bookings)
+        )
+        start = Event()
+
+        def attempt(patient):
+            start.wait()
+            try:
+                # The in-memory test database is shared-cache SQLite, which
+                # reports lock contention immediately instead of waiting
+                appointment = Appointment(patient=patient, doctor=doctor, date=date(2025, 1, 6), time=time(10, 0))
+                book_appointment(appointment, retries=50)
+                return 'booked'
+            except SlotUnavailable:
+                return 'rejected'
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            futures = [executor.submit(attempt, patient) for patient in patients]
+            start.set()
+            results = [future.result() for future in futures]
+
+        self.assertEqual(results.count('booked'), 1)
+        self.assertEqual(results.count('rejected'), self.bookings - 1)
+        self.assertEqual(Appointment.objects.count(), 1)
@@ -1,46 +1,82 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponseForbidden
-from rest_framework import viewsets
+from rest_framework import serializers, viewsets
+from medicare_core.api import OptimizedQuerysetMixin
+from medicare_core.conditional import ConditionalGetMixin
+from medicare_core.exports import ExportMixin
+from medicare_core.pagination import keyset_page
+from medicare_core.replicas import replica_reads
 from rest_framework.permissions import IsAuthenticated
 from .models import Appointment
 from .serializers import AppointmentSerializer
 from .forms import AppointmentForm
+from .services import SlotUnavailable, book_appointment
+
+from django.db import transaction
+from notifications.outbox import queue_email
+
+
+def queue_confirmation_email(appointment):
+    subject = 'Appointment Confirmed - MediCare'
+    message = f"""
+    Dear {appointment.patient.name},
+
+    Your appointment has been confirmed.
+
+    Doctor: {appointment.doctor.name}
+    Date: {appointment.date}
+    Time: {appointment.time}
+
+    Thank you for choosing MediCare.
+    """
+    queue_email(subject, message, [appointment.patient.email])
 
-from django.core.mail import send_mail
-from django.conf import settings
 
 # API ViewSet
-class AppointmentViewSet(viewsets.ModelViewSet):
-    queryset = Appointment.objects.all()
+class AppointmentViewSet(ConditionalGetMixin, ExportMixin, OptimizedQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Appointment.objects.order_by('-created_at', '-id')
+    cursor_ordering = ('-created_at', '-id')
+    export_extra_fields = {'patient_name': 'patient__name', 'doctor_name': 'doctor__name'}
     serializer_class = AppointmentSerializer
     permission_classes = [IsAuthenticated]
 
+    def perform_create(self, serializer):
+        # validate() already rejected taken slots; this settles concurrent races
+        appointment = Appointment(**serializer.validated_data)
+        try:
+            book_appointment(appointment)
+        except SlotUnavailable as e:
+            raise serializers.ValidationError({'non_field_errors': [str(e)]})
+        serializer.instance = appointment
+
 # UI Views
 @login_required
+@replica_reads
 def appointment_list(request):
     # Filter to show only logged-in user's appointments
-    if hasattr(request.user, 'patient_profile'):
-        appointments = Appointment.objects.filter(patient=request.user.patient_profile).select_related('doctor', 'patient').order_by('-date', '-time')
-    elif hasattr(request.user, 'doctor_profile'):
+    if request.actor.is_patient:
+        appointments = Appointment.objects.filter(patient_id=request.actor.patient_id).select_related('doctor', 'patient').order_by('-date', '-time')
+    elif request.actor.is_doctor:
         # Doctors see appointments booked with them
-        appointments = Appointment.objects.filter(doctor=request.user.doctor_profile).select_related('doctor', 'patient').order_by('-date', '-time')
+        appointments = Appointment.objects.filter(doctor_id=request.actor.doctor_id).select_related('doctor', 'patient').order_by('-date', '-time')
     else:
         # Admin/staff can see all appointments
         appointments = Appointment.objects.all().select_related('doctor', 'patient').order_by('-date', '-time')
-    return render(request, 'appointment_list.html', {'appointments': appointments})
+    page = keyset_page(request, appointments)
+    return render(request, 'appointment_list.html', {'appointments': page, 'page': page})
 
 @login_required
 def appointment_complete(request, pk):
     appointment = get_object_or_404(Appointment, pk=pk)
     # Only the assigned doctor can complete the appointment
-    if hasattr(request.user, 'doctor_profile') and appointment.doctor == request.user.doctor_profile:
+    if request.actor.is_doctor and appointment.doctor_id == request.actor.doctor_id:
         appointment.status = 'completed'
         appointment.save()
         return redirect('appointment_list')
     else:
         # Admin/superuser can also complete
-        if request.user.is_superuser or request.user.role in ['admin', 'staff']:
+        if request.actor.has_role('admin', 'staff'):
             appointment.status = 'completed'
             appointment.save()
             return redirect('appointment_list')
@@ -50,46 +86,32 @@ def appointment_complete(request, pk):
 @login_required
 def appointment_add(request):
     # Patients book for themselves, doctors/admin/staff can book for any patient
-    is_patient = request.user.role == 'patient'
-    can_book_for_others = request.user.is_superuser or request.user.role in ['admin', 'staff', 'doctor']
+    is_patient = request.actor.role == 'patient'
+    can_book_for_others = request.actor.has_role('admin', 'staff', 'doctor')
     
     if not (is_patient or can_book_for_others):
         return HttpResponseForbidden("You don't have permission to book appointments.")
         
     if request.method == 'POST':
         form = AppointmentForm(request.POST)
+        # Patients book for themselves, so they never submit the patient field
+        if is_patient:
+            form.fields.pop('patient', None)
         if form.is_valid():
             appointment = form.save(commit=False)
             # If patient is booking, auto-set patient from logged-in user
             if is_patient:
-                appointment.patient = request.user.patient_profile
+                appointment.patient_id = request.actor.patient_id
             # Otherwise, admin/doctor selected patient from the form
-            appointment.save()
-            
-            # Send Email Notification TO User
-            if appointment.status == 'confirmed' and appointment.patient.email:
-                subject = 'Appointment Confirmed - MediCare'
-                message = f"""
-                Dear {appointment.patient.name},
-
-                Your appointment has been confirmed.
-
-                Doctor: {appointment.doctor.name}
-                Date: {appointment.date}
-                Time: {appointment.time}
-
-                Thank you for choosing MediCare.
-                """
-                try:
-                    send_mail(
-                        subject,
-                        message,
-                        settings.EMAIL_HOST_USER,
-                        [appointment.patient.email],
-                        fail_silently=True,
-                    )
-                except Exception as e:
-                    print(f"Error sending email: {e}")
+            try:
+                # The confirmation email is queued in the booking's transaction
+                with transaction.atomic():
+                    book_appointment(appointment)
+                    if appointment.status == 'confirmed':
+                        queue_confirmation_email(appointment)
+            except SlotUnavailable:
+                form.add_error(None, "This time slot is already booked. Please choose another time.")
+                return render(request, 'appointment_form.html', {'form': form})
 
             return redirect('appointment_list')
     else:
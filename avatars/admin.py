@@ -0,0 +1,7 @@
+from django.contrib import admin
+from .models import AvatarJob
+
+@admin.register(AvatarJob)
+class AvatarJobAdmin(admin.ModelAdmin):
+    list_display = ('content_type', 'object_id', 'status', 'attempts', 'run_after', 'updated_at')
+    list_filter = ('status', 'content_type')
@@ -0,0 +1,28 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from avatars.queue import claim_jobs, process_job
+
+
+class Command(BaseCommand):
+    help = 'Generates queued profile avatars using a thread pool.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help='Number of worker threads.')
+        parser.add_argument('--batch-size', type=int, default=50, help='Jobs claimed per poll.')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit.')
+
+    def handle(self, *args, **options):
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            while True:
+                job_ids = claim_jobs(options['batch_size'])
+                if job_ids:
+                    results = list(executor.map(process_job, job_ids))
+                    self.stdout.write(f"Processed {len(results)} avatar jobs ({results.count(False)} failed).")
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
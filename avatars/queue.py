@@ -0,0 +1,99 @@
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+
+from medicare_core.fragments import bump_for_model
+from medicare_core.jobs import claim, retry_or_fail
+from medicare_core.utils import generate_profile_image
+from .models import AvatarJob
+from .store import ingest_avatar
+
+
+class AvatarGenerationError(Exception):
+    pass
+
+
+def attach_avatar(instance):
+    """
+    Gives a saved Doctor or Patient without an image its generated avatar.
+    With AVATAR_ASYNC the work is queued for run_avatar_worker; the job row is
+    written in the caller's transaction, so the worker only sees it once the
+    profile itself has been committed.
+    """
+    if instance.image:
+        return
+    if not getattr(settings, 'AVATAR_ASYNC', True):
+        render_avatar(instance)
+        return
+    enqueue_avatar(instance)
+
+
+def enqueue_avatar(instance):
+    content_type = ContentType.objects.get_for_model(instance)
+    already_queued = AvatarJob.objects.filter(
+        content_type=content_type,
+        object_id=instance.pk,
+        status__in=['pending', 'running'],
+    ).exists()
+    if not already_queued:
+        AvatarJob.objects.create(content_type=content_type, object_id=instance.pk)
+
+
+def enqueue_avatars(instances):
+    """
+    Queues avatars for freshly bulk-created rows of one model in a single
+    INSERT. bulk_create() skips save(), so bulk importers call this instead.
+    """
+    instances = [instance for instance in instances if instance.pk and not instance.image]
+    if not instances:
+        return
+    content_type = ContentType.objects.get_for_model(instances[0])
+    AvatarJob.objects.bulk_create(
+        AvatarJob(content_type=content_type, object_id=instance.pk) for instance in instances
+    )
+
+
+def render_avatar(instance):
+    """Generates the avatar for one saved instance and attaches it from the store."""
+    content = generate_profile_image(instance.name)
+    if content is None:
+        raise AvatarGenerationError(f"No avatar produced for {instance!r}")
+    name = ingest_avatar(content)
+    # update() rather than save() so a concurrent profile edit is not
+    # overwritten and no new job is queued
+    if type(instance).objects.filter(
+        Q(image='') | Q(image__isnull=True), pk=instance.pk,
+    ).update(image=name, updated_at=timezone.now()):
+        bump_for_model(type(instance))
+    instance.image.name = name
+
+
+def claim_jobs(limit):
+    """Marks up to `limit` due jobs as running and returns their ids."""
+    return claim(AvatarJob, limit, 'running')
+
+
+def process_job(job_id):
+    close_old_connections()
+    try:
+        job = AvatarJob.objects.select_related('content_type').get(pk=job_id)
+        model = job.content_type.model_class()
+        instance = model.objects.filter(pk=job.object_id).first()
+        try:
+            if instance is not None and not instance.image:
+                render_avatar(instance)
+        except Exception as e:
+            _retry_or_fail(job, e)
+            return False
+        job.status = 'done'
+        job.last_error = ''
+        job.save(update_fields=['status', 'last_error', 'updated_at'])
+        return True
+    finally:
+        close_old_connections()
+
+
+def _retry_or_fail(job, error):
+    retry_or_fail(job, error, getattr(settings, 'AVATAR_MAX_ATTEMPTS', 5))
@@ -0,0 +1,67 @@
+import hashlib
+import re
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+AVATAR_SIZES = (40, 80, 256)
+AVATAR_FORMATS = {'png': 'PNG', 'webp': 'WEBP'}
+
+# avatars/<first two hex chars>/<sha256>/<size>.<ext>
+STORE_NAME_RE = re.compile(r'^avatars/[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})/\d+\.(png|webp)$')
+
+
+def store_name(digest, size, ext):
+    return f"avatars/{digest[:2]}/{digest}/{size}.{ext}"
+
+
+def ingest_avatar(content):
+    """
+    Stores an avatar image under the SHA-256 of its bytes and writes every
+    size/format variant once. Identical images share the same files.
+    Returns the storage name of the largest PNG variant.
+    """
+    data = content.read()
+    digest = hashlib.sha256(data).hexdigest()
+    master = store_name(digest, max(AVATAR_SIZES), 'png')
+    if default_storage.exists(master):
+        return master
+
+    image = Image.open(BytesIO(data)).convert('RGB')
+    variants = {}
+    for size in sorted(AVATAR_SIZES):
+        resized = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        for ext, pil_format in AVATAR_FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, format=pil_format)
+            variants[store_name(digest, size, ext)] = buffer.getvalue()
+    # The master is written last, so its presence means the set is complete
+    master_data = variants.pop(master)
+    for name, variant in variants.items():
+        _save_once(name, variant)
+    _save_once(master, master_data)
+    return master
+
+
+def _save_once(name, data):
+    if default_storage.exists(name):
+        return
+    saved = default_storage.save(name, ContentFile(data))
+    if saved != name:
+        # Another worker stored the same content first
+        default_storage.delete(saved)
+
+
+def variant_name(name, size, ext='png'):
+    """
+    Returns the storage name of the smallest stored variant that is at least
+    `size` pixels, or None if `name` is not in the avatar store.
+    """
+    match = STORE_NAME_RE.match(name or '')
+    if not match:
+        return None
+    fitting = [s for s in AVATAR_SIZES if s >= size]
+    chosen = min(fitting) if fitting else max(AVATAR_SIZES)
+    return store_name(match.group('digest'), chosen, ext)
@@ -0,0 +1,37 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+from avatars.store import variant_name
+
+register = template.Library()
+
+
+@register.simple_tag
+def avatar(image, size=80, alt='', css_class='rounded-circle'):
+    """
+    Renders an <img> for a profile image at `size` pixels. Store-backed
+    avatars get the smallest fitting WebP/PNG variants (with a 2x source for
+    high-density screens); other images fall back to their original URL.
+    """
+    if not image:
+        return ''
+    size = int(size)
+    png_1x = variant_name(image.name, size, 'png')
+    if png_1x is None:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" width="{}" height="{}" loading="lazy">',
+            image.url, alt, css_class, size, size,
+        )
+
+    def srcset(ext):
+        return '{} 1x, {} 2x'.format(
+            default_storage.url(variant_name(image.name, size, ext)),
+            default_storage.url(variant_name(image.name, size * 2, ext)),
+        )
+
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}">'
+        '<img src="{}" srcset="{}" alt="{}" class="{}" width="{}" height="{}" loading="lazy"></picture>',
+        srcset('webp'), default_storage.url(png_1x), srcset('png'), alt, css_class, size, size,
+    )
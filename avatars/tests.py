@@ -0,0 +1,127 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from doctors.models import Doctor
+from patients.models import Patient
+from medicare_core.utils import render_local_avatar
+from .models import AvatarJob
+from .store import AVATAR_SIZES, ingest_avatar, variant_name
+
+
+def failing_avatar_backend(name_seed):
+    raise RuntimeError('avatar service down')
+
+
+# Worker threads use their own DB connections, so the rows they read must be
+# committed rather than held in a per-test transaction
+class AvatarQueueTests(TransactionTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, AVATAR_ASYNC=True)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def create_doctor(self, name='Dr. Gregory House'):
+        return Doctor.objects.create(name=name, phone='123', specialty='Diagnostics', available_days='Mon')
+
+    def test_save_queues_job_without_rendering(self):
+        doctor = self.create_doctor()
+        self.assertFalse(doctor.image)
+        self.assertEqual(AvatarJob.objects.filter(object_id=doctor.pk, status='pending').count(), 1)
+
+    def test_resaving_does_not_queue_twice(self):
+        doctor = self.create_doctor()
+        doctor.phone = '456'
+        doctor.save()
+        self.assertEqual(AvatarJob.objects.count(), 1)
+
+    def test_worker_fills_in_image(self):
+        doctor = self.create_doctor()
+        patient = Patient.objects.create(name='John Doe', age=30, gender='M', phone='1', address='1 St')
+        call_command('run_avatar_worker', once=True, threads=2, stdout=StringIO())
+
+        doctor.refresh_from_db()
+        patient.refresh_from_db()
+        self.assertTrue(doctor.image.name.startswith('avatars/'))
+        self.assertTrue(patient.image.name.startswith('avatars/'))
+        self.assertFalse(AvatarJob.objects.exclude(status='done').exists())
+
+    @override_settings(AVATAR_BACKEND='avatars.tests.failing_avatar_backend', AVATAR_MAX_ATTEMPTS=2)
+    def test_failures_back_off_then_give_up(self):
+        self.create_doctor()
+        call_command('run_avatar_worker', once=True, stdout=StringIO())
+        job = AvatarJob.objects.get()
+        self.assertEqual((job.status, job.attempts), ('pending', 1))
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIn('avatar service down', job.last_error)
+
+        AvatarJob.objects.update(run_after=timezone.now() - timedelta(seconds=1))
+        call_command('run_avatar_worker', once=True, stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+    def test_same_name_profiles_share_one_stored_avatar(self):
+        first = self.create_doctor()
+        second = self.create_doctor()
+        call_command('run_avatar_worker', once=True, stdout=StringIO())
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.image.name, second.image.name)
+
+    @override_settings(AVATAR_ASYNC=False)
+    def test_synchronous_mode_renders_inline(self):
+        doctor = self.create_doctor()
+        self.assertTrue(doctor.image)
+        self.assertFalse(AvatarJob.objects.exists())
+
+
+class AvatarStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_ingest_writes_every_variant_once(self):
+        name = ingest_avatar(render_local_avatar('John Doe'))
+        self.assertEqual(name, ingest_avatar(render_local_avatar('John Doe')))
+        directory = name.rsplit('/', 1)[0]
+        files = sorted(default_storage.listdir(directory)[1])
+        self.assertEqual(files, sorted(f"{size}.{ext}" for size in AVATAR_SIZES for ext in ('png', 'webp')))
+
+    def test_master_is_written_last(self):
+        with mock.patch('avatars.store._save_once') as save_once:
+            name = ingest_avatar(render_local_avatar('John Doe'))
+        written = [call.args[0] for call in save_once.call_args_list]
+        self.assertEqual(len(written), len(AVATAR_SIZES) * 2)
+        self.assertEqual(written[-1], name)
+
+    def test_variant_name_picks_smallest_fitting_size(self):
+        name = ingest_avatar(render_local_avatar('John Doe'))
+        self.assertTrue(variant_name(name, 32).endswith('/40.png'))
+        self.assertTrue(variant_name(name, 80, 'webp').endswith('/80.webp'))
+        self.assertTrue(variant_name(name, 1000).endswith('/256.png'))
+        self.assertIsNone(variant_name('doctors/upload.jpg', 80))
+
+    def test_avatar_tag_renders_webp_and_png_sources(self):
+        name = ingest_avatar(render_local_avatar('John Doe'))
+        doctor = Doctor(name='John Doe', image=name)
+        html = Template("{% load avatar_tags %}{% avatar doctor.image 80 'John' %}").render(Context({'doctor': doctor}))
+        self.assertIn('type="image/webp"', html)
+        self.assertIn('/80.webp 1x', html)
+        self.assertIn('/256.png 2x', html)
@@ -0,0 +1,65 @@
+"""
+Queries per page spent on working out who the user is. Each page is fetched
+by the role that normally opens it, once with the profile id cache emptied
+before every request and once with it warm. Pages that only check the
+user's role never look profiles up. The views used to run one query per
+`hasattr(request.user, ...)` profile check, two on a doctor's appointment
+list.
+
+Usage:
+    python -m benchmarks.actor_queries [--appointments 2000] [--runs 20]
+"""
+import argparse
+
+from benchmarks.common import report, setup_django, throwaway_database, timer
+
+setup_django()
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from benchmarks.url_latency import QueryCounter, create_fixtures, fetch, scale_sizes
+from medicare_core.actors import actor_cache_key
+from medicare_core.seeding import seed_database
+
+PAGES = [
+    ('patient', 'appointment_list'),
+    ('patient', 'invoice_list'),
+    ('patient', 'prescription_list'),
+    ('patient', 'patient_detail'),
+    ('patient', 'payment_select'),
+    ('doctor', 'appointment_list'),
+    ('doctor', 'prescription_list'),
+    ('admin', 'patient_list'),
+    ('admin', 'invoice_list'),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--appointments', type=int, default=2000)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    with throwaway_database():
+        seed_database(**scale_sizes(args.appointments))
+        users, fixtures = create_fixtures()
+        for role, name in PAGES:
+            client = Client()
+            client.force_login(users[role])
+            path = reverse(name, kwargs=fixtures.get(name))
+            for label, cold in (('cold', True), ('warm', False)):
+                samples = []
+                for _ in range(args.runs):
+                    if cold:
+                        cache.delete(actor_cache_key(users[role].pk))
+                    queries = QueryCounter()
+                    with connection.execute_wrapper(queries), timer(samples):
+                        response = fetch(client, path)
+                report(f"{role} {name} {label} [{response.status_code}, {queries.count} queries]", samples)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Shows that the streaming export endpoints use constant memory: peak Python
+allocations are measured while consuming the whole response for growing
+numbers of appointments.
+
+Usage:
+    python -m benchmarks.api_export [--rows 1000,10000,50000] [--format csv]
+"""
+import argparse
+import tracemalloc
+from datetime import date, time
+
+from benchmarks.common import setup_django, throwaway_database, timer
+
+setup_django()
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from appointments.models import Appointment
+from doctors.models import Doctor
+from patients.models import Patient
+
+
+def grow_to(rows, doctor, patient):
+    missing = rows - Appointment.objects.count()
+    Appointment.objects.bulk_create(
+        (Appointment(patient=patient, doctor=doctor, date=date(2025, 1, 6), time=time(9, 0), status='cancelled')
+         for _ in range(missing)),
+        batch_size=5000,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', default='1000,10000,50000')
+    parser.add_argument('--format', default='csv', choices=['csv', 'ndjson'])
+    args = parser.parse_args()
+
+    with throwaway_database():
+        doctor = Doctor.objects.create(name='Dr. Bench', phone='1', specialty='GP', available_days='Mon', image='x.png')
+        patient = Patient.objects.create(name='Bench Patient', age=30, gender='O', phone='1', address='1 St', image='x.png')
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(username='bench', password='x', role='staff'))
+
+        for rows in sorted(int(n) for n in args.rows.split(',')):
+            grow_to(rows, doctor, patient)
+            samples = []
+            size = 0
+            tracemalloc.start()
+            with timer(samples):
+                response = client.get('/api/appointments/export/', {'format': args.format})
+                for chunk in response.streaming_content:
+                    size += len(chunk)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"export {rows:>8} appointments [{args.format}]  {samples[0]:9.1f} ms  "
+                  f"{size / 1e6:7.2f} MB sent  peak {peak / 1e6:6.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
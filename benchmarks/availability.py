@@ -0,0 +1,74 @@
+"""
+Measures the doctor availability endpoint across many doctors.
+
+Usage:
+    python -m benchmarks.availability [--doctors 500] [--runs 50] [--days 7]
+"""
+import argparse
+import random
+from datetime import date, time, timedelta
+
+from benchmarks.common import setup_django, throwaway_database, timer, report
+
+setup_django()
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+from appointments.models import Appointment
+from doctors.models import Doctor, DoctorAvailability
+from patients.models import Patient
+
+SPECIALTIES = ['Cardiology', 'Dermatology', 'Neurology', 'Pediatrics', 'General']
+
+
+def seed(doctors, start):
+    rng = random.Random(1)
+    created = Doctor.objects.bulk_create(
+        Doctor(name=f'Dr. Bench {i}', phone='1', specialty=SPECIALTIES[i % len(SPECIALTIES)],
+               available_days='Mon,Tue,Wed,Thu,Fri', image='x.png')
+        for i in range(doctors)
+    )
+    # Half the doctors get structured hours, the rest use available_days
+    DoctorAvailability.objects.bulk_create(
+        DoctorAvailability(doctor=doctor, weekday=weekday, start_time=time(8, 0), end_time=time(12, 0), slot_minutes=15)
+        for doctor in created[::2] for weekday in range(5)
+    )
+    patient = Patient.objects.create(name='Bench Patient', age=30, gender='O', phone='1', address='1 St', image='x.png')
+    Appointment.objects.bulk_create(
+        Appointment(patient=patient, doctor=doctor, date=start + timedelta(days=day), time=time(8 + hour, 30))
+        for doctor in created for day, hour in enumerate(rng.sample(range(4), 3))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--doctors', type=int, default=500)
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--days', type=int, default=7)
+    args = parser.parse_args()
+
+    start = date.today() + timedelta(days=1)
+    with throwaway_database():
+        seed(args.doctors, start)
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(username='bench', password='x', role='staff'))
+        params = {'date': start.isoformat(), 'days': args.days}
+
+        cold, warm, specialty = [], [], []
+        for _ in range(args.runs):
+            cache.clear()
+            with timer(cold):
+                client.get('/api/doctors/availability/', params)
+            with timer(warm):
+                client.get('/api/doctors/availability/', params)
+            with timer(specialty):
+                client.get('/api/doctors/availability/', {**params, 'specialty': 'Cardiology'})
+        report(f"availability cold [{args.doctors} doctors]", cold)
+        report(f"availability warm [{args.doctors} doctors]", warm)
+        report("availability warm [one specialty]", specialty)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Compares patient signup latency for each avatar backend.
+
+Usage:
+    python -m benchmarks.avatar_signup [--runs 50] [--backends local,dicebear]
+"""
+import argparse
+
+from benchmarks.common import setup_django, throwaway_database, timer, report
+
+setup_django()
+
+from django.conf import settings
+from django.test import Client
+from django.urls import reverse
+
+
+def run(backend, runs):
+    settings.AVATAR_BACKEND = backend
+    samples = []
+    for i in range(runs):
+        client = Client()
+        data = {
+            'username': f'bench_{backend}_{i}',
+            'email': f'bench_{backend}_{i}@example.com',
+            'password1': 'BenchPassword123!',
+            'password2': 'BenchPassword123!',
+            'name': f'Bench Patient {backend} {i}',
+            'age': 30,
+            'gender': 'O',
+            'phone': '0123456789',
+            'address': '1 Benchmark Road',
+        }
+        with timer(samples):
+            client.post(reverse('patient_signup'), data)
+    report(f"patient_signup [{backend}]", samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--backends', default='local,dicebear')
+    args = parser.parse_args()
+
+    # A cheap hasher keeps PBKDF2 from drowning out the avatar cost
+    settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+    with throwaway_database():
+        for backend in args.backends.split(','):
+            run(backend, args.runs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Shared helpers for the benchmark scripts. Each benchmark runs against a
+throwaway test database so it never touches db.sqlite3 or real media files.
+"""
+import math
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'medicare_core.settings')
+    os.environ.setdefault('SECRET_KEY', 'benchmark-only-secret-key')
+    django.setup()
+
+
+@contextmanager
+def throwaway_database():
+    """Creates a migrated test database, MEDIA_ROOT and PDF cache in temporary directories."""
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    old_media_root, old_cache_root = settings.MEDIA_ROOT, settings.DOCUMENT_CACHE_ROOT
+    settings.MEDIA_ROOT = tempfile.mkdtemp(prefix='medicare-bench-')
+    settings.DOCUMENT_CACHE_ROOT = tempfile.mkdtemp(prefix='medicare-bench-documents-')
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        shutil.rmtree(settings.MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(settings.DOCUMENT_CACHE_ROOT, ignore_errors=True)
+        settings.MEDIA_ROOT, settings.DOCUMENT_CACHE_ROOT = old_media_root, old_cache_root
+        teardown_test_environment()
+
+
+@contextmanager
+def timer(samples):
+    """Appends the elapsed time of the block, in milliseconds, to samples."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        samples.append((time.perf_counter() - start) * 1000)
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def report(label, samples):
+    print(
+        f"{label:<40} n={len(samples):<5} "
+        f"p50={percentile(samples, 50):8.2f} ms  "
+        f"p99={percentile(samples, 99):8.2f} ms  "
+        f"max={max(samples, default=0):8.2f} ms"
+    )
@@ -0,0 +1,57 @@
+"""
+Cost of polling an unchanged list: a first request answered 200 with the
+full body, then the same request repeated with If-None-Match, as a client
+that kept the ETag does. Each line gives latency, body size and queries.
+
+Usage:
+    python -m benchmarks.conditional_get [--appointments 10000] [--runs 100]
+"""
+import argparse
+
+from benchmarks.common import report, setup_django, throwaway_database, timer
+
+setup_django()
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from benchmarks.url_latency import QueryCounter, create_fixtures, scale_sizes
+from medicare_core.seeding import seed_database
+
+PATHS = [
+    '/api/doctors/',
+    '/api/appointments/',
+    '/api/appointments/?expand=doctor,patient',
+    '/api/appointments/?pagination=cursor',
+    '/api/patients/?page_size=100',
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--appointments', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=100)
+    args = parser.parse_args()
+
+    with throwaway_database():
+        seed_database(**scale_sizes(args.appointments))
+        users, _ = create_fixtures()
+        client = Client()
+        client.force_login(users['admin'])
+        for path in PATHS + [reverse('doctor_list')]:
+            cache.clear()
+            etag = client.get(path)['ETag']
+            for label, headers in (('200', {}), ('304', {'HTTP_IF_NONE_MATCH': etag})):
+                samples = []
+                for _ in range(args.runs):
+                    queries = QueryCounter()
+                    with connection.execute_wrapper(queries), timer(samples):
+                        response = client.get(path, **headers)
+                assert response.status_code == int(label), (path, response.status_code)
+                report(f"{path} {label} [{len(response.content)} bytes, {queries.count} queries]", samples)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Compares importing patients one save() at a time with the bulk importer.
+
+Usage:
+    python -m benchmarks.import_records [--rows 20000] [--batch-size 1000]
+"""
+import argparse
+
+from benchmarks.common import setup_django, throwaway_database, timer
+
+setup_django()
+
+from patients.models import Patient
+from medicare_core.importer import import_records
+
+
+def records(n, prefix):
+    for i in range(n):
+        yield i + 1, {
+            'name': f'{prefix} Patient {i}', 'age': str(20 + i % 60), 'gender': 'O',
+            'phone': '0123456789', 'address': f'{i} Import Road', 'email': '',
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    with throwaway_database():
+        # The old path: one INSERT, one avatar job and one transaction per row
+        per_row = max(1, args.rows // 10)
+        samples = []
+        with timer(samples):
+            for _, record in records(per_row, 'Single'):
+                Patient.objects.create(**record)
+        print(f"save() per row      {per_row:>8} rows  {per_row / (samples[0] / 1000):>10,.0f} rows/s")
+
+        result = import_records('patients', records(args.rows, 'Bulk'), batch_size=args.batch_size)
+        print(f"import_records      {result.created:>8} rows  {result.rows_per_second:>10,.0f} rows/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Shows that the HTML list views stay bounded as the table grows: the first
+page and a page deep into the list are rendered for growing numbers of
+appointments, reporting render time and HTML size.
+
+Usage:
+    python -m benchmarks.list_pages [--rows 1000,10000,100000] [--runs 20]
+"""
+import argparse
+from datetime import date, time, timedelta
+
+from benchmarks.common import report, setup_django, throwaway_database, timer
+
+setup_django()
+
+from django.contrib.auth import get_user_model
+from django.test import Client
+from django.urls import reverse
+
+from appointments.models import Appointment
+from doctors.models import Doctor
+from medicare_core.pagination import encode_cursor
+from patients.models import Patient
+
+SLOTS_PER_DAY = 16
+
+
+def grow_to(rows, doctors, patient):
+    existing = Appointment.objects.count()
+    Appointment.objects.bulk_create(
+        (Appointment(
+            patient=patient,
+            doctor=doctors[i % len(doctors)],
+            date=date(2020, 1, 1) + timedelta(days=i // (SLOTS_PER_DAY * len(doctors))),
+            time=time(9 + i // len(doctors) % SLOTS_PER_DAY // 2, 30 * (i // len(doctors) % 2)),
+        ) for i in range(existing, rows)),
+        batch_size=5000,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', default='1000,10000,100000')
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    with throwaway_database():
+        doctors = Doctor.objects.bulk_create(
+            Doctor(name=f'Dr. {i}', phone='1', specialty='GP', available_days='Mon', image='x.png') for i in range(4)
+        )
+        patient = Patient.objects.create(name='Bench Patient', age=30, gender='O', phone='1', address='1 St', image='x.png')
+        client = Client()
+        client.force_login(get_user_model().objects.create_user(username='bench', password='x', role='staff'))
+        url = reverse('appointment_list')
+
+        for rows in sorted(int(n) for n in args.rows.split(',')):
+            grow_to(rows, doctors, patient)
+            # A cursor pointing at the middle of the list
+            middle = Appointment.objects.order_by('-date', '-time', '-id')[rows // 2]
+            deep = {'cursor': encode_cursor('next', [middle.date, middle.time, middle.pk])}
+            for label, params in (('first page', {}), ('middle page', deep)):
+                samples = []
+                for _ in range(args.runs):
+                    with timer(samples):
+                        response = client.get(url, params)
+                report(f"{rows:>7} rows, {label} ({len(response.content) / 1024:.0f} KB)", samples)
+
+
+if __name__ == '__main__':
+    main()
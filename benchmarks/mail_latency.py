@@ -0,0 +1,67 @@
+"""
+Compares payment request latency with inline email delivery against the
+outbox, using the local SMTP stand-in. --connect-delay adds latency to every
+new SMTP session to stand in for a remote TLS handshake.
+
+Usage:
+    python -m benchmarks.mail_latency [--runs 50] [--connect-delay 0.15]
+"""
+import argparse
+from io import StringIO
+
+from benchmarks.common import setup_django, throwaway_database, timer, report
+
+setup_django()
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+
+from billing.models import Invoice
+from notifications.testing import LocalSMTPServer
+from patients.models import Patient
+
+
+def pay_invoices(client, patient, runs, label):
+    samples = []
+    for _ in range(runs):
+        invoice = Invoice.objects.create(patient=patient, amount=50, items='Consultation')
+        with timer(samples):
+            client.post(reverse('payment_process', args=[invoice.pk, 'card']))
+    report(label, samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--connect-delay', type=float, default=0.15)
+    args = parser.parse_args()
+
+    settings.PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+    with throwaway_database(), LocalSMTPServer(connect_delay=args.connect_delay) as smtp:
+        for name, value in smtp.email_settings().items():
+            setattr(settings, name, value)
+        settings.DEFAULT_FROM_EMAIL = 'clinic@example.com'
+
+        user = get_user_model().objects.create_user(username='bench', email='bench@example.com', password='x', role='patient')
+        patient = Patient.objects.create(user=user, name='Bench Patient', age=30, gender='O', phone='1', address='1 St', image='x.png')
+        client = Client()
+        client.force_login(user)
+
+        settings.EMAIL_ASYNC = False
+        pay_invoices(client, patient, args.runs, 'payment_process [inline send_mail]')
+        settings.EMAIL_ASYNC = True
+        pay_invoices(client, patient, args.runs, 'payment_process [outbox]')
+
+        connections = smtp.connections
+        drain = []
+        with timer(drain):
+            call_command('run_mail_worker', once=True, stdout=StringIO())
+        print(f"run_mail_worker sent {args.runs} emails in {drain[0]:.1f} ms "
+              f"over {smtp.connections - connections} SMTP connection(s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Measures ranked patient search latency on a large synthetic roster.
+
+Usage:
+    python -m benchmarks.patient_search [--patients 1000000] [--runs 50]
+"""
+import argparse
+import random
+
+from benchmarks.common import setup_django, throwaway_database, timer, report
+
+setup_django()
+
+from patients.models import Patient
+from patients.search import search_patients
+
+FIRST = ['John', 'Jane', 'Maria', 'Ahmed', 'Wei', 'Olga', 'Carlos', 'Aisha', 'Kenji', 'Fatima', 'Liam', 'Noah']
+LAST = ['Smith', 'Khan', 'Garcia', 'Chen', 'Ivanova', 'Okafor', 'Tanaka', 'Rahman', 'Müller', 'Silva']
+HISTORY = ['asthma', 'diabetes type 2', 'hypertension', 'penicillin allergy', 'migraine', 'none', 'fractured wrist']
+QUERIES = ['john smith', 'garcia', 'penicillin', 'wei chen asthma', 'okaf', '0171', 'fatima rahman diabetes']
+
+
+def seed(n, batch_size=10000):
+    rng = random.Random(1)
+    for start in range(0, n, batch_size):
+        Patient.objects.bulk_create(
+            Patient(
+                name=f'{rng.choice(FIRST)} {rng.choice(LAST)} {i}', age=rng.randint(1, 90), gender='O',
+                phone=f'01{rng.randint(0, 99999999):08d}', email=f'patient{i}@example.com', address='1 St',
+                medical_history=f'{rng.choice(HISTORY)}, {rng.choice(HISTORY)}', image='x.png',
+            )
+            for i in range(start, min(n, start + batch_size))
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--patients', type=int, default=1000000)
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--page-size', type=int, default=25)
+    args = parser.parse_args()
+
+    with throwaway_database():
+        seed(args.patients)
+        for query in QUERIES:
+            samples = []
+            for _ in range(args.runs):
+                with timer(samples):
+                    list(search_patients(Patient.objects.all(), query)[:args.page_size])
+            report(f"search '{query}'", samples)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Times the bulk PDF export with different numbers of worker processes.
+
+Usage:
+    python -m benchmarks.pdf_export [--documents 300] [--workers 1,2,4]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+from datetime import date, time, timedelta
+
+from benchmarks.common import setup_django, throwaway_database, timer, report
+
+setup_django()
+
+from django.conf import settings
+
+from appointments.models import Appointment
+from doctors.models import Doctor
+from medicare_core.pdf_export import documents_between, export_documents
+from patients.models import Patient
+from prescriptions.models import Prescription
+
+
+def seed(documents):
+    patient = Patient.objects.create(name='Bench Patient', age=30, gender='O', phone='1', address='1 St', image='x.png')
+    doctor = Doctor.objects.create(name='Dr. Bench', phone='1', specialty='GP', available_days='Mon', image='x.png')
+    appointments = Appointment.objects.bulk_create(
+        Appointment(patient=patient, doctor=doctor, date=date(2025, 1, 1) + timedelta(days=i), time=time(9, 0))
+        for i in range(documents)
+    )
+    Prescription.objects.bulk_create(
+        Prescription(appointment=appointment, medicines='Aspirin 100mg\nParacetamol 500mg', advice='Rest')
+        for appointment in appointments
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--documents', type=int, default=300)
+    parser.add_argument('--workers', default=f'1,{os.cpu_count() or 1}')
+    args = parser.parse_args()
+
+    with throwaway_database():
+        seed(args.documents)
+        for workers in [int(w) for w in args.workers.split(',')]:
+            # A fresh document cache each time, so every PDF is rendered
+            workdir = tempfile.mkdtemp(prefix='medicare-export-')
+            settings.DOCUMENT_CACHE_ROOT = os.path.join(workdir, 'cache')
+            samples = []
+            with timer(samples):
+                export_documents('prescriptions', documents_between('prescriptions'),
+                                 os.path.join(workdir, 'export.zip'), workers=workers)
+            report(f"export {args.documents} prescriptions [{workers} workers]", samples)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
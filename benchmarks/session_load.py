@@ -0,0 +1,88 @@
+"""
+Database statements per visit with database, cached_db and cache-only
+sessions. A visit is a patient logging in, opening the pages they use, booking an
+appointment through the form and logging out. Statements are counted by
+kind, and those on django_session separately.
+
+Usage:
+    python -m benchmarks.session_load [--visits 50] [--pages 10]
+"""
+import argparse
+from collections import Counter
+from datetime import date, timedelta
+
+from benchmarks.common import report, setup_django, throwaway_database, timer
+
+setup_django()
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from doctors.models import Doctor
+from patients.models import Patient
+
+ENGINES = [
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+    'django.contrib.sessions.backends.cache',
+]
+PAGES = ['home', 'appointment_list', 'invoice_list', 'prescription_list', 'doctor_list']
+
+
+class StatementCounter:
+    def __init__(self):
+        self.kinds = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        verb = sql.lstrip().split(None, 1)[0].upper()
+        # Savepoints and other transaction control are not counted
+        kind = 'read' if verb == 'SELECT' else 'write' if verb in ('INSERT', 'UPDATE', 'DELETE') else None
+        if kind:
+            self.kinds[kind] += 1
+            if 'django_session' in sql:
+                self.kinds[f'session {kind}'] += 1
+        return execute(sql, params, many, context)
+
+
+def visit(client, pages, doctor, day):
+    client.post(reverse('patient_login'), {'username': 'visitor', 'password': 'bench-pass'})
+    for i in range(pages):
+        client.get(reverse(PAGES[i % len(PAGES)]))
+    response = client.post(reverse('appointment_add'), {'doctor': doctor.pk, 'date': day.isoformat(), 'time': '10:00'})
+    assert response.status_code == 302, response.status_code
+    client.post(reverse('logout'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--visits', type=int, default=50)
+    parser.add_argument('--pages', type=int, default=10, help='Pages opened per visit.')
+    args = parser.parse_args()
+
+    with throwaway_database():
+        user = get_user_model().objects.create_user(username='visitor', password='bench-pass', role='patient')
+        Patient.objects.create(user=user, name='Visitor', age=30, gender='O', phone='1', address='1 St', image='x.png')
+        doctor = Doctor.objects.create(name='Dr. Bench', phone='1', specialty='GP', available_days='Mon,Tue,Wed,Thu,Fri,Sat,Sun', image='x.png')
+        day = date.today() + timedelta(days=1)
+        for engine in ENGINES:
+            settings.SESSION_ENGINE = engine
+            cache.clear()
+            statements = StatementCounter()
+            samples = []
+            for _ in range(args.visits):
+                # A new client loads the middleware, and so the session engine, again
+                client = Client()
+                with connection.execute_wrapper(statements), timer(samples):
+                    visit(client, args.pages, doctor, day)
+                day += timedelta(days=1)
+            per_visit = {kind: count / args.visits for kind, count in sorted(statements.kinds.items())}
+            report(f"{engine.rsplit('.', 1)[1]} sessions, per visit", samples)
+            print('    ' + ', '.join(f'{kind}: {count:.1f}' for kind, count in per_visit.items()))
+
+
+if __name__ == '__main__':
+    main()
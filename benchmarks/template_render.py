@@ -0,0 +1,90 @@
+"""
+Render time of the doctor grid and other list pages with and without the
+cached template loader and the fragment cache. Template time is taken from
+the Server-Timing header that PerformanceMiddleware adds.
+
+- uncached: templates are parsed on every render and fragments never hit
+  (the state before both were turned on);
+- cached loader: templates are compiled once, fragments still miss;
+- cached loader + fragments: as in production, with warm fragments.
+
+Usage:
+    python -m benchmarks.template_render [--doctors 200] [--runs 200]
+"""
+import argparse
+from copy import deepcopy
+
+from benchmarks.common import percentile, report, setup_django, throwaway_database, timer
+
+setup_django()
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from doctors.models import Doctor
+
+PAGES = ['doctor_list', 'appointment_list', 'home']
+
+
+def templates_with(loaders):
+    templates = deepcopy(settings.TEMPLATES)
+    templates[0]['OPTIONS']['loaders'] = loaders
+    return templates
+
+
+def configurations():
+    plain = settings.TEMPLATE_LOADERS
+    no_fragments = {**settings.CACHES, 'template_fragments': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+    return [
+        ('uncached', override_settings(TEMPLATES=templates_with(plain), CACHES=no_fragments)),
+        ('cached loader', override_settings(
+            TEMPLATES=templates_with([('django.template.loaders.cached.Loader', plain)]), CACHES=no_fragments,
+        )),
+        ('cached loader + fragments', override_settings(
+            TEMPLATES=templates_with([('django.template.loaders.cached.Loader', plain)]),
+        )),
+    ]
+
+
+def template_ms(response):
+    for entry in response['Server-Timing'].split(', '):
+        name, _, rest = entry.partition(';dur=')
+        if name == 'template':
+            return float(rest.split(';')[0])
+    return 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--doctors', type=int, default=200)
+    parser.add_argument('--runs', type=int, default=200)
+    args = parser.parse_args()
+
+    with throwaway_database():
+        Doctor.objects.bulk_create(
+            Doctor(name=f'Dr. {i}', phone='1', specialty='GP', available_days='Mon,Wed', image=f'avatars/{i % 50}.png')
+            for i in range(args.doctors)
+        )
+        user = get_user_model().objects.create_user(username='bench', password='x', role='admin')
+        for label, overrides in configurations():
+            with overrides:
+                cache.clear()
+                client = Client()
+                client.force_login(user)
+                for name in PAGES:
+                    url = reverse(name)
+                    client.get(url)
+                    samples, rendering = [], []
+                    for _ in range(args.runs):
+                        with timer(samples):
+                            response = client.get(url)
+                        rendering.append(template_ms(response))
+                    report(f"{label}: {name}", samples)
+                    print(f"    template p50={percentile(rendering, 50):.2f} ms  p99={percentile(rendering, 99):.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
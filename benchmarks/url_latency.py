@@ -0,0 +1,164 @@
+"""
+Latency and query count for every page in medicare_core/urls.py at growing
+data volumes. Each scale adds data with seed_database(), so later scales
+include the earlier ones, and the same arguments always produce the same
+data. Included URL sets are represented by the API list, detail and extra
+GET routes, the admin index and changelists, and the allauth login page.
+
+Pages are fetched as the user who would normally open them: an admin by
+default, the owning patient for the payment pages and a doctor for
+prescription_add. URLs that change data on GET are skipped.
+
+Usage:
+    python -m benchmarks.url_latency [--scales 1000,10000,100000] [--runs 5]
+"""
+import argparse
+
+from benchmarks.common import report, setup_django, throwaway_database, timer
+
+setup_django()
+
+from allauth.socialaccount.models import SocialApp
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.sites.models import Site
+from django.db import connection
+from django.test import Client
+from django.urls import URLResolver, reverse
+
+from billing.models import Invoice, Payment
+from doctors.models import Doctor
+from medicare_core.seeding import seed_database
+from medicare_core.urls import router, urlpatterns
+from patients.models import Patient
+from prescriptions.models import Prescription
+
+# GET requests to these change data
+SKIPPED = {'logout', 'appointment_complete'}
+USER_FOR = {
+    'payment_select': 'patient',
+    'payment_process': 'patient',
+    'payment_success': 'patient',
+    'payment_receipt_pdf': 'patient',
+    'prescription_add': 'doctor',
+}
+ANONYMOUS = {
+    'login', 'patient_login', 'doctor_login', 'admin_login',
+    'signup', 'patient_signup', 'doctor_signup', 'admin_signup',
+}
+
+
+def scale_sizes(appointments):
+    """Patients, doctors and appointments for one scale."""
+    return {'patients': max(10, appointments // 5), 'doctors': max(5, appointments // 500), 'appointments': appointments}
+
+
+def create_fixtures():
+    """
+    An admin, a doctor and a patient who owns a paid and an unpaid invoice,
+    the objects each URL is opened with, and the Google app the login pages
+    link to.
+    """
+    SocialApp.objects.create(provider='google', name='Google', client_id='bench', secret='bench').sites.add(Site.objects.get_current())
+    User = get_user_model()
+    users = {
+        'admin': User.objects.create_superuser(username='bench-admin', password='x', role='admin'),
+        'doctor': User.objects.create_user(username='bench-doctor', password='x', role='doctor'),
+        'patient': User.objects.create_user(username='bench-patient', password='x', role='patient'),
+    }
+    Doctor.objects.filter(pk=Doctor.objects.order_by('pk').values('pk')[:1]).update(user=users['doctor'])
+    payment = Payment.objects.select_related('invoice').order_by('pk').first()
+    Patient.objects.filter(pk=payment.invoice.patient_id).update(user=users['patient'])
+    unpaid = Invoice.objects.create(patient_id=payment.invoice.patient_id, amount=50, items='Consultation')
+    fixtures = {
+        'patient_detail': {'pk': payment.invoice.patient_id},
+        'prescription_pdf': {'pk': Prescription.objects.order_by('pk').values_list('pk', flat=True).first()},
+        'invoice_detail': {'pk': payment.invoice_id},
+        'payment_select': {'invoice_id': unpaid.pk},
+        'payment_process': {'invoice_id': unpaid.pk, 'method': 'VISA'},
+        'payment_success': {'invoice_id': payment.invoice_id},
+        'payment_receipt_pdf': {'payment_id': payment.pk},
+    }
+    return users, fixtures
+
+
+def url_cases(fixtures):
+    """(label, path, user role or None) for each URL to measure."""
+    cases = []
+    for pattern in urlpatterns:
+        if isinstance(pattern, URLResolver) or pattern.name in SKIPPED:
+            continue
+        role = None if pattern.name in ANONYMOUS else USER_FOR.get(pattern.name, 'admin')
+        cases.append((pattern.name, reverse(pattern.name, kwargs=fixtures.get(pattern.name)), role))
+
+    for prefix, viewset, _ in router.registry:
+        cases.append((f'api {prefix} list', f'/api/{prefix}/', 'admin'))
+        pk = viewset.queryset.model.objects.order_by('pk').values_list('pk', flat=True).first()
+        cases.append((f'api {prefix} detail', f'/api/{prefix}/{pk}/', 'admin'))
+        for extra in viewset.get_extra_actions():
+            if not extra.detail and 'get' in extra.mapping:
+                cases.append((f'api {prefix} {extra.url_path}', f'/api/{prefix}/{extra.url_path}/', 'admin'))
+
+    cases.append(('admin index', reverse('admin:index'), 'admin'))
+    for model in admin.site._registry:
+        opts = model._meta
+        cases.append((f'admin {opts.model_name} list', reverse(f'admin:{opts.app_label}_{opts.model_name}_changelist'), 'admin'))
+    cases.append(('account_login', reverse('account_login'), None))
+    return cases
+
+
+class QueryCounter:
+    # An execute wrapper rather than CaptureQueriesContext, whose log stops
+    # growing after 9,000 queries
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def fetch(client, path):
+    response = client.get(path)
+    # Streaming responses are only complete once their body is read
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scales', default='1000,10000,100000', help='Appointment counts to measure at.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--only', help='Only measure URLs whose label contains this text.')
+    args = parser.parse_args()
+
+    with throwaway_database():
+        seeded = {'patients': 0, 'doctors': 0, 'appointments': 0}
+        users = fixtures = None
+        for index, scale in enumerate(sorted(int(n) for n in args.scales.split(','))):
+            sizes = scale_sizes(scale)
+            result = seed_database(seed=index, **{key: sizes[key] - seeded[key] for key in sizes})
+            seeded = sizes
+            print(f"\n== {scale:,} appointments ({sum(result.counts.values()):,} rows added in {result.elapsed:.1f}s)")
+            if users is None:
+                users, fixtures = create_fixtures()
+            # Errors are reported as a 500 status rather than stopping the run
+            clients = {None: Client(raise_request_exception=False)}
+            for role, user in users.items():
+                clients[role] = Client(raise_request_exception=False)
+                clients[role].force_login(user)
+
+            for label, path, role in url_cases(fixtures):
+                if args.only and args.only not in label:
+                    continue
+                samples = []
+                for _ in range(args.runs):
+                    queries = QueryCounter()
+                    with connection.execute_wrapper(queries), timer(samples):
+                        response = fetch(clients[role], path)
+                report(f"{label} [{response.status_code}, {queries.count} queries]", samples)
+
+
+if __name__ == '__main__':
+    main()
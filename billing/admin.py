@@ -1,7 +1,15 @@
 from django.contrib import admin
-from .models import Invoice
+from medicare_core.pdf_export import export_action
+from .models import Invoice, Payment
 
 @admin.register(Invoice)
 class InvoiceAdmin(admin.ModelAdmin):
     list_display = ('id', 'patient', 'amount', 'date', 'is_paid')
     list_filter = ('is_paid', 'date')
+
+@admin.register(Payment)
+class PaymentAdmin(admin.ModelAdmin):
+    list_display = ('id', 'invoice', 'method', 'amount', 'timestamp')
+    list_filter = ('method',)
+    date_hierarchy = 'timestamp'
+    actions = [export_action('receipts')]
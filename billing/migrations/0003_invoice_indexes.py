@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0002_appointment_indexes'),
+        ('billing', '0002_payment'),
+        ('patients', '0004_patient_user'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['patient', '-date'], name='invoice_patient_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['-date'], name='invoice_date_idx'),
+        ),
+    ]
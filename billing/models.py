@@ -9,6 +9,14 @@ class Invoice(models.Model):
     items = models.TextField(help_text="Description of billed items")
     date = models.DateField(auto_now_add=True)
     is_paid = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # invoice_list for patients and for admin/staff
+            models.Index(fields=['patient', '-date'], name='invoice_patient_date_idx'),
+            models.Index(fields=['-date'], name='invoice_date_idx'),
+        ]
 
     def __str__(self):
         return f"Invoice #{self.id} - {self.patient.name}"
@@ -0,0 +1,89 @@
+from io import BytesIO
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+from medicare_core.documents import INFO_TABLE_STYLE, STYLES, TITLE_STYLE, content_version
+
+# Bump when the layout below changes so cached PDFs are re-rendered
+LAYOUT_VERSION = 1
+
+DETAIL_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+])
+PAYMENT_TABLE_STYLE = TableStyle(
+    DETAIL_TABLE_STYLE.getCommands() + [('BACKGROUND', (0, 3), (-1, 3), colors.HexColor('#dbeafe'))]
+)
+
+
+def receipt_version(payment):
+    invoice = payment.invoice
+    return content_version(
+        LAYOUT_VERSION, payment.pk, payment.timestamp.isoformat(), payment.transaction_id,
+        payment.method, payment.amount, invoice.pk, invoice.items, invoice.patient.name, invoice.patient.phone,
+    )
+
+
+def render_receipt_pdf(payment):
+    invoice = payment.invoice
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    elements = []
+
+    # Title
+    elements.append(Paragraph("Payment Receipt", TITLE_STYLE))
+    elements.append(Spacer(1, 0.2*inch))
+
+    # Receipt Info
+    info_data = [
+        ['Receipt #:', str(payment.id), 'Date:', payment.timestamp.strftime('%Y-%m-%d')],
+        ['Transaction ID:', payment.transaction_id, 'Time:', payment.timestamp.strftime('%H:%M')],
+    ]
+
+    info_table = Table(info_data, colWidths=[1.5*inch, 2*inch, 1*inch, 1.5*inch])
+    info_table.setStyle(INFO_TABLE_STYLE)
+
+    elements.append(info_table)
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Patient Info
+    elements.append(Paragraph("<b>Patient Information:</b>", STYLES['Heading2']))
+    elements.append(Spacer(1, 0.1*inch))
+
+    patient_data = [
+        ['Name:', invoice.patient.name],
+        ['Phone:', invoice.patient.phone],
+    ]
+
+    patient_table = Table(patient_data, colWidths=[1.5*inch, 4.5*inch])
+    patient_table.setStyle(DETAIL_TABLE_STYLE)
+
+    elements.append(patient_table)
+    elements.append(Spacer(1, 0.2*inch))
+
+    # Payment Details
+    elements.append(Paragraph("<b>Payment Details:</b>", STYLES['Heading2']))
+    elements.append(Spacer(1, 0.1*inch))
+
+    payment_data = [
+        ['Invoice ID:', f'#{invoice.id}'],
+        ['Items:', invoice.items],
+        ['Payment Method:', payment.get_method_display()],
+        ['Amount Paid:', f'${payment.amount}'],
+    ]
+
+    payment_table = Table(payment_data, colWidths=[1.5*inch, 4.5*inch])
+    payment_table.setStyle(PAYMENT_TABLE_STYLE)
+
+    elements.append(payment_table)
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Footer
+    elements.append(Paragraph("<i>Thank you for choosing MediCare!</i>", STYLES['Normal']))
+
+    doc.build(elements)
+    return buffer.getvalue()
@@ -1,9 +1,14 @@
 from rest_framework import serializers
+from medicare_core.serializers import DynamicFieldsModelSerializer
 from .models import Invoice
 
-class InvoiceSerializer(serializers.ModelSerializer):
+class InvoiceSerializer(DynamicFieldsModelSerializer):
     patient_name = serializers.ReadOnlyField(source='patient.name')
 
     class Meta:
         model = Invoice
         fields = '__all__'
+        expandable_fields = {
+            'patient': 'patients.serializers.PatientSerializer',
+            'appointment': 'appointments.serializers.AppointmentSerializer',
+        }
@@ -1,3 +1,38 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from patients.models import Patient
+from . import views
+from .models import Invoice, Payment
+
+User = get_user_model()
+
+
+class ReceiptPdfTests(TestCase):
+    def setUp(self):
+        self.cache_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(DOCUMENT_CACHE_ROOT=self.cache_root)
+        self.settings_override.enable()
+        patient = Patient.objects.create(name='John Doe', age=30, gender='M', phone='1', address='1 St', image='x.png')
+        invoice = Invoice.objects.create(patient=patient, amount=50, items='Consultation', is_paid=True)
+        self.payment = Payment.objects.create(invoice=invoice, method='VISA', transaction_id='tx-1', amount=50)
+        self.client.force_login(User.objects.create_user(username='staff', password='pw', role='staff'))
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.cache_root, ignore_errors=True)
+
+    def test_receipt_is_served_from_cache(self):
+        url = reverse('payment_receipt_pdf', args=[self.payment.pk])
+        with mock.patch.object(views, 'render_receipt_pdf', wraps=views.render_receipt_pdf) as render:
+            first = self.client.get(url)
+            self.assertTrue(b''.join(first.streaming_content).startswith(b'%PDF'))
+            second = self.client.get(url, headers={'if-modified-since': first['Last-Modified']})
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(second.status_code, 304)
+        self.assertIn('private', first['Cache-Control'])
@@ -1,8 +1,13 @@
 from django.contrib import admin
-from .models import Doctor
+from .models import Doctor, DoctorAvailability
+
+class DoctorAvailabilityInline(admin.TabularInline):
+    model = DoctorAvailability
+    extra = 0
 
 @admin.register(Doctor)
 class DoctorAdmin(admin.ModelAdmin):
+    inlines = [DoctorAvailabilityInline]
     list_display = ('name', 'specialty', 'phone')
     search_fields = ('name', 'specialty')
     list_filter = ('specialty',)
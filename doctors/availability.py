@@ -0,0 +1,177 @@
+"""
+Weekly availability bitmaps for doctors.
+
+A doctor's week is stored as, for each weekday, a list of (bitmap, slot
+length) pairs. Bit i of a bitmap is set when a slot starts at minute
+i * GRID_MINUTES of the day. Finding free slots on a date is then a few
+integer operations: take the weekday's bitmaps, clear the bits covered by
+booked appointments and decode what is left.
+"""
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from appointments.models import Appointment
+from medicare_core.replicas import reading_from_replica
+from .models import Doctor, DoctorAvailability
+
+GRID_MINUTES = 5
+
+# Used for doctors who only have the free-form `available_days` string
+DEFAULT_START = time(9, 0)
+DEFAULT_END = time(17, 0)
+DEFAULT_SLOT_MINUTES = 30
+
+DAY_NAMES = {name: index for index, name in DoctorAvailability.WEEKDAY_CHOICES}
+
+CACHE_TIMEOUT = 60 * 60
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def slot_bitmap(start_time, end_time, slot_minutes):
+    """Returns the bitmap of slot starts between start_time and end_time."""
+    bitmap = 0
+    start, end = _minutes(start_time), _minutes(end_time)
+    # Off-grid hours saved before clean() checked them start at the next grid point
+    start = -(-start // GRID_MINUTES) * GRID_MINUTES
+    for minute in range(start, end - slot_minutes + 1, slot_minutes):
+        bitmap |= 1 << (minute // GRID_MINUTES)
+    return bitmap
+
+
+def booked_mask(booked_minute, slot_minutes):
+    """Bits of every slot start whose slot would contain booked_minute."""
+    low = max(0, -(-(booked_minute - slot_minutes + 1) // GRID_MINUTES))
+    high = booked_minute // GRID_MINUTES
+    return ((1 << (high - low + 1)) - 1) << low
+
+
+def decode_bitmap(bitmap):
+    slots = []
+    while bitmap:
+        lowest = bitmap & -bitmap
+        minute = (lowest.bit_length() - 1) * GRID_MINUTES
+        slots.append(time(minute // 60, minute % 60))
+        bitmap ^= lowest
+    return slots
+
+
+def parse_available_days(value):
+    """Turns a string like 'Mon, Wed,fri' into weekday numbers."""
+    days = set()
+    for part in (value or '').split(','):
+        name = part.strip()[:3].title()
+        if name in DAY_NAMES:
+            days.add(DAY_NAMES[name])
+    return sorted(days)
+
+
+def build_weekly(rows, available_days):
+    """Builds {weekday: [(bitmap, slot_minutes), ...]} for one doctor."""
+    weekly = {}
+    if rows:
+        for weekday, start_time, end_time, slot_minutes in rows:
+            weekly.setdefault(weekday, []).append((slot_bitmap(start_time, end_time, slot_minutes), slot_minutes))
+    else:
+        default = (slot_bitmap(DEFAULT_START, DEFAULT_END, DEFAULT_SLOT_MINUTES), DEFAULT_SLOT_MINUTES)
+        for weekday in parse_available_days(available_days):
+            weekly[weekday] = [default]
+    return weekly
+
+
+def weekly_cache_key(doctor_id):
+    return f'availability:weekly:{doctor_id}'
+
+
+def invalidate_weekly(doctor_id):
+    cache.delete(weekly_cache_key(doctor_id))
+
+
+def get_weekly_bitmaps(doctors):
+    """
+    Returns {doctor_id: weekly bitmaps} for (id, available_days) pairs. Cached
+    entries are fetched in one round trip; misses are built from a single
+    DoctorAvailability query and written back.
+    """
+    available_days = dict(doctors)
+    keys = {weekly_cache_key(doctor_id): doctor_id for doctor_id in available_days}
+    found = {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+
+    missing = [doctor_id for doctor_id in available_days if doctor_id not in found]
+    if missing:
+        # Entries outlive replica lag, so misses are built from the primary
+        db = DEFAULT_DB_ALIAS if reading_from_replica() else None
+        if db:
+            available_days.update(Doctor.objects.using(db).filter(pk__in=missing).values_list('id', 'available_days'))
+        rows = {}
+        for doctor_id, *row in DoctorAvailability.objects.using(db).filter(doctor_id__in=missing).values_list(
+            'doctor_id', 'weekday', 'start_time', 'end_time', 'slot_minutes'
+        ):
+            rows.setdefault(doctor_id, []).append(row)
+        built = {doctor_id: build_weekly(rows.get(doctor_id), available_days[doctor_id]) for doctor_id in missing}
+        cache.set_many({weekly_cache_key(doctor_id): weekly for doctor_id, weekly in built.items()}, CACHE_TIMEOUT)
+        found.update(built)
+    return found
+
+
+def free_slots(weekly, day, booked_times=(), not_before=None):
+    """Free slot start times on `day` for one doctor's weekly bitmaps."""
+    free = 0
+    booked = [_minutes(t) for t in booked_times]
+    for bitmap, slot_minutes in weekly.get(day.weekday(), ()):
+        for minute in booked:
+            bitmap &= ~booked_mask(minute, slot_minutes)
+        free |= bitmap
+    if not_before is not None:
+        free &= ~((1 << -(-_minutes(not_before) // GRID_MINUTES)) - 1)
+    return decode_bitmap(free)
+
+
+def next_free_slots(start_date, days=1, specialty=None, limit=3, now=None):
+    """
+    Finds up to `limit` free slots per doctor within `days` days from
+    start_date, optionally for one specialty. Runs a fixed number of queries
+    however many doctors match. Returns a list of dicts sorted by the
+    earliest free slot.
+    """
+    doctors = Doctor.objects.all()
+    if specialty:
+        doctors = doctors.filter(specialty__iexact=specialty)
+    doctors = list(doctors.values_list('id', 'name', 'specialty', 'available_days'))
+    if not doctors:
+        return []
+
+    weekly = get_weekly_bitmaps([(doctor_id, days_value) for doctor_id, _, _, days_value in doctors])
+    end_date = start_date + timedelta(days=days - 1)
+    booked = {}
+    for doctor_id, day, booked_time in Appointment.objects.filter(
+        doctor_id__in=[doctor[0] for doctor in doctors],
+        date__range=(start_date, end_date),
+    ).exclude(status='cancelled').values_list('doctor_id', 'date', 'time'):
+        booked.setdefault((doctor_id, day), []).append(booked_time)
+
+    results = []
+    for doctor_id, name, doctor_specialty, _ in doctors:
+        slots = []
+        for offset in range(days):
+            day = start_date + timedelta(days=offset)
+            not_before = now.time() if now is not None and now.date() == day else None
+            for slot in free_slots(weekly[doctor_id], day, booked.get((doctor_id, day), ()), not_before):
+                slots.append(datetime.combine(day, slot))
+                if len(slots) == limit:
+                    break
+            if len(slots) == limit:
+                break
+        if slots:
+            results.append({
+                'doctor': doctor_id,
+                'doctor_name': name,
+                'specialty': doctor_specialty,
+                'slots': slots,
+            })
+    results.sort(key=lambda result: result['slots'][0])
+    return results
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.core.exceptions import ValidationError
 
 class Doctor(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='doctor_profile')
@@ -9,14 +10,47 @@ class Doctor(models.Model):
     available_days = models.CharField(max_length=200, help_text="Comma-separated days, e.g., Mon,Tue,Wed")
     image = models.ImageField(upload_to='doctors/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def save(self, *args, **kwargs):
-        if not self.image:
-            from medicare_core.utils import generate_profile_image
-            img_content = generate_profile_image(self.name)
-            if img_content:
-                self.image.save(f"{self.name}_profile.png", img_content, save=False)
         super().save(*args, **kwargs)
+        if not self.image:
+            from avatars.queue import attach_avatar
+            attach_avatar(self)
 
     def __str__(self):
         return f"{self.name} - {self.specialty}"
+
+
+class DoctorAvailability(models.Model):
+    WEEKDAY_CHOICES = (
+        (0, 'Mon'),
+        (1, 'Tue'),
+        (2, 'Wed'),
+        (3, 'Thu'),
+        (4, 'Fri'),
+        (5, 'Sat'),
+        (6, 'Sun'),
+    )
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='availability')
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    slot_minutes = models.PositiveSmallIntegerField(default=30)
+
+    class Meta:
+        ordering = ['doctor', 'weekday', 'start_time']
+        verbose_name_plural = 'doctor availability'
+
+    def clean(self):
+        from .availability import GRID_MINUTES
+        if self.start_time and self.end_time and self.end_time <= self.start_time:
+            raise ValidationError("End time must be after start time.")
+        for value in (self.start_time, self.end_time):
+            if value and (value.minute % GRID_MINUTES or value.second or value.microsecond):
+                raise ValidationError(f"Start and end times must be on a {GRID_MINUTES} minute boundary.")
+        if not self.slot_minutes or self.slot_minutes % GRID_MINUTES:
+            raise ValidationError(f"Slot length must be a positive multiple of {GRID_MINUTES} minutes.")
+
+    def __str__(self):
+        return f"{self.doctor.name}: {self.get_weekday_display()} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
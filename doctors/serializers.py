@@ -1,7 +1,10 @@
-from rest_framework import serializers
+from medicare_core.serializers import DynamicFieldsModelSerializer
 from .models import Doctor
 
-class DoctorSerializer(serializers.ModelSerializer):
+class DoctorSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Doctor
         fields = '__all__'
+        expandable_fields = {
+            'user': 'users.serializers.UserSerializer',
+        }
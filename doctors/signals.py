@@ -0,0 +1,22 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .availability import invalidate_weekly
+from .models import Doctor, DoctorAvailability
+
+
+def _invalidate(doctor_id):
+    invalidate_weekly(doctor_id)
+    # Again after commit, in case a concurrent read cached the old schedule
+    transaction.on_commit(lambda: invalidate_weekly(doctor_id))
+
+
+@receiver([post_save, post_delete], sender=DoctorAvailability)
+def availability_changed(sender, instance, **kwargs):
+    _invalidate(instance.doctor_id)
+
+
+@receiver([post_save, post_delete], sender=Doctor)
+def doctor_changed(sender, instance, **kwargs):
+    _invalidate(instance.pk)
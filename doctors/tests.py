@@ -1,3 +1,111 @@
-from django.test import TestCase
+from datetime import date, datetime, time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from appointments.models import Appointment
+from patients.models import Patient
+from .availability import build_weekly, free_slots, get_weekly_bitmaps, next_free_slots, parse_available_days
+from .models import Doctor, DoctorAvailability
+
+User = get_user_model()
+
+MONDAY = date(2025, 1, 6)
+
+
+class BitmapTests(SimpleTestCase):
+    def test_parse_available_days(self):
+        self.assertEqual(parse_available_days('Mon, wed,Friday,xyz'), [0, 2, 4])
+
+    def test_slots_from_availability_rows(self):
+        weekly = build_weekly([(0, time(9, 0), time(10, 0), 20)], '')
+        self.assertEqual(free_slots(weekly, MONDAY), [time(9, 0), time(9, 20), time(9, 40)])
+        self.assertEqual(free_slots(weekly, date(2025, 1, 7)), [])
+
+    def test_booking_blocks_the_slot_that_contains_it(self):
+        weekly = build_weekly([(0, time(9, 0), time(10, 0), 30)], '')
+        self.assertEqual(free_slots(weekly, MONDAY, [time(9, 10)]), [time(9, 30)])
+
+    def test_not_before_hides_past_slots(self):
+        weekly = build_weekly([(0, time(9, 0), time(10, 0), 30)], '')
+        self.assertEqual(free_slots(weekly, MONDAY, not_before=time(9, 5)), [time(9, 30)])
+
+    def test_off_grid_start_is_rounded_up(self):
+        weekly = build_weekly([(0, time(9, 7), time(10, 7), 30)], '')
+        self.assertEqual(free_slots(weekly, MONDAY), [time(9, 10)])
+
+    def test_fallback_to_available_days_string(self):
+        weekly = build_weekly(None, 'Mon')
+        slots = free_slots(weekly, MONDAY)
+        self.assertEqual((slots[0], slots[-1], len(slots)), (time(9, 0), time(16, 30), 16))
+
+
+class AvailabilityApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='staff', password='pw', role='staff'))
+        self.cardio = Doctor.objects.create(name='Dr. Heart', phone='1', specialty='Cardiology', available_days='', image='x.png')
+        DoctorAvailability.objects.create(doctor=self.cardio, weekday=0, start_time=time(9, 0), end_time=time(10, 0))
+        self.derm = Doctor.objects.create(name='Dr. Skin', phone='2', specialty='Dermatology', available_days='Mon', image='x.png')
+        patient = Patient.objects.create(name='John Doe', age=30, gender='M', phone='3', address='1 St', image='x.png')
+        Appointment.objects.create(patient=patient, doctor=self.cardio, date=MONDAY, time=time(9, 0))
+
+    def test_free_slots_skip_booked_appointments(self):
+        response = self.client.get('/api/doctors/availability/', {'date': '2025-01-06', 'specialty': 'cardiology'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [{
+            'doctor': self.cardio.pk,
+            'doctor_name': 'Dr. Heart',
+            'specialty': 'Cardiology',
+            'slots': ['2025-01-06T09:30'],
+        }])
+
+    def test_looks_ahead_over_several_days(self):
+        results = next_free_slots(date(2025, 1, 5), days=2, limit=2)
+        self.assertEqual([r['doctor'] for r in results], [self.derm.pk, self.cardio.pk])
+        self.assertEqual(results[0]['slots'], [datetime(2025, 1, 6, 9, 0), datetime(2025, 1, 6, 9, 30)])
+
+    def test_schedule_change_invalidates_cache(self):
+        next_free_slots(MONDAY)
+        with self.captureOnCommitCallbacks(execute=True):
+            DoctorAvailability.objects.create(doctor=self.cardio, weekday=0, start_time=time(14, 0), end_time=time(14, 30))
+        slots = next_free_slots(MONDAY, specialty='Cardiology', limit=5)[0]['slots']
+        self.assertIn(datetime(2025, 1, 6, 14, 0), slots)
+
+    def test_query_count_is_independent_of_doctor_count(self):
+        Doctor.objects.bulk_create(
+            Doctor(name=f'Dr. {i}', phone='1', specialty='GP', available_days='Mon,Tue', image='x.png')
+            for i in range(50)
+        )
+        cache.clear()
+        with CaptureQueriesContext(connection) as cold:
+            self.client.get('/api/doctors/availability/', {'date': '2025-01-06'})
+        with CaptureQueriesContext(connection) as warm:
+            response = self.client.get('/api/doctors/availability/', {'date': '2025-01-06'})
+        self.assertEqual(len(response.data), 52)
+        self.assertLessEqual(len(cold), 3)
+        self.assertLessEqual(len(warm), 2)
+
+    def test_cached_week_is_built_from_the_primary(self):
+        # A lagging replica still lists Dr. Skin as working on Tuesdays only
+        with mock.patch('doctors.availability.reading_from_replica', return_value=True):
+            weekly = get_weekly_bitmaps([(self.derm.pk, 'Tue')])[self.derm.pk]
+        self.assertTrue(free_slots(weekly, MONDAY))
+        self.assertEqual(get_weekly_bitmaps([(self.derm.pk, 'Tue')])[self.derm.pk], weekly)
+
+    def test_hours_off_the_grid_are_rejected(self):
+        for start, end in ((time(9, 7), time(10, 0)), (time(9, 0), time(10, 7))):
+            row = DoctorAvailability(doctor=self.cardio, weekday=1, start_time=start, end_time=end, slot_minutes=30)
+            with self.assertRaises(ValidationError):
+                row.full_clean()
+        DoctorAvailability(doctor=self.cardio, weekday=1, start_time=time(9, 5), end_time=time(10, 0)).full_clean()
+
+    def test_rejects_bad_date(self):
+        self.assertEqual(self.client.get('/api/doctors/availability/', {'date': 'soon'}).status_code, 400)
@@ -1,28 +1,81 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponseForbidden
+from django.views.decorators.http import condition
+from datetime import date
+from django.utils import timezone
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from medicare_core.api import OptimizedQuerysetMixin
+from medicare_core.conditional import ConditionalGetMixin, collection_etag, fingerprint
+from medicare_core.pagination import keyset_page
+from medicare_core.replicas import replica_reads
 from rest_framework.permissions import IsAuthenticated
+from .availability import next_free_slots
 from .models import Doctor
 from .serializers import DoctorSerializer
 from .forms import DoctorForm
 
 # API ViewSet
-class DoctorViewSet(viewsets.ModelViewSet):
-    queryset = Doctor.objects.all()
+class DoctorViewSet(ConditionalGetMixin, OptimizedQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Doctor.objects.order_by('-created_at', '-id')
+    cursor_ordering = ('-created_at', '-id')
     serializer_class = DoctorSerializer
     permission_classes = [IsAuthenticated]
 
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def availability(self, request):
+        """
+        Next free slots per doctor: ?date=YYYY-MM-DD (default today),
+        ?specialty=, ?days= to look ahead (1-14) and ?limit= slots per doctor.
+        """
+        now = timezone.localtime()
+        try:
+            start_date = date.fromisoformat(request.query_params['date']) if 'date' in request.query_params else now.date()
+            days = min(max(int(request.query_params.get('days', 1)), 1), 14)
+            limit = min(max(int(request.query_params.get('limit', 3)), 1), 20)
+        except ValueError:
+            raise ValidationError("date must be YYYY-MM-DD; days and limit must be integers.")
+
+        results = next_free_slots(
+            start_date,
+            days=days,
+            specialty=request.query_params.get('specialty'),
+            limit=limit,
+            now=now.replace(tzinfo=None),
+        )
+        for result in results:
+            result['slots'] = [slot.strftime('%Y-%m-%dT%H:%M') for slot in result['slots']]
+        return Response(results)
+
 # UI Views
+def doctors_fingerprint(request):
+    # Read once per request, from the database the page itself reads
+    if not hasattr(request, '_doctors_fingerprint'):
+        request._doctors_fingerprint = fingerprint(Doctor.objects.all())
+    return request._doctors_fingerprint
+
+def doctor_list_etag(request):
+    # The page shows the doctors and, in the nav, who is logged in
+    user = request.user
+    return collection_etag(request.get_full_path(), user.pk, getattr(user, 'updated_at', None), *doctors_fingerprint(request))
+
+@replica_reads
+@condition(etag_func=doctor_list_etag)
 def doctor_list(request):
     # All users can see doctor list (patients need to select doctors)
-    doctors = Doctor.objects.select_related('user').all()
-    return render(request, 'doctor_list.html', {'doctors': doctors})
+    doctors = Doctor.objects.select_related('user').order_by('id')
+    page = keyset_page(request, doctors)
+    return render(request, 'doctor_list.html', {
+        'doctors': page, 'page': page, 'doctors_fingerprint': doctors_fingerprint(request),
+    })
 
 @login_required
 def doctor_add(request):
     # Only admin/superuser/staff can add doctors
-    if not (request.user.is_superuser or request.user.role in ['admin', 'staff']):
+    if not request.actor.has_role('admin', 'staff'):
         return HttpResponseForbidden("You don't have permission to access this page.")
     if request.method == 'POST':
         form = DoctorForm(request.POST, request.FILES)
@@ -0,0 +1,137 @@
+"""
+Who is making a request. ActorMiddleware sets `request.actor`, which holds
+the user's role and the ids of their patient and doctor profiles, so views
+check ownership by comparing ids instead of following the reverse
+one-to-one relations (one query each, and one more for every failed
+`hasattr`).
+
+The profile ids are looked up with a single query and cached per user.
+Saving or deleting a Patient or Doctor drops the cached entries of the user
+it is linked to, and of the user it was linked to before; saving or deleting
+a user drops their own. Queryset update() skips signals; such changes show
+once the entry expires.
+
+Those deletes only reach other workers through a shared cache. With the
+in-process locmem backend each worker keeps its own entries, so they expire
+after LOCAL_CACHE_TIMEOUT instead, which covers a burst of requests without
+leaving a relinked profile stale for long.
+"""
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils.functional import SimpleLazyObject, cached_property
+
+CACHE_TIMEOUT = 10 * 60
+LOCAL_CACHE_TIMEOUT = 5
+
+
+class Actor:
+    """The user, with their profile ids looked up on first use."""
+
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def _profiles(self):
+        if not self.user.is_authenticated:
+            return (None, None)
+        return profile_ids(self.user.pk)
+
+    @property
+    def patient_id(self):
+        return self._profiles[0]
+
+    @property
+    def doctor_id(self):
+        return self._profiles[1]
+
+    @property
+    def role(self):
+        return self.user.role if self.user.is_authenticated else None
+
+    @property
+    def is_patient(self):
+        return self.patient_id is not None
+
+    @property
+    def is_doctor(self):
+        return self.doctor_id is not None
+
+    def has_role(self, *roles):
+        """True for superusers and for users with one of `roles`."""
+        return self.user.is_superuser or self.role in roles
+
+
+def actor_cache_key(user_id):
+    return f'actor:{user_id}'
+
+
+def profile_cache_timeout():
+    if isinstance(caches['default'], LocMemCache):
+        return LOCAL_CACHE_TIMEOUT
+    return CACHE_TIMEOUT
+
+
+def invalidate_actor(user_id):
+    cache.delete(actor_cache_key(user_id))
+
+
+def profile_ids(user_id):
+    """(patient id, doctor id) of a user, either None when there is no such profile."""
+    key = actor_cache_key(user_id)
+    profiles = cache.get(key)
+    if profiles is None:
+        # Both reverse one-to-ones in one query, as LEFT JOINs
+        profiles = get_user_model().objects.filter(pk=user_id).values_list(
+            'patient_profile', 'doctor_profile'
+        ).first() or (None, None)
+        cache.set(key, profiles, profile_cache_timeout())
+    return profiles
+
+
+class ActorMiddleware:
+    """Sets request.actor. Goes after AuthenticationMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # A lazy object, so request.user is still only loaded when used
+        request.actor = SimpleLazyObject(lambda: Actor(request.user))
+        return self.get_response(request)
+
+
+def _invalidate(*user_ids):
+    for user_id in {user_id for user_id in user_ids if user_id is not None}:
+        invalidate_actor(user_id)
+        # Again after commit, in case a concurrent read cached the old profile
+        transaction.on_commit(lambda user_id=user_id: invalidate_actor(user_id))
+
+
+def _remember_previous_user(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        instance._previous_user_id = None
+    else:
+        instance._previous_user_id = sender.objects.filter(pk=instance.pk).values_list('user_id', flat=True).first()
+
+
+def _profile_changed(sender, instance, **kwargs):
+    _invalidate(instance.user_id, getattr(instance, '_previous_user_id', None))
+
+
+def _user_changed(sender, instance, **kwargs):
+    _invalidate(instance.pk)
+
+
+def connect_signals():
+    user_model = get_user_model()
+    post_save.connect(_user_changed, sender=user_model, dispatch_uid='actors:user:save')
+    post_delete.connect(_user_changed, sender=user_model, dispatch_uid='actors:user:delete')
+    for label in ('patients.Patient', 'doctors.Doctor'):
+        model = apps.get_model(label)
+        pre_save.connect(_remember_previous_user, sender=model, dispatch_uid=f'actors:{label}:pre_save')
+        post_save.connect(_profile_changed, sender=model, dispatch_uid=f'actors:{label}:save')
+        post_delete.connect(_profile_changed, sender=model, dispatch_uid=f'actors:{label}:delete')
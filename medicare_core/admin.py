@@ -0,0 +1,7 @@
+from django.contrib import admin
+from .models import Counter
+
+@admin.register(Counter)
+class CounterAdmin(admin.ModelAdmin):
+    list_display = ('name', 'value', 'updated_at')
+    readonly_fields = ('name', 'value', 'updated_at')
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class MedicareCoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'medicare_core'
+
+    def ready(self):
+        from . import actors, counters, fragments
+        actors.connect_signals()
+        counters.connect_signals()
+        fragments.connect_signals()
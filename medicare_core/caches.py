@@ -0,0 +1,53 @@
+"""
+Builds settings.CACHES from environment variables. One cache backs sessions,
+dashboard counters, availability bitmaps, template fragments and API
+throttles, so it should be shared by every worker in production.
+
+CACHE_BACKEND selects it:
+- locmem (the default): in-process memory. Each worker has its own copy,
+  so keep it to development and tests.
+- file: a directory (CACHE_LOCATION, default BASE_DIR/cache) shared by the
+  workers of one host. It stands in for Redis where none is running.
+- redis: any server speaking the Redis protocol (Redis, Valkey, KeyDB) at
+  CACHE_LOCATION, default redis://127.0.0.1:6379/0. Needs the redis package.
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+}
+
+
+def session_engine(environ):
+    """
+    cached_db sessions, read from the cache and written through to
+    django_session. SESSION_CACHE_ONLY=True opts in to sessions that live
+    only in the cache, which a flush or an eviction then logs out.
+    """
+    if environ.get('SESSION_CACHE_ONLY', 'False').lower() == 'true':
+        return 'django.contrib.sessions.backends.cache'
+    return 'django.contrib.sessions.backends.cached_db'
+
+
+def cache_settings(environ, base_dir):
+    """Returns the 'default' CACHES entry described by `environ`."""
+    backend = environ.get('CACHE_BACKEND', 'locmem').lower()
+    if backend not in BACKENDS:
+        raise ImproperlyConfigured(f"CACHE_BACKEND must be one of {', '.join(BACKENDS)}, not {backend!r}.")
+    config = {
+        'BACKEND': BACKENDS[backend],
+        'KEY_PREFIX': environ.get('CACHE_KEY_PREFIX', 'medicare'),
+        # Seconds, for entries cached without an explicit timeout
+        'TIMEOUT': int(environ.get('CACHE_TIMEOUT', '300')),
+    }
+    if backend == 'locmem':
+        config['LOCATION'] = 'medicare'
+        config['OPTIONS'] = {'MAX_ENTRIES': int(environ.get('CACHE_MAX_ENTRIES', '10000'))}
+    elif backend == 'file':
+        config['LOCATION'] = environ.get('CACHE_LOCATION') or str(base_dir / 'cache')
+        config['OPTIONS'] = {'MAX_ENTRIES': int(environ.get('CACHE_MAX_ENTRIES', '10000'))}
+    else:
+        config['LOCATION'] = environ.get('CACHE_LOCATION', 'redis://127.0.0.1:6379/0')
+    return config
@@ -0,0 +1,113 @@
+"""
+Conditional GET for read endpoints. A response gets a weak ETag built from
+the URL, the user, and the primary key and `updated_at` of every row it shows
+and of the related rows it reads through select_related, together with the
+page's count and links. A client polling an unchanged list is answered
+304 Not Modified after the page has been read, without serializing or
+rendering it, and no query is added to the ones the response makes anyway.
+
+`updated_at` is set by every save(); code that writes with update() sets it
+too. Last-Modified is sent for information only: it cannot see deletions, so
+If-Modified-Since on its own never produces a 304.
+"""
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .api import serializer_query_plan
+from .documents import content_version
+
+
+def fingerprint(queryset):
+    """(row count, latest updated_at) of a queryset, in one query."""
+    totals = queryset.order_by().aggregate(rows=Count('pk'), latest=Max('updated_at'))
+    return totals['rows'], totals['latest']
+
+
+def collection_etag(*parts):
+    return f'W/"{content_version(*parts)}"'
+
+
+def _has_updated_at(model):
+    return any(field.name == 'updated_at' for field in model._meta.concrete_fields)
+
+
+def _related_object(obj, path):
+    for name in path.split('__'):
+        obj = getattr(obj, name)
+        if obj is None:
+            break
+    return obj
+
+
+class ConditionalGetMixin:
+    """
+    Answers list and retrieve requests with 304 Not Modified when the
+    client's If-None-Match still matches. Goes before OptimizedQuerysetMixin,
+    whose select_related paths name the related rows the ETag covers.
+    """
+
+    def etag_paths(self, model):
+        """The select_related paths whose rows have an updated_at."""
+        related, _ = serializer_query_plan(self.get_serializer(), model)
+        paths = []
+        for path in related:
+            target = model
+            for name in path.split('__'):
+                target = target._meta.get_field(name).related_model
+            if _has_updated_at(target):
+                paths.append(path)
+        return paths
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields, deferred = queryset.query.deferred_loading
+        if fields and not deferred and _has_updated_at(queryset.model):
+            # only() is in use; the ETag reads updated_at off every row
+            paths = self.etag_paths(queryset.model)
+            queryset = queryset.only(*fields, 'updated_at', *(f'{path}__updated_at' for path in paths))
+        return queryset
+
+    def get_etag(self, rows, *parts):
+        """Returns (ETag, latest updated_at) for the rows a response shows."""
+        parts = [self.request.get_full_path(), self.request.accepted_renderer.format, self.request.user.pk, *parts]
+        latest = None
+        paths = self.etag_paths(type(rows[0])) if rows else []
+        for row in rows:
+            for obj in [row, *(_related_object(row, path) for path in paths)]:
+                updated_at = getattr(obj, 'updated_at', None)
+                parts += [getattr(obj, 'pk', None), updated_at]
+                if updated_at and (latest is None or updated_at > latest):
+                    latest = updated_at
+        return collection_etag(*parts), latest
+
+    def _conditional(self, rows, parts, render):
+        etag, latest = self.get_etag(rows, *parts)
+        response = get_conditional_response(self.request, etag=etag)
+        if response is None:
+            response = render()
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if latest:
+                response['Last-Modified'] = http_date(latest.timestamp())
+            # Clients may keep a copy but must revalidate it
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            rows = list(queryset)
+            return self._conditional(rows, [], lambda: Response(self.get_serializer(rows, many=True).data))
+        rows = list(page)
+        # The count and links, which change when rows are added or removed elsewhere
+        links = self.get_paginated_response([]).data
+        return self._conditional(
+            rows, [links], lambda: self.get_paginated_response(self.get_serializer(rows, many=True).data),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        return self._conditional([instance], [], lambda: Response(self.get_serializer(instance).data))
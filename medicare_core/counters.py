@@ -0,0 +1,102 @@
+"""
+Dashboard counters. Each tracked model has a Counter row that is adjusted with
+an F() update when an instance is created or deleted, so reading the totals
+never counts the tables themselves. The update runs once the writer's
+transaction has committed, in its own short transaction, so concurrent
+bookings do not wait on each other's lock on the shared row. The totals are
+cached as one entry and dropped whenever a counter changes. Bulk operations
+skip signals, and a process that dies between a commit and its update loses
+the delta; run `manage.py reconcile_counters` after bulk operations (and
+periodically) to correct drift.
+"""
+from django.apps import apps
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+from .models import Counter
+
+COUNTED_MODELS = {
+    'patient_count': 'patients.Patient',
+    'doctor_count': 'doctors.Doctor',
+    'appointment_count': 'appointments.Appointment',
+    'prescription_count': 'prescriptions.Prescription',
+}
+
+CACHE_KEY = 'counters:dashboard'
+CACHE_TIMEOUT = 60 * 60
+
+
+def invalidate():
+    cache.delete(CACHE_KEY)
+
+
+def _apply(name, delta):
+    Counter.objects.filter(name=name).update(value=F('value') + delta, updated_at=timezone.now())
+    invalidate()
+
+
+def adjust(name, delta):
+    """Adds `delta` to a counter when the current transaction commits, or at once outside one."""
+    transaction.on_commit(lambda: _apply(name, delta))
+
+
+def adjust_for_model(model, delta):
+    """adjust() for a model class, for bulk writes that skip signals."""
+    for name, label in COUNTED_MODELS.items():
+        if model._meta.label == label:
+            adjust(name, delta)
+
+
+def get_counts():
+    """Returns {counter name: value} for every tracked model."""
+    counts = cache.get(CACHE_KEY)
+    if counts is None:
+        counts = dict(Counter.objects.filter(name__in=COUNTED_MODELS).values_list('name', 'value'))
+        for name in COUNTED_MODELS.keys() - counts.keys():
+            # First read on a fresh database: seed the row from a real count
+            counter, _ = Counter.objects.get_or_create(
+                name=name, defaults={'value': apps.get_model(COUNTED_MODELS[name]).objects.count()}
+            )
+            counts[name] = counter.value
+        cache.set(CACHE_KEY, counts, CACHE_TIMEOUT)
+    return counts
+
+
+def reconcile(dry_run=False):
+    """
+    Recounts every tracked table and stores the result. Returns
+    {name: (stored, actual)} for the counters that had drifted.
+    """
+    drift = {}
+    for name, label in COUNTED_MODELS.items():
+        actual = apps.get_model(label).objects.count()
+        stored = Counter.objects.filter(name=name).values_list('value', flat=True).first()
+        if stored != actual:
+            drift[name] = (stored, actual)
+            if not dry_run:
+                Counter.objects.update_or_create(name=name, defaults={'value': actual})
+    if drift and not dry_run:
+        invalidate()
+    return drift
+
+
+def _make_receivers(name):
+    def created(sender, instance, created, raw=False, **kwargs):
+        if created and not raw:
+            adjust(name, 1)
+
+    def deleted(sender, instance, **kwargs):
+        adjust(name, -1)
+
+    return created, deleted
+
+
+def connect_signals():
+    for name, label in COUNTED_MODELS.items():
+        model = apps.get_model(label)
+        created, deleted = _make_receivers(name)
+        post_save.connect(created, sender=model, weak=False, dispatch_uid=f'counters:{name}:save')
+        post_delete.connect(deleted, sender=model, weak=False, dispatch_uid=f'counters:{name}:delete')
@@ -0,0 +1,79 @@
+"""
+Builds settings.DATABASES from environment variables.
+
+DB_ENGINE=sqlite (the default) keeps the single-file database in BASE_DIR.
+DB_ENGINE=postgresql connects with DB_NAME, DB_USER, DB_PASSWORD, DB_HOST
+and DB_PORT and keeps connections open between requests:
+- by default each worker thread holds one persistent connection for
+  DB_CONN_MAX_AGE seconds, checked before reuse so a dropped connection is
+  replaced instead of failing the request;
+- with DB_POOL=True, connections come from Django's psycopg pool
+  (DB_POOL_MIN_SIZE to DB_POOL_MAX_SIZE per process), which requires
+  CONN_MAX_AGE = 0.
+
+Setting any of DB_REPLICA_NAME, DB_REPLICA_HOST, DB_REPLICA_PORT,
+DB_REPLICA_USER or DB_REPLICA_PASSWORD adds a 'replica' alias: the default
+settings with those values replaced (see medicare_core/replicas.py).
+"""
+from django.core.exceptions import ImproperlyConfigured
+
+ENGINES = {
+    'sqlite': 'django.db.backends.sqlite3',
+    'postgresql': 'django.db.backends.postgresql',
+}
+
+
+def _flag(environ, name, default='False'):
+    return environ.get(name, default).lower() == 'true'
+
+
+def database_settings(environ, base_dir):
+    """Returns the 'default' DATABASES entry described by `environ`."""
+    engine = environ.get('DB_ENGINE', 'sqlite').lower()
+    if engine not in ENGINES:
+        raise ImproperlyConfigured(f"DB_ENGINE must be one of {', '.join(ENGINES)}, not {engine!r}.")
+    if engine == 'sqlite':
+        return {
+            'ENGINE': ENGINES['sqlite'],
+            'NAME': environ.get('DB_NAME') or base_dir / 'db.sqlite3',
+        }
+
+    config = {
+        'ENGINE': ENGINES['postgresql'],
+        'NAME': environ.get('DB_NAME', 'medicare'),
+        'USER': environ.get('DB_USER', ''),
+        'PASSWORD': environ.get('DB_PASSWORD', ''),
+        'HOST': environ.get('DB_HOST', ''),
+        'PORT': environ.get('DB_PORT', ''),
+        'OPTIONS': {
+            'connect_timeout': int(environ.get('DB_CONNECT_TIMEOUT', '5')),
+        },
+    }
+    if _flag(environ, 'DB_POOL'):
+        # The pool owns connection reuse; Django refuses a pool with CONN_MAX_AGE
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS']['pool'] = {
+            'min_size': int(environ.get('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(environ.get('DB_POOL_MAX_SIZE', '10')),
+            # Seconds a request waits for a free connection before failing
+            'timeout': float(environ.get('DB_POOL_TIMEOUT', '10')),
+        }
+    else:
+        config['CONN_MAX_AGE'] = int(environ.get('DB_CONN_MAX_AGE', '60'))
+        config['CONN_HEALTH_CHECKS'] = _flag(environ, 'DB_CONN_HEALTH_CHECKS', 'True')
+    return config
+
+
+def replica_settings(environ, default):
+    """Returns the 'replica' DATABASES entry, or None when none is configured."""
+    overrides = {
+        key: environ[f'DB_REPLICA_{key}']
+        for key in ('NAME', 'HOST', 'PORT', 'USER', 'PASSWORD')
+        if environ.get(f'DB_REPLICA_{key}')
+    }
+    if not overrides:
+        return None
+    config = {**default, **overrides}
+    if 'OPTIONS' in default:
+        config['OPTIONS'] = {**default['OPTIONS']}
+    return config
@@ -0,0 +1,93 @@
+"""
+Cache for rendered PDF documents. Each document is stored once per object
+and content version under DOCUMENT_CACHE_ROOT, which is kept apart from
+MEDIA_ROOT because the files hold patient data. Requests are answered from
+the stored file with an ETag and Last-Modified, so ReportLab only runs the
+first time a version is requested.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.http import FileResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from reportlab.lib import colors
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import TableStyle
+
+from .metrics import track
+
+# Styles shared by every document, built once at import time
+STYLES = getSampleStyleSheet()
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=STYLES['Heading1'],
+    fontSize=24,
+    textColor=colors.HexColor('#2563eb'),
+    spaceAfter=30,
+    alignment=1
+)
+INFO_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e5e7eb')),
+    ('BACKGROUND', (2, 0), (2, -1), colors.HexColor('#e5e7eb')),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (2, 0), (2, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#d1d5db'))
+])
+
+
+def content_version(*values):
+    """A short hash of everything that appears in a document."""
+    return hashlib.sha256('\x1f'.join(str(value) for value in values).encode()).hexdigest()[:20]
+
+
+def document_storage():
+    return FileSystemStorage(location=settings.DOCUMENT_CACHE_ROOT)
+
+
+def cached_document(kind, pk, version, render):
+    """
+    Returns the storage name of the PDF for (kind, pk, version), calling
+    render() to produce its bytes only if that version is not stored yet.
+    Older versions of the same object are removed.
+    """
+    storage = document_storage()
+    name = f"{kind}/{pk}/{version}.pdf"
+    if storage.exists(name):
+        return name
+    with track('pdf'):
+        content = render()
+    saved = storage.save(name, ContentFile(content))
+    if saved != name:
+        # Another request stored the same version first
+        storage.delete(saved)
+        return name
+    _, files = storage.listdir(f"{kind}/{pk}")
+    for filename in files:
+        if filename != f"{version}.pdf":
+            storage.delete(f"{kind}/{pk}/{filename}")
+    return name
+
+
+def document_response(request, kind, pk, version, render, filename):
+    """Serves a cached PDF, answering conditional requests with 304."""
+    name = cached_document(kind, pk, version, render)
+    storage = document_storage()
+    etag = f'"{version}"'
+    last_modified = int(storage.get_modified_time(name).timestamp())
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = FileResponse(storage.open(name, 'rb'), content_type='application/pdf')
+        response['Content-Disposition'] = f'inline; filename="{filename}"'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Patient documents: browsers may keep a copy but must revalidate it
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
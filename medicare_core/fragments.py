@@ -0,0 +1,63 @@
+"""
+Versioned template fragments. Templates cache read-mostly markup with the
+{% cache %} tag, varying on the version of the models it shows:
+
+    {% load cache fragments %}
+    {% fragment_version 'doctors.Doctor' as doctors_version %}
+    {% cache 3600 doctor_grid doctors_version %}...{% endcache %}
+
+Saving or deleting an instance of a versioned model gives it a new version,
+so the next render misses and the old entries expire unused. Queryset
+update() and bulk_create() skip signals; code that writes a versioned model
+that way calls bump_for_model() itself.
+"""
+import time
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+VERSIONED_MODELS = ['doctors.Doctor']
+
+
+def version_key(label):
+    return f'fragments:version:{label}'
+
+
+def fragment_version(label):
+    """The current version of a model's fragments."""
+    key = version_key(label)
+    version = cache.get(key)
+    if version is None:
+        # A fresh value, so an evicted version never brings back old fragments
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(label):
+    cache.set(version_key(label), time.time_ns(), None)
+
+
+def bump_fragment_version(label):
+    _bump(label)
+    # Again after commit, in case a concurrent render cached the old rows
+    transaction.on_commit(lambda: _bump(label))
+
+
+def bump_for_model(model):
+    """bump_fragment_version() for a model class, for writes that skip signals."""
+    if model._meta.label in VERSIONED_MODELS:
+        bump_fragment_version(model._meta.label)
+
+
+def _model_changed(sender, **kwargs):
+    bump_fragment_version(sender._meta.label)
+
+
+def connect_signals():
+    for label in VERSIONED_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(_model_changed, sender=model, dispatch_uid=f'fragments:{label}:save')
+        post_delete.connect(_model_changed, sender=model, dispatch_uid=f'fragments:{label}:delete')
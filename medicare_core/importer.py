@@ -0,0 +1,124 @@
+"""
+Bulk import of patients and doctors from CSV or JSON Lines. Records are
+streamed from the file, validated a chunk at a time with the model's own
+field validation, and written with one bulk_create() per chunk, each in its
+own transaction. Avatars are queued for the worker in the same transaction
+instead of being generated per row, and the dashboard counters are adjusted
+once per chunk.
+"""
+import csv
+import json
+import time
+from itertools import islice
+from typing import NamedTuple
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from avatars.queue import enqueue_avatars
+from doctors.models import Doctor
+from patients.models import Patient
+from .counters import adjust_for_model
+from .fragments import bump_for_model
+
+IMPORTABLE_MODELS = {
+    'patients': Patient,
+    'doctors': Doctor,
+}
+
+# Never taken from the input file
+EXCLUDED_FIELDS = {'id', 'user', 'image', 'created_at'}
+
+
+class ImportProgress(NamedTuple):
+    created: int
+    invalid: int
+    elapsed: float
+
+    @property
+    def rows_per_second(self):
+        return (self.created + self.invalid) / self.elapsed if self.elapsed else 0.0
+
+
+def importable_fields(model):
+    return {field.name: field for field in model._meta.concrete_fields if field.name not in EXCLUDED_FIELDS}
+
+
+def read_records(stream, file_format):
+    """
+    Yields (line number, dict) pairs from a CSV or JSON Lines text stream.
+    A line that cannot be parsed is yielded as a ValidationError, so it is
+    reported as an invalid row instead of ending the import.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+    elif file_format == 'jsonl':
+        for line_num, line in enumerate(stream, start=1):
+            if line.strip():
+                try:
+                    yield line_num, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_num, ValidationError(f"Invalid JSON: {e.msg}")
+    else:
+        raise ValueError(f"Unsupported format: {file_format}")
+
+
+def build_instance(model, fields, record):
+    """Returns a validated, unsaved instance, or raises ValidationError."""
+    if isinstance(record, ValidationError):
+        raise record
+    if not isinstance(record, dict):
+        raise ValidationError("Record is not an object")
+    # DictReader keeps the cells past the header under None
+    if None in record:
+        raise ValidationError(f"Row has {len(record[None])} extra values")
+    unknown = set(record) - set(fields)
+    if unknown:
+        raise ValidationError(f"Unknown columns: {', '.join(sorted(unknown))}")
+    values = {}
+    for name, value in record.items():
+        if value == '' and fields[name].null:
+            value = None
+        values[name] = value
+    instance = model(**values)
+    # Converts the raw strings to Python values as it validates them
+    instance.full_clean(exclude=EXCLUDED_FIELDS, validate_unique=False)
+    return instance
+
+
+def import_records(kind, records, batch_size=1000, dry_run=False, queue_avatars=True, on_batch=None, on_error=None):
+    """
+    Imports (line number, dict) records. Invalid rows are skipped and passed
+    to on_error(line number, ValidationError); on_batch(ImportProgress) is
+    called after every chunk. Returns the final ImportProgress.
+    """
+    model = IMPORTABLE_MODELS[kind]
+    fields = importable_fields(model)
+    created = invalid = 0
+    start = time.perf_counter()
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, batch_size))
+        if not chunk:
+            break
+        instances = []
+        for line_num, record in chunk:
+            try:
+                instances.append(build_instance(model, fields, record))
+            except ValidationError as e:
+                invalid += 1
+                if on_error:
+                    on_error(line_num, e)
+        if instances and not dry_run:
+            with transaction.atomic():
+                model.objects.bulk_create(instances)
+                if queue_avatars:
+                    enqueue_avatars(instances)
+                adjust_for_model(model, len(instances))
+                bump_for_model(model)
+        created += len(instances)
+        if on_batch:
+            on_batch(ImportProgress(created, invalid, time.perf_counter() - start))
+    return ImportProgress(created, invalid, time.perf_counter() - start)
@@ -0,0 +1,50 @@
+"""
+Row-based work queues shared by the mail outbox and the avatar queue. A job
+model has `status` ('pending', a running status, then a final one),
+`attempts`, `last_error`, `run_after` and an auto-updated `updated_at`.
+Workers claim due rows with claim() and hand failures to retry_or_fail().
+"""
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+# Rows left running longer than this are assumed to belong to a dead worker
+STALE_AFTER = timedelta(minutes=10)
+
+
+def claim(model, limit, running_status, stale_after=STALE_AFTER):
+    """
+    Marks up to `limit` due rows of `model` as `running_status` and returns
+    their ids. Due rows are pending ones whose run_after has passed and
+    running ones that have gone stale.
+    """
+    now = timezone.now()
+    due = model.objects.filter(
+        Q(status='pending', run_after__lte=now) |
+        Q(status=running_status, updated_at__lt=now - stale_after)
+    ).order_by('id').values_list('id', 'status', 'updated_at')[:limit]
+
+    claimed = []
+    for row_id, status, updated_at in due:
+        # Matching the status and updated_at that were read makes the claim
+        # safe when several workers race: a stale row re-claimed by another
+        # worker keeps its status but not its updated_at
+        if model.objects.filter(pk=row_id, status=status, updated_at=updated_at).update(
+            status=running_status, updated_at=now,
+        ):
+            claimed.append(row_id)
+    return claimed
+
+
+def retry_or_fail(row, error, max_attempts):
+    """Records a failed attempt: pending again after a backoff, or failed after `max_attempts`."""
+    row.attempts += 1
+    row.last_error = str(error)
+    if row.attempts >= max_attempts:
+        row.status = 'failed'
+    else:
+        row.status = 'pending'
+        # Exponential backoff: 30s, 60s, 120s, ...
+        row.run_after = timezone.now() + timedelta(seconds=30 * 2 ** (row.attempts - 1))
+    row.save(update_fields=['attempts', 'last_error', 'status', 'run_after', 'updated_at'])
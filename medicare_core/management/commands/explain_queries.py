@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from appointments.models import Appointment
+from billing.models import Invoice
+from doctors.models import Doctor
+from patients.models import Patient
+from prescriptions.models import Prescription
+
+
+def view_querysets(patient_id, doctor_id):
+    """The hot list queries issued by the UI views, keyed by a readable label."""
+    return {
+        'appointment_list (patient)': Appointment.objects.filter(patient_id=patient_id).select_related('doctor', 'patient').order_by('-date', '-time'),
+        'appointment_list (doctor)': Appointment.objects.filter(doctor_id=doctor_id).select_related('doctor', 'patient').order_by('-date', '-time'),
+        'appointment_list (staff)': Appointment.objects.select_related('doctor', 'patient').order_by('-date', '-time'),
+        'invoice_list (patient)': Invoice.objects.filter(patient_id=patient_id).select_related('patient', 'appointment').order_by('-date'),
+        'invoice_list (staff)': Invoice.objects.select_related('patient', 'appointment').order_by('-date'),
+        'prescription_list (patient)': Prescription.objects.filter(appointment__patient_id=patient_id).select_related('appointment', 'appointment__patient', 'appointment__doctor').order_by('-created_at'),
+        'prescription_list (staff)': Prescription.objects.select_related('appointment', 'appointment__patient', 'appointment__doctor').order_by('-created_at'),
+        'prescription_add (doctor)': Appointment.objects.filter(doctor_id=doctor_id, status='completed').order_by('-date'),
+    }
+
+
+def plan_problems(plan, vendor):
+    """Returns the plan lines that indicate a full table scan or an explicit sort."""
+    problems = []
+    for line in plan.splitlines():
+        text = line.strip()
+        if vendor == 'sqlite':
+            # "SCAN t USING INDEX i" walks an index in order, which is fine
+            full_scan = 'SCAN ' in text and 'USING' not in text
+            if full_scan or 'USE TEMP B-TREE' in text:
+                problems.append(text)
+        elif vendor == 'postgresql':
+            if 'Seq Scan' in text or text.startswith('Sort'):
+                problems.append(text)
+    return problems
+
+
+class Command(BaseCommand):
+    help = "Runs EXPLAIN on the list views' querysets and reports whether they use an index."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patient', type=int, help='Patient id to filter by (defaults to the first patient).')
+        parser.add_argument('--doctor', type=int, help='Doctor id to filter by (defaults to the first doctor).')
+        parser.add_argument('--verbose-plan', action='store_true', help='Print the full plan for every query.')
+        parser.add_argument('--fail-on-scan', action='store_true', help='Exit with an error if any query scans or sorts.')
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(f"EXPLAIN checks are only implemented for SQLite and PostgreSQL, not {vendor}.")
+
+        patient_id = options['patient'] or Patient.objects.values_list('pk', flat=True).first() or 1
+        doctor_id = options['doctor'] or Doctor.objects.values_list('pk', flat=True).first() or 1
+
+        flagged = 0
+        for label, queryset in view_querysets(patient_id, doctor_id).items():
+            plan = queryset.explain()
+            problems = plan_problems(plan, vendor)
+            if problems:
+                flagged += 1
+                self.stdout.write(self.style.WARNING(f"[WARN] {label}"))
+                for line in problems:
+                    self.stdout.write(f"    {line}")
+            else:
+                self.stdout.write(self.style.SUCCESS(f"[INDEX] {label}"))
+            if options['verbose_plan']:
+                self.stdout.write('\n'.join(f"    | {line}" for line in plan.splitlines()))
+
+        if vendor == 'postgresql' and flagged:
+            self.stdout.write("Note: PostgreSQL prefers sequential scans on small tables; run ANALYZE on realistic data.")
+        if flagged and options['fail_on_scan']:
+            raise CommandError(f"{flagged} queries do not use an index.")
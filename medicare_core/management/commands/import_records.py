@@ -0,0 +1,59 @@
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from medicare_core.importer import IMPORTABLE_MODELS, import_records, read_records
+
+# Only the first few invalid rows are printed
+MAX_ERRORS_SHOWN = 20
+
+
+class Command(BaseCommand):
+    help = 'Bulk imports patients or doctors from a CSV or JSON Lines file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTABLE_MODELS))
+        parser.add_argument('path', help="CSV or JSONL file, or '-' for standard input.")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows validated and inserted per transaction.')
+        parser.add_argument('--dry-run', action='store_true', help='Validate every row without writing anything.')
+        parser.add_argument('--no-avatars', action='store_true', help='Do not queue avatar generation for imported rows.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in ('csv', 'jsonl'):
+            raise CommandError("Cannot tell the format from the file name; pass --format csv or --format jsonl.")
+
+        errors = []
+
+        def on_error(line_num, error):
+            errors.append(line_num)
+            if len(errors) <= MAX_ERRORS_SHOWN:
+                self.stderr.write(f"Line {line_num}: {'; '.join(error.messages)}")
+
+        def on_batch(progress):
+            self.stdout.write(
+                f"{progress.created} rows imported, {progress.invalid} invalid "
+                f"({progress.rows_per_second:,.0f} rows/s)"
+            )
+
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            result = import_records(
+                options['kind'], read_records(stream, file_format),
+                batch_size=options['batch_size'], dry_run=options['dry_run'],
+                queue_avatars=not options['no_avatars'], on_batch=on_batch, on_error=on_error,
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {result.created} {options['kind']} in {result.elapsed:.1f}s "
+            f"({result.rows_per_second:,.0f} rows/s); {result.invalid} invalid rows skipped."
+        ))
+        if not options['dry_run'] and not options['no_avatars'] and result.created:
+            self.stdout.write("Avatars are queued; run `manage.py run_avatar_worker` to generate them.")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from medicare_core.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Recounts the tables behind the dashboard counters and fixes any drift. Safe to run from cron.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without correcting it.')
+
+    def handle(self, *args, **options):
+        drift = reconcile(dry_run=options['dry_run'])
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('All counters are accurate.'))
+            return
+        for name, (stored, actual) in drift.items():
+            action = 'would fix' if options['dry_run'] else 'fixed'
+            self.stdout.write(self.style.WARNING(f"{name}: stored {stored}, actual {actual} ({action})"))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from medicare_core.seeding import seed_database
+
+
+class Command(BaseCommand):
+    help = 'Adds linked synthetic patients, doctors, appointments, prescriptions, invoices and payments.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=1000)
+        parser.add_argument('--doctors', type=int, default=50)
+        parser.add_argument('--appointments', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed; the same seed gives the same data.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows inserted per transaction.')
+        parser.add_argument('--avatars', type=int, default=50, help='Distinct local avatars shared by the profiles (0 for none).')
+
+    def handle(self, *args, **options):
+        if min(options['patients'], options['doctors'], options['appointments'], options['avatars']) < 0:
+            raise CommandError('Counts cannot be negative.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        def on_batch(label, counts):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"{label}: {', '.join(f'{n} {model}' for model, n in counts.items())}")
+
+        try:
+            result = seed_database(
+                patients=options['patients'], doctors=options['doctors'], appointments=options['appointments'],
+                seed=options['seed'], batch_size=options['batch_size'], avatars=options['avatars'], on_batch=on_batch,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for model, n in result.counts.items():
+            self.stdout.write(f"{n:>10,} {model}")
+        total = sum(result.counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {total:,} rows in {result.elapsed:.1f}s ({total / max(result.elapsed, 1e-9):,.0f} rows/s)."
+        ))
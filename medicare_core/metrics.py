@@ -0,0 +1,197 @@
+"""
+Per-request performance instrumentation.
+
+PerformanceMiddleware times every request and, through a database execute
+wrapper, every SQL query it runs. Slow work outside the database is wrapped
+in track(phase) ('template', 'pdf', 'smtp', 'avatar'). Each phase records
+its exclusive time, so SQL run while rendering a template counts as 'db' and
+not as 'template'.
+
+The numbers are sent back in a Server-Timing header and added to in-process
+Prometheus histograms served at /metrics. Each process keeps its own
+histograms, so scrape every worker (or run one) when using several.
+"""
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from threading import Lock
+
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_current = ContextVar('medicare_request_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        # Milliseconds per phase, and the total of all phases so far
+        self.phases = {}
+        self.accounted = 0.0
+
+    def add(self, phase, ms):
+        self.phases[phase] = self.phases.get(phase, 0.0) + ms
+        self.accounted += ms
+
+    def total_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+
+@contextmanager
+def track(phase):
+    """Adds the time spent in the block to the current request's `phase`."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start, accounted = time.perf_counter(), timings.accounted
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        # Leave out time that nested phases (or SQL) have already recorded
+        timings.add(phase, elapsed - (timings.accounted - accounted))
+
+
+def _record_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.add('db', (time.perf_counter() - start) * 1000)
+
+
+class Histogram:
+    """A cumulative Prometheus histogram with labels, safe across threads."""
+
+    def __init__(self, name, documentation, labels, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[label] for label in self.labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0])
+            series[0][index] += 1
+            series[1] += value
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        for key, counts, total in series:
+            labels = ','.join(f'{label}="{_escape(value)}"' for label, value in zip(self.labels, key))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{labels}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{labels}}} {cumulative}')
+        return '\n'.join(lines)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REQUEST_DURATION = Histogram(
+    'medicare_http_request_duration_seconds', 'Wall time of each request.',
+    ('view', 'method'), DURATION_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    'medicare_http_request_db_queries', 'SQL queries run by each request.',
+    ('view',), QUERY_COUNT_BUCKETS,
+)
+PHASE_DURATION = Histogram(
+    'medicare_http_request_phase_duration_seconds',
+    'Time each request spent in SQL (db), template rendering, PDF rendering, SMTP and avatar downloads.',
+    ('view', 'phase'), DURATION_BUCKETS,
+)
+HISTOGRAMS = (REQUEST_DURATION, REQUEST_QUERIES, PHASE_DURATION)
+
+
+def expose_metrics():
+    """All histograms in the Prometheus text exposition format."""
+    return '\n'.join(histogram.expose() for histogram in HISTOGRAMS) + '\n'
+
+
+def server_timing(timings, total_ms):
+    entries = [f'total;dur={total_ms:.1f}']
+    for phase, ms in sorted(timings.phases.items()):
+        entry = f'{phase};dur={ms:.1f}'
+        if phase == 'db':
+            entry += f';desc="{timings.queries} queries"'
+        entries.append(entry)
+    entries.append(f'app;dur={max(0.0, total_ms - timings.accounted):.1f}')
+    return ', '.join(entries)
+
+
+class PerformanceMiddleware:
+    """
+    Measures wall time, SQL count and time, and tracked phases per request.
+    Streaming responses are measured up to the point the body starts.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_record_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        total_ms = timings.total_ms()
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        REQUEST_DURATION.observe(total_ms / 1000, view=view, method=request.method)
+        REQUEST_QUERIES.observe(timings.queries, view=view)
+        for phase, ms in timings.phases.items():
+            PHASE_DURATION.observe(ms / 1000, view=view, phase=phase)
+        if settings.SERVER_TIMING_HEADER:
+            response['Server-Timing'] = server_timing(timings, total_ms)
+        return response
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with track('template'):
+            return super().render(context, request)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The Django template backend, with rendering counted as 'template'."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -0,0 +1,11 @@
+from django.db import models
+
+
+class Counter(models.Model):
+    """A denormalised row count, kept current by signals in medicare_core.counters."""
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
@@ -0,0 +1,271 @@
+import base64
+import datetime
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.lookups import Exact, GreaterThan, GreaterThanOrEqual, LessThan, LessThanOrEqual
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class StandardPageNumberPagination(PageNumberPagination):
+    page_size_query_param = 'page_size'
+
+    @property
+    def max_page_size(self):
+        return settings.API_MAX_PAGE_SIZE
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination on the view's `cursor_ordering`. Pages are fetched with
+    an indexed WHERE on the ordering key instead of OFFSET and COUNT(*), so
+    the cost stays flat however deep the client pages.
+    """
+    page_size_query_param = 'page_size'
+    ordering = ('-created_at', '-id')
+
+    @property
+    def max_page_size(self):
+        return settings.API_MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(getattr(view, 'cursor_ordering', self.ordering))
+
+
+class QuerysetKeysetPagination(BasePagination):
+    """
+    Keyset pagination in the queryset's own order, for querysets a filter has
+    ordered by a computed column such as a search rank. CursorPagination can
+    only order by model fields, so this pages with keyset_page() instead.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page = keyset_page(request, queryset, per_page=KeysetCursorPagination().get_page_size(request))
+        return list(self.page)
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), 'cursor', cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self._link(self.page.next_cursor),
+            'previous': self._link(self.page.previous_cursor),
+            'results': data,
+        })
+
+    def get_results(self, data):
+        return data['results']
+
+
+class MedicarePagination(BasePagination):
+    """
+    Page-number pagination by default. Clients switch to keyset pagination by
+    sending `?pagination=cursor` (or following a `?cursor=` link), and
+    API_DEFAULT_PAGINATION = 'cursor' makes that the default.
+    """
+    delegate = None
+
+    def use_cursor(self, request):
+        if 'cursor' in request.query_params:
+            return True
+        mode = request.query_params.get('pagination', settings.API_DEFAULT_PAGINATION)
+        return mode == 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request) and _ordered_by_extra_select(queryset):
+            self.delegate = QuerysetKeysetPagination()
+        elif self.use_cursor(request):
+            self.delegate = KeysetCursorPagination()
+        else:
+            self.delegate = StandardPageNumberPagination()
+        return self.delegate.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.delegate.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return StandardPageNumberPagination().get_paginated_response_schema(schema)
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.delegate, 'display_page_controls', False)
+
+    def to_html(self):
+        return self.delegate.to_html()
+
+    def get_results(self, data):
+        return self.delegate.get_results(data)
+
+
+class KeysetPage:
+    """
+    One page of a UI list view, with links to its neighbours. `cursor` is the
+    validated cursor the page was read from, re-encoded, or '' for the first
+    page; an invalid ?cursor= reads the first page and gets ''.
+    """
+
+    def __init__(self, object_list, request, next_cursor=None, previous_cursor=None, cursor=''):
+        self.object_list = object_list
+        self.request = request
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def _url(self, cursor):
+        params = self.request.GET.copy()
+        params['cursor'] = cursor
+        return f'?{params.urlencode()}'
+
+    @property
+    def next_url(self):
+        return self._url(self.next_cursor) if self.has_next else None
+
+    @property
+    def previous_url(self):
+        return self._url(self.previous_cursor) if self.has_previous else None
+
+
+def _ordered_by_extra_select(queryset):
+    return any(key.lstrip('-') in queryset.query.extra_select for key in queryset.query.order_by)
+
+
+def _ordering_keys(queryset):
+    """
+    The queryset's order_by() fields with the primary key appended as a
+    tiebreaker, so every row has a unique position.
+    """
+    keys = list(queryset.query.order_by) or ['pk']
+    names = {key.lstrip('-') for key in keys}
+    if not names & {'pk', 'id', queryset.model._meta.pk.attname}:
+        keys.append('-pk' if keys[0].startswith('-') else 'pk')
+    return keys
+
+
+def _key_expression(queryset, name):
+    # Columns added with extra(select=...) are compared as raw SQL
+    if name in queryset.query.extra_select:
+        sql, params = queryset.query.extra_select[name]
+        return RawSQL(sql, params, output_field=FloatField())
+    return F(name)
+
+
+def _key_value(obj, name):
+    for attr in name.split('__'):
+        obj = getattr(obj, 'pk' if attr == 'pk' else attr)
+    return obj
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder cuts datetimes and times to milliseconds, so rows in
+    # the same millisecond as a page's last row would fall between pages
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(direction, values):
+    data = json.dumps({'d': direction, 'v': values}, cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor, queryset, keys):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        direction, values = data['d'], data['v']
+        if direction not in ('next', 'previous') or len(values) != len(keys):
+            return None
+        decoded = []
+        for key, value in zip(keys, values):
+            name = key.lstrip('-')
+            if name in queryset.query.extra_select:
+                decoded.append(value)
+            else:
+                field = queryset.model._meta.pk if name == 'pk' else queryset.model._meta.get_field(name)
+                decoded.append(field.to_python(value))
+        return direction, decoded
+    except (ValueError, TypeError, KeyError, ValidationError, FieldDoesNotExist):
+        return None
+
+
+def _after(queryset, keys, values):
+    """Rows that sort strictly after `values` in the order given by `keys`."""
+    def compare(key, value, strict):
+        expression = _key_expression(queryset, key.lstrip('-'))
+        if key.startswith('-'):
+            return Q(LessThan(expression, value) if strict else LessThanOrEqual(expression, value))
+        return Q(GreaterThan(expression, value) if strict else GreaterThanOrEqual(expression, value))
+
+    condition = Q()
+    for index, key in enumerate(keys):
+        step = compare(key, values[index], strict=True)
+        for earlier, value in zip(keys[:index], values):
+            step &= Q(Exact(_key_expression(queryset, earlier.lstrip('-')), value))
+        condition |= step
+    # The redundant bound on the first key lets the database walk the
+    # ordering index from the cursor instead of sorting every later row
+    return queryset.filter(compare(keys[0], values[0], strict=False), condition)
+
+
+def keyset_page(request, queryset, per_page=None):
+    """
+    Returns the KeysetPage of `queryset` selected by `?cursor=`. Pages are
+    read with a WHERE on the queryset's ordering instead of OFFSET, so a page
+    costs the same however deep it is and nothing is counted.
+    """
+    per_page = per_page or settings.UI_PAGE_SIZE
+    keys = _ordering_keys(queryset)
+    queryset = queryset.order_by(*keys)
+    cursor = request.GET.get('cursor')
+    direction, values = (_decode_cursor(cursor, queryset, keys) if cursor else None) or (None, None)
+
+    if direction == 'previous':
+        # Walk backwards from the first row of the page we came from
+        reversed_keys = [key[1:] if key.startswith('-') else f'-{key}' for key in keys]
+        rows = list(_after(queryset, reversed_keys, values).order_by(*reversed_keys)[:per_page + 1])
+        has_next, has_previous = True, len(rows) > per_page
+        rows = rows[:per_page][::-1]
+    else:
+        if direction == 'next':
+            queryset = _after(queryset, keys, values)
+        rows = list(queryset[:per_page + 1])
+        has_next, has_previous = len(rows) > per_page, direction is not None
+        rows = rows[:per_page]
+
+    def cursor_for(direction, obj):
+        return encode_cursor(direction, [_key_value(obj, key.lstrip('-')) for key in keys])
+
+    return KeysetPage(
+        rows,
+        request,
+        next_cursor=cursor_for('next', rows[-1]) if rows and has_next else None,
+        previous_cursor=cursor_for('previous', rows[0]) if rows and has_previous else None,
+        cursor=encode_cursor(direction, values) if direction else '',
+    )
@@ -0,0 +1,108 @@
+"""
+Read-replica routing.
+
+When DATABASES has a 'replica' alias, reads made while serving a read-only
+request go to it: the UI views decorated with @replica_reads and GET/HEAD
+requests to the DRF API. Everything else, including every write and all
+background work, uses 'default'.
+
+A replica lags behind the primary, so a browser that has just written
+(booked, paid, edited) is pinned to the primary for REPLICA_PIN_SECONDS by a
+cookie, and sees its own changes at once. Sessions and accounts are always
+read from the primary, and objects follow the database they were loaded
+from, so `request.user.patient_profile` is never looked up on a replica
+that has not caught up with a new sign-up.
+"""
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from rest_framework.views import APIView
+
+REPLICA = 'replica'
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Read from the primary whatever the request
+PRIMARY_APPS = {'sessions', 'auth', 'users', 'account', 'socialaccount', 'contenttypes'}
+
+
+class RequestRouting:
+    def __init__(self):
+        self.use_replica = False
+        self.wrote = False
+
+
+_current = ContextVar('medicare_request_routing', default=None)
+
+
+def replica_reads(view):
+    """Marks a UI view as read-only, so its queries may use the replica."""
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        return view(request, *args, **kwargs)
+    wrapped.replica_reads = True
+    return wrapped
+
+
+def replica_configured():
+    return REPLICA in settings.DATABASES
+
+
+def reading_from_replica():
+    """Whether reads in the current request go to the replica."""
+    routing = _current.get()
+    return routing is not None and routing.use_replica and not routing.wrote
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _current.get()
+        if routing is None or not routing.use_replica or routing.wrote:
+            return 'default'
+        if model._meta.app_label in PRIMARY_APPS:
+            return 'default'
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Related lookups stay on the database the object came from
+            return instance._state.db
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        routing = _current.get()
+        if routing is not None:
+            routing.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+
+class ReplicaMiddleware:
+    """Decides per request whether reads may use the replica."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routing = RequestRouting()
+        token = _current.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        if routing.wrote and replica_configured():
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax',
+                secure=request.is_secure(),
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not replica_configured() or request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES:
+            return None
+        view_class = getattr(view_func, 'cls', None)
+        if getattr(view_func, 'replica_reads', False) or (view_class and issubclass(view_class, APIView)):
+            _current.get().use_replica = True
+        return None
@@ -0,0 +1,204 @@
+"""
+Synthetic data for load testing. seed_database() adds linked doctors,
+patients, appointments, prescriptions, invoices and payments with
+bulk_create(), one batch per transaction. The same seed always produces
+the same rows. Profiles share a small pool of locally rendered avatars
+instead of queueing a job per row.
+
+Appointments only go to the doctors created in the same run, spread over
+09:00-17:00 in 30 minute slots, so they never collide with existing
+bookings. Most fall in the past, where they are completed (with a
+prescription and an invoice, usually paid) or cancelled.
+"""
+import random
+from datetime import date, time, timedelta
+from decimal import Decimal
+from time import perf_counter
+from typing import NamedTuple
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from appointments.models import Appointment
+from avatars.store import ingest_avatar
+from billing.models import Invoice, Payment
+from doctors.models import Doctor
+from patients.models import Patient
+from prescriptions.models import Prescription
+from .counters import adjust_for_model
+from .fragments import bump_for_model
+from .utils import render_local_avatar
+
+FIRST_NAMES = [
+    'John', 'Jane', 'Maria', 'Ahmed', 'Wei', 'Olga', 'Carlos', 'Aisha', 'Kenji', 'Fatima',
+    'Liam', 'Noah', 'Emma', 'Sofia', 'Arjun', 'Chloe', 'Mateo', 'Yusuf', 'Hana', 'Lucas',
+]
+LAST_NAMES = [
+    'Smith', 'Khan', 'Garcia', 'Chen', 'Ivanova', 'Okafor', 'Tanaka', 'Rahman', 'Müller', 'Silva',
+    'Brown', 'Hossain', 'Kowalski', 'Nguyen', 'Haddad', 'Rossi', 'Dubois', 'Park', 'Sato', 'Ali',
+]
+SPECIALTIES = [
+    'Cardiology', 'Dermatology', 'Neurology', 'Pediatrics', 'Orthopedics',
+    'Psychiatry', 'Oncology', 'General Practice', 'Gynecology', 'Ophthalmology',
+]
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+STREETS = ['Main St', 'Lake Rd', 'Park Ave', 'Hill St', 'River Rd', 'Station Rd', 'Green Ln']
+CONDITIONS = [
+    'asthma', 'diabetes type 2', 'hypertension', 'penicillin allergy', 'migraine',
+    'fractured wrist', 'eczema', 'high cholesterol', 'anaemia',
+]
+MEDICINES = [
+    'Paracetamol 500mg', 'Amoxicillin 250mg', 'Metformin 500mg', 'Salbutamol inhaler',
+    'Atorvastatin 20mg', 'Ibuprofen 400mg', 'Omeprazole 20mg', 'Cetirizine 10mg',
+]
+PAYMENT_METHODS = [code for code, _ in Payment.PAYMENT_METHODS]
+
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 16
+FIRST_SLOT = 9 * 60
+# Share of the appointment calendar that lies in the past
+PAST_SHARE = 0.8
+
+
+class SeedResult(NamedTuple):
+    counts: dict
+    elapsed: float
+
+
+def avatar_pool(size):
+    """Renders `size` local avatars into the avatar store and returns their names."""
+    return [ingest_avatar(render_local_avatar(f'Seed Avatar {i}')) for i in range(size)]
+
+
+def _batches(total, batch_size):
+    for start in range(0, total, batch_size):
+        yield range(start, min(total, start + batch_size))
+
+
+def _name(rng):
+    return f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+
+
+def _phone(rng):
+    return f'01{rng.randint(0, 99999999):08d}'
+
+
+def _create(model, objects, counts):
+    created = model.objects.bulk_create(objects)
+    counts[model._meta.label] = counts.get(model._meta.label, 0) + len(created)
+    adjust_for_model(model, len(created))
+    bump_for_model(model)
+    return created
+
+
+def seed_database(patients=0, doctors=0, appointments=0, seed=0, batch_size=5000, avatars=50, today=None, on_batch=None):
+    """
+    Adds the given numbers of patients, doctors and appointments, plus the
+    prescriptions, invoices and payments of the completed appointments.
+    `avatars` is the size of the shared avatar pool; 0 leaves images empty.
+    on_batch(label, counts) is called after each committed batch.
+    """
+    if appointments and not (patients and doctors):
+        raise ValueError('Appointments need patients and doctors created in the same run.')
+    started = perf_counter()
+    rng = random.Random(seed)
+    today = today or date.today()
+    images = avatar_pool(avatars) if avatars else ['']
+    counts = {}
+    doctor_ids, patient_ids = [], []
+
+    for batch in _batches(doctors, batch_size):
+        with transaction.atomic():
+            created = _create(Doctor, [
+                Doctor(
+                    name=f'Dr. {_name(rng)}',
+                    phone=_phone(rng),
+                    specialty=rng.choice(SPECIALTIES),
+                    available_days=','.join(sorted(rng.sample(WEEKDAYS, rng.randint(2, 5)), key=WEEKDAYS.index)),
+                    image=images[i % len(images)],
+                ) for i in batch
+            ], counts)
+        doctor_ids += [doctor.pk for doctor in created]
+        if on_batch:
+            on_batch('doctors', counts)
+
+    for batch in _batches(patients, batch_size):
+        with transaction.atomic():
+            created = _create(Patient, [
+                Patient(
+                    name=_name(rng),
+                    age=rng.randint(1, 90),
+                    gender=rng.choice('MFO'),
+                    phone=_phone(rng),
+                    email=f'patient{seed}-{i}@example.com',
+                    address=f'{rng.randint(1, 999)} {rng.choice(STREETS)}',
+                    medical_history=', '.join(rng.sample(CONDITIONS, rng.randint(0, 3))),
+                    image=images[i % len(images)],
+                ) for i in batch
+            ], counts)
+        patient_ids += [patient.pk for patient in created]
+        if on_batch:
+            on_batch('patients', counts)
+
+    days = -(-appointments // (max(doctors, 1) * SLOTS_PER_DAY))
+    first_day = today - timedelta(days=int(days * PAST_SHARE))
+    for batch in _batches(appointments, batch_size):
+        with transaction.atomic():
+            _seed_appointments(rng, batch, doctor_ids, patient_ids, first_day, today, counts)
+        if on_batch:
+            on_batch('appointments', counts)
+
+    return SeedResult(counts, perf_counter() - started)
+
+
+def _seed_appointments(rng, batch, doctor_ids, patient_ids, first_day, today, counts):
+    rows = []
+    for i in batch:
+        # Doctor i % n gets its (i // n)-th slot, so no two rows share one
+        slot = i // len(doctor_ids)
+        day = first_day + timedelta(days=slot // SLOTS_PER_DAY)
+        minute = FIRST_SLOT + slot % SLOTS_PER_DAY * SLOT_MINUTES
+        if day < today:
+            status = 'completed' if rng.random() < 0.85 else 'cancelled'
+        else:
+            status = rng.choice(['pending', 'confirmed']) if rng.random() < 0.95 else 'cancelled'
+        rows.append(Appointment(
+            patient_id=rng.choice(patient_ids),
+            doctor_id=doctor_ids[i % len(doctor_ids)],
+            date=day,
+            time=time(minute // 60, minute % 60),
+            status=status,
+        ))
+    created = _create(Appointment, rows, counts)
+
+    completed = [appointment for appointment in created if appointment.status == 'completed']
+    _create(Prescription, [
+        Prescription(
+            appointment=appointment,
+            medicines='\n'.join(rng.sample(MEDICINES, rng.randint(1, 3))),
+            advice=rng.choice(['Rest and fluids.', 'Follow up in two weeks.', '']),
+        ) for appointment in completed if rng.random() < 0.8
+    ], counts)
+    invoices = _create(Invoice, [
+        Invoice(
+            patient_id=appointment.patient_id,
+            appointment=appointment,
+            amount=Decimal(rng.randint(20, 500)),
+            items='Consultation',
+            is_paid=rng.random() < 0.7,
+        ) for appointment in completed if rng.random() < 0.9
+    ], counts)
+    # Invoice.date is auto_now_add, so it is moved to the appointment's date afterwards
+    Invoice.objects.filter(pk__in=[invoice.pk for invoice in invoices]).update(
+        date=Subquery(Appointment.objects.filter(pk=OuterRef('appointment_id')).values('date')),
+        updated_at=timezone.now(),
+    )
+    _create(Payment, [
+        Payment(
+            invoice=invoice,
+            method=rng.choice(PAYMENT_METHODS),
+            transaction_id=f'SEED-{invoice.pk}',
+            amount=invoice.amount,
+        ) for invoice in invoices if invoice.is_paid
+    ], counts)
@@ -0,0 +1,24 @@
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    A ModelSerializer that takes optional `fields` and `expand` arguments.
+    `fields` limits the output to the named fields; `expand` replaces the
+    named relations with the nested serializer (a class or dotted path)
+    listed in Meta.expandable_fields.
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name in expand or ():
+            if name in expandable:
+                serializer_class = expandable[name]
+                if isinstance(serializer_class, str):
+                    serializer_class = import_string(serializer_class)
+                self.fields[name] = serializer_class(read_only=True)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
@@ -14,6 +14,9 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 
+from medicare_core.caches import cache_settings, session_engine
+from medicare_core.database import database_settings, replica_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -47,12 +50,15 @@ INSTALLED_APPS = [
     'django_filters',
 
     # Costomize Apps
+    'medicare_core',
     'users',
     'patients',
     'doctors',
     'appointments',
     'prescriptions',
     'billing',
+    'avatars',
+    'notifications',
 
     # Allauth
     'django.contrib.sites',
@@ -65,10 +71,14 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    # After WhiteNoise so static files are not timed
+    'medicare_core.metrics.PerformanceMiddleware',
+    'medicare_core.replicas.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'medicare_core.actors.ActorMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
@@ -76,17 +86,24 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'medicare_core.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates with render time reported to PerformanceMiddleware
+        'BACKEND': 'medicare_core.metrics.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'medicare_core/templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Compiled templates are kept in memory unless DEBUG, where edits
+            # should show without a restart
+            'loaders': TEMPLATE_LOADERS if DEBUG else [('django.template.loaders.cached.Loader', TEMPLATE_LOADERS)],
         },
     },
 ]
@@ -97,12 +114,33 @@ WSGI_APPLICATION = 'medicare_core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite by default; DB_ENGINE=postgresql selects PostgreSQL with persistent
+# or pooled connections (see medicare_core/database.py)
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_settings(os.environ, BASE_DIR),
 }
+# DB_REPLICA_* adds a read replica for read-only views and API GETs
+REPLICA_DATABASE = replica_settings(os.environ, DATABASES['default'])
+if REPLICA_DATABASE:
+    DATABASES['replica'] = REPLICA_DATABASE
+DATABASE_ROUTERS = ['medicare_core.replicas.ReplicaRouter']
+# How long a browser reads from the primary after writing, to cover replica lag
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '15'))
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# In-process memory by default; CACHE_BACKEND=file or redis shares it between
+# workers (see medicare_core/caches.py)
+CACHES = {
+    'default': cache_settings(os.environ, BASE_DIR),
+}
+
+# Sessions are read from the cache and written through to the database, so
+# a request only queries django_session when the cache misses
+# (see medicare_core/caches.py)
+SESSION_ENGINE = session_engine(os.environ)
 
 
 # Password validation
@@ -145,9 +183,33 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'medicare_core.pagination.MedicarePagination',
+    'PAGE_SIZE': int(os.getenv('API_PAGE_SIZE', '25')),
+    # Request counts are kept in the default cache
+    'DEFAULT_THROTTLE_CLASSES': [
+        'rest_framework.throttling.AnonRateThrottle',
+        'rest_framework.throttling.UserRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': os.getenv('API_THROTTLE_ANON', '60/minute'),
+        'user': os.getenv('API_THROTTLE_USER', '1200/minute'),
+    },
 }
+# Upper bound for ?page_size= on API list endpoints
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', '100'))
+# Rows fetched per database round trip by the streaming /export/ endpoints
+API_EXPORT_CHUNK_SIZE = int(os.getenv('API_EXPORT_CHUNK_SIZE', '2000'))
+# 'page' for ?page=N pagination, 'cursor' for keyset pagination by default
+API_DEFAULT_PAGINATION = os.getenv('API_DEFAULT_PAGINATION', 'page')
+# Rows per page on the HTML list views
+UI_PAGE_SIZE = int(os.getenv('UI_PAGE_SIZE', '25'))
+
+# Per-request timings in a Server-Timing response header
+SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'True').lower() == 'true'
+# Bearer token for scraping /metrics; without one only admins can read it
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
 STATIC_URL = 'static/'
-STATICFILES_DIRS = [BASE_DIR / 'medicare_core/static']
+# medicare_core/static is picked up by the app directories finder
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 AUTH_USER_MODEL = 'users.User'
@@ -164,14 +226,31 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Rendered prescription and receipt PDFs. They hold patient data, so they are
+# kept outside MEDIA_ROOT and only served through the login-protected views.
+DOCUMENT_CACHE_ROOT = Path(os.getenv('DOCUMENT_CACHE_ROOT', BASE_DIR / 'document_cache'))
+# Where `manage.py export_pdfs` writes its ZIPs unless given --output
+PDF_EXPORT_ROOT = Path(os.getenv('PDF_EXPORT_ROOT', BASE_DIR / 'exports'))
+
+# Profile avatars: 'local' renders initials with Pillow, 'dicebear' calls the
+# remote API. A dotted path to a custom callable is also accepted.
+AVATAR_BACKEND = os.getenv('AVATAR_BACKEND', 'local')
+# Generate avatars in `manage.py run_avatar_worker` instead of inside save()
+AVATAR_ASYNC = os.getenv('AVATAR_ASYNC', 'True').lower() == 'true'
+AVATAR_MAX_ATTEMPTS = 5
+
 # Email Configuration
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', '587'))
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True').lower() == 'true'
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+# Write emails to the outbox for `manage.py run_mail_worker` instead of
+# sending them during the request
+EMAIL_ASYNC = os.getenv('EMAIL_ASYNC', 'True').lower() == 'true'
+MAIL_MAX_ATTEMPTS = 5
 
 
 # Allauth Configuration
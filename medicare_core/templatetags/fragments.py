@@ -0,0 +1,11 @@
+from django import template
+
+from medicare_core.fragments import fragment_version as current_version
+
+register = template.Library()
+
+
+@register.simple_tag
+def fragment_version(label):
+    """The fragment cache version of a model, e.g. 'doctors.Doctor', for {% cache %}."""
+    return current_version(label)
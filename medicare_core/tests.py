@@ -0,0 +1,969 @@
+import csv
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import date, datetime, time, timedelta, timezone
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models import F
+from django.http import HttpResponse
+from django.conf import settings
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.template import engines
+from django.urls import reverse
+from django.utils import timezone as django_timezone
+from rest_framework.test import APIClient
+from rest_framework.throttling import UserRateThrottle
+
+from appointments.models import Appointment
+from avatars.models import AvatarJob
+from billing.models import Invoice, Payment
+from doctors.models import Doctor
+from medicare_core import metrics
+from medicare_core.counters import get_counts
+from medicare_core import replicas
+from medicare_core.actors import CACHE_TIMEOUT, LOCAL_CACHE_TIMEOUT, Actor, profile_cache_timeout
+from medicare_core.caches import cache_settings, session_engine
+from medicare_core.fragments import bump_fragment_version, fragment_version
+from medicare_core.database import database_settings, replica_settings
+from medicare_core.documents import document_storage
+from medicare_core.models import Counter
+from medicare_core.seeding import seed_database
+from medicare_core.urls import router
+from medicare_core.utils import generate_profile_image, render_local_avatar
+from patients.models import Patient
+from prescriptions.models import Prescription
+
+User = get_user_model()
+
+
+def fake_avatar_backend(name_seed):
+    return name_seed.upper()
+
+
+class LocalAvatarTests(SimpleTestCase):
+    def test_same_seed_renders_same_image(self):
+        first = render_local_avatar('Dr. Gregory House')
+        second = render_local_avatar('Dr. Gregory House')
+        self.assertEqual(first.read(), second.read())
+
+    def test_different_seeds_render_different_images(self):
+        first = render_local_avatar('John Doe')
+        second = render_local_avatar('Jane Roe')
+        self.assertNotEqual(first.read(), second.read())
+
+    def test_output_is_png(self):
+        content = render_local_avatar('John Doe')
+        self.assertTrue(content.read().startswith(b'\x89PNG'))
+        self.assertEqual(content.name, 'John Doe.png')
+
+    @override_settings(AVATAR_BACKEND='medicare_core.tests.fake_avatar_backend')
+    def test_custom_backend_by_dotted_path(self):
+        self.assertEqual(generate_profile_image('john'), 'JOHN')
+
+
+class ApiPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='staff', password='pw', role='staff')
+        Patient.objects.bulk_create(
+            Patient(name=f'Patient {i}', age=30, gender='O', phone='1', address='1 St', image='x.png')
+            for i in range(30)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_page_number_pagination(self):
+        response = self.client.get('/api/patients/', {'page_size': 10, 'page': 2})
+        self.assertEqual(response.data['count'], 30)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_page_size_is_capped(self):
+        with self.settings(API_MAX_PAGE_SIZE=5):
+            response = self.client.get('/api/patients/', {'page_size': 10_000})
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_cursor_pagination_walks_every_row_once(self):
+        seen = []
+        url, params = '/api/patients/', {'pagination': 'cursor', 'page_size': 7}
+        while url:
+            response = self.client.get(url, params)
+            self.assertNotIn('count', response.data)
+            seen += [row['id'] for row in response.data['results']]
+            url, params = response.data['next'], None
+        self.assertEqual(sorted(seen), sorted(Patient.objects.values_list('id', flat=True)))
+
+
+
+class KeysetPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='staff', password='pw', role='staff')
+        doctors = Doctor.objects.bulk_create(
+            Doctor(name=f'Dr. {i}', phone='1', specialty='GP', available_days='Mon', image='x.png')
+            for i in range(3)
+        )
+        patient = Patient.objects.create(name='John Doe', age=30, gender='M', phone='1', address='1 St', image='x.png')
+        # Several appointments share a date and time, so the id breaks ties
+        Appointment.objects.bulk_create(
+            Appointment(patient=patient, doctor=doctors[i % 3], date=date(2025, 1, 1 + i // 6), time=time(9 + i % 2, 0))
+            for i in range(23)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def walk(self, url, params=None):
+        pages = []
+        path = url
+        while url:
+            response = self.client.get(url, params)
+            page = response.context['page']
+            pages.append(response)
+            url, params = (path + page.next_url) if page.has_next else None, None
+        return pages
+
+    def test_next_links_visit_every_row_once_in_order(self):
+        with self.settings(UI_PAGE_SIZE=5):
+            pages = self.walk(reverse('appointment_list'))
+        seen = [appointment.pk for response in pages for appointment in response.context['appointments']]
+        expected = list(Appointment.objects.order_by('-date', '-time', '-id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+        self.assertEqual([len(response.context['page']) for response in pages], [5, 5, 5, 5, 3])
+        self.assertFalse(pages[0].context['page'].has_previous)
+
+    def test_previous_links_return_to_the_same_pages(self):
+        with self.settings(UI_PAGE_SIZE=5):
+            pages = self.walk(reverse('appointment_list'))
+            response = pages[-1]
+            for earlier in reversed(pages[:-1]):
+                response = self.client.get(reverse('appointment_list') + response.context['page'].previous_url)
+                self.assertEqual(list(response.context['page']), list(earlier.context['page']))
+        self.assertFalse(response.context['page'].has_previous)
+        self.assertTrue(response.context['page'].has_next)
+
+    def test_deep_pages_use_a_range_query_without_count_or_offset(self):
+        with self.settings(UI_PAGE_SIZE=5):
+            last = self.walk(reverse('appointment_list'))[-2]
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse('appointment_list') + last.context['page'].next_url)
+        sql = ' '.join(query['sql'] for query in queries).upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+        self.assertIn('LIMIT 6', sql)
+
+    def test_cursor_keeps_sub_millisecond_timestamps(self):
+        created = Patient.objects.get().created_at
+        for i in range(6):
+            patient = Patient.objects.create(name=f'P{i}', age=30, gender='O', phone='1', address='1 St', image='x.png')
+            Patient.objects.filter(pk=patient.pk).update(created_at=created + timedelta(microseconds=100 * (i + 1)))
+        with self.settings(UI_PAGE_SIZE=2):
+            pages = self.walk(reverse('patient_list'))
+        seen = [patient.name for response in pages for patient in response.context['patients']]
+        self.assertEqual(seen, ['P5', 'P4', 'P3', 'P2', 'P1', 'P0', 'John Doe'])
+
+    def test_bad_cursor_shows_first_page(self):
+        response = self.client.get(reverse('appointment_list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['page'].has_previous)
+
+    def test_all_list_views_are_paged(self):
+        Invoice.objects.bulk_create(
+            Invoice(patient=Patient.objects.get(), amount=10, items='Consultation') for _ in range(4)
+        )
+        with self.settings(UI_PAGE_SIZE=2):
+            for name in ('patient_list', 'doctor_list', 'appointment_list', 'invoice_list', 'prescription_list'):
+                response = self.client.get(reverse(name))
+                self.assertEqual(response.status_code, 200, name)
+                self.assertLessEqual(len(response.context['page']), 2, name)
+            self.assertContains(self.client.get(reverse('doctor_list')), 'Next')
+
+class ApiQueryCountTests(TestCase):
+    """Fails if any API list endpoint issues queries per row (N+1)."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='admin', password='pw', role='admin'))
+        self.batch = 0
+
+    def create_rows(self, n):
+        self.batch += 1
+        tag = f'{self.batch}_'
+        users = User.objects.bulk_create(User(username=f'user{tag}{i}', role='patient') for i in range(n))
+        patients = Patient.objects.bulk_create(
+            Patient(user=user, name=f'Patient {tag}{i}', age=30, gender='O', phone='1', address='1 St', image='x.png')
+            for i, user in enumerate(users)
+        )
+        doctors = Doctor.objects.bulk_create(
+            Doctor(name=f'Dr. {tag}{i}', phone='1', specialty='GP', available_days='Mon', image='x.png')
+            for i in range(n)
+        )
+        appointments = Appointment.objects.bulk_create(
+            Appointment(patient=patient, doctor=doctor, date=date(2025, 1, 1), time=time(9, 0), status='completed')
+            for patient, doctor in zip(patients, doctors)
+        )
+        Prescription.objects.bulk_create(Prescription(appointment=a, medicines='Rest') for a in appointments)
+        Invoice.objects.bulk_create(
+            Invoice(patient=a.patient, appointment=a, amount=10, items='Visit') for a in appointments
+        )
+
+    def list_query_counts(self):
+        counts = {}
+        for prefix, viewset, basename in router.registry:
+            expandable = getattr(viewset.serializer_class.Meta, 'expandable_fields', {})
+            for params in ({}, {'expand': ','.join(expandable)}, {'fields': 'id'}):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(f'/api/{prefix}/', params)
+                self.assertEqual(response.status_code, 200, prefix)
+                counts[prefix, tuple(params.values())] = len(queries)
+        return counts
+
+    def test_list_query_count_does_not_grow_with_rows(self):
+        self.create_rows(2)
+        small = self.list_query_counts()
+        self.create_rows(8)
+        large = self.list_query_counts()
+        for key in small:
+            with self.subTest(endpoint=key):
+                self.assertEqual(small[key], large[key])
+
+
+class ApiSparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='admin', password='pw', role='admin'))
+        patient = Patient.objects.create(name='John Doe', age=30, gender='M', phone='1', address='1 St', image='x.png')
+        doctor = Doctor.objects.create(name='Dr. House', phone='2', specialty='GP', available_days='Mon', image='x.png')
+        Appointment.objects.create(patient=patient, doctor=doctor, date=date(2025, 1, 1), time=time(9, 0))
+
+    def test_fields_limits_representation(self):
+        response = self.client.get('/api/patients/', {'fields': 'id,name'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'name'})
+
+    def test_fields_narrows_sql_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/patients/', {'fields': 'id,name'})
+        select = [q['sql'] for q in queries if 'FROM "patients_patient"' in q['sql']][-1]
+        self.assertNotIn('medical_history', select)
+
+    def test_expand_nests_related_objects_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/appointments/', {'expand': 'doctor,patient', 'fields': 'id,doctor,patient'})
+        row = response.data['results'][0]
+        self.assertEqual(row['doctor']['name'], 'Dr. House')
+        self.assertEqual(row['patient']['name'], 'John Doe')
+        self.assertEqual(len([q for q in queries if 'FROM "appointments_appointment"' in q['sql']]), 2)
+
+    def test_cursor_pages_with_sparse_fields(self):
+        response = self.client.get('/api/patients/', {'fields': 'id', 'pagination': 'cursor'})
+        self.assertEqual(list(response.data['results'][0]), ['id'])
+
+
+class ExplainQueriesTests(TestCase):
+    def test_appointment_and_invoice_lists_use_indexes(self):
+        out = StringIO()
+        call_command('explain_queries', stdout=out)
+        for label in ('appointment_list (patient)', 'appointment_list (doctor)', 'invoice_list (patient)', 'prescription_add (doctor)'):
+            self.assertIn(f'[INDEX] {label}', out.getvalue())
+
+
+class CounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.doctor = Doctor.objects.create(name='Dr. House', phone='1', specialty='GP', available_days='Mon', image='x.png')
+
+    def create_patient(self, name='John Doe'):
+        return Patient.objects.create(name=name, age=30, gender='M', phone='1', address='1 St', image='x.png')
+
+    def test_first_read_seeds_counters(self):
+        self.create_patient()
+        self.assertEqual(get_counts(), {'patient_count': 1, 'doctor_count': 1, 'appointment_count': 0, 'prescription_count': 0})
+        self.assertEqual(Counter.objects.count(), 4)
+
+    def test_signals_keep_counters_current(self):
+        get_counts()
+        with self.captureOnCommitCallbacks(execute=True):
+            patient = self.create_patient()
+            Appointment.objects.create(patient=patient, doctor=self.doctor, date=date(2025, 1, 6), time=time(9, 0))
+        self.assertEqual(get_counts()['appointment_count'], 1)
+        # Deleting the patient cascades to the appointment
+        with self.captureOnCommitCallbacks(execute=True):
+            patient.delete()
+        counts = get_counts()
+        self.assertEqual((counts['patient_count'], counts['appointment_count']), (0, 0))
+
+    def test_counters_change_after_the_writer_commits(self):
+        get_counts()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.create_patient()
+            # The shared row is not locked for the rest of the writer's transaction
+            self.assertEqual(Counter.objects.get(name='patient_count').value, 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(get_counts()['patient_count'], 1)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.create_patient('Rolled Back')
+            raise RuntimeError
+        self.assertEqual(get_counts()['patient_count'], 1)
+
+    def test_home_reads_counters_from_cache(self):
+        user = User.objects.create_user(username='staff', password='pw', role='staff')
+        self.client.force_login(user)
+        self.client.get('/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/')
+        self.assertEqual(response.context['doctor_count'], 1)
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+
+    def test_reconcile_fixes_drift_from_bulk_operations(self):
+        get_counts()
+        Patient.objects.bulk_create(
+            Patient(name=f'Patient {i}', age=30, gender='O', phone='1', address='1 St', image='x.png') for i in range(3)
+        )
+        self.assertEqual(get_counts()['patient_count'], 0)
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertIn('patient_count: stored 0, actual 3', out.getvalue())
+        self.assertEqual(get_counts()['patient_count'], 3)
+
+
+class ExportPdfsTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.settings_override = override_settings(DOCUMENT_CACHE_ROOT=os.path.join(self.tmp, 'cache'))
+        self.settings_override.enable()
+        patient = Patient.objects.create(name='John Doe', age=30, gender='M', phone='1', address='1 St', image='x.png')
+        doctor = Doctor.objects.create(name='Dr. House', phone='2', specialty='GP', available_days='Mon', image='x.png')
+        self.prescriptions = []
+        for day in (5, 6, 7):
+            appointment = Appointment.objects.create(patient=patient, doctor=doctor, date=date(2025, 1, day), time=time(9, 0))
+            prescription = Prescription.objects.create(appointment=appointment, medicines=f'Medicine {day}')
+            Prescription.objects.filter(pk=prescription.pk).update(created_at=datetime(2025, 1, day, 12, tzinfo=timezone.utc))
+            self.prescriptions.append(prescription)
+        invoice = Invoice.objects.create(patient=patient, amount=50, items='Consultation', is_paid=True)
+        self.payment = Payment.objects.create(invoice=invoice, method='VISA', transaction_id='tx-1', amount=50)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_command_exports_date_range_in_parallel(self):
+        output = os.path.join(self.tmp, 'export.zip')
+        out = StringIO()
+        call_command('export_pdfs', kind='prescriptions', date_from=date(2025, 1, 6), date_to=date(2025, 1, 7),
+                     output=output, workers=2, stdout=out)
+        self.assertIn('Exported 2 prescriptions', out.getvalue())
+        with zipfile.ZipFile(output) as archive:
+            self.assertEqual(archive.namelist(), [f'prescription_{p.pk}.pdf' for p in self.prescriptions[1:]])
+            self.assertTrue(all(archive.read(name).startswith(b'%PDF') for name in archive.namelist()))
+        # Rendered documents are added to the cache used by the views
+        _, files = document_storage().listdir(f'prescriptions/{self.prescriptions[1].pk}')
+        self.assertEqual(len(files), 1)
+
+    def test_command_writes_to_the_export_root_by_default(self):
+        root = Path(self.tmp) / 'exports'
+        with override_settings(PDF_EXPORT_ROOT=root):
+            call_command('export_pdfs', kind='receipts', date_to=date(2030, 1, 1), workers=1, stdout=StringIO())
+        self.assertEqual(os.listdir(root), ['receipts_start_2030-01-01.zip'])
+
+    def test_admin_action_downloads_zip(self):
+        admin_user = User.objects.create_superuser(username='admin', password='pw', email='admin@example.com')
+        self.client.force_login(admin_user)
+        response = self.client.post('/admin/billing/payment/', {
+            'action': 'export_selected', '_selected_action': [self.payment.pk],
+        })
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        with zipfile.ZipFile(BytesIO(b''.join(response.streaming_content))) as archive:
+            self.assertEqual(archive.namelist(), [f'receipt_{self.payment.pk}.pdf'])
+
+
+class ApiExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='staff', password='pw', role='staff'))
+        self.doctor = Doctor.objects.create(name='Dr. House', phone='2', specialty='GP', available_days='Mon', image='x.png')
+
+    def create_appointments(self, n):
+        patients = Patient.objects.bulk_create(
+            Patient(name=f'Patient {i}', age=30, gender='O', phone='1', address='1 St', image='x.png') for i in range(n)
+        )
+        Appointment.objects.bulk_create(
+            Appointment(patient=patient, doctor=self.doctor, date=date(2025, 1, 6), time=time(9, 0), status='cancelled')
+            for patient in patients
+        )
+
+    def export(self, path, **params):
+        response = self.client.get(path, params)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_export_streams_every_row_with_related_names(self):
+        self.create_appointments(3)
+        response, body = self.export('/api/appointments/export/', format='csv')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('filename="appointment.csv"', response['Content-Disposition'])
+        rows = list(csv.DictReader(body.splitlines()))
+        self.assertEqual([row['patient_name'] for row in rows], ['Patient 0', 'Patient 1', 'Patient 2'])
+        self.assertEqual(rows[0]['doctor_name'], 'Dr. House')
+
+    def test_ndjson_export_with_fields(self):
+        self.create_appointments(2)
+        response, body = self.export('/api/patients/export/', format='ndjson', fields='id,name')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        lines = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(lines[0], {'id': lines[0]['id'], 'name': 'Patient 0'})
+        self.assertEqual(len(lines), 2)
+
+    @override_settings(API_EXPORT_CHUNK_SIZE=10)
+    def test_query_count_does_not_grow_with_rows(self):
+        self.create_appointments(50)
+        with CaptureQueriesContext(connection) as queries:
+            self.export('/api/appointments/export/', format='csv')
+        self.assertEqual(sum('appointments_appointment' in q['sql'] for q in queries.captured_queries), 1)
+
+    def test_unknown_or_empty_fields_are_rejected(self):
+        self.create_appointments(1)
+        for fields in ('bogus', 'id,bogus,salary', ','):
+            response = self.client.get('/api/patients/export/', {'format': 'ndjson', 'fields': fields})
+            self.assertEqual(response.status_code, 400, fields)
+            self.assertFalse(response.streaming)
+        response = self.client.get('/api/patients/export/', {'format': 'ndjson', 'fields': 'id,bogus,salary'})
+        self.assertEqual(json.loads(response.content), {'fields': 'Unknown fields: bogus, salary'})
+
+    def test_unknown_format_is_rejected(self):
+        self.assertEqual(self.client.get('/api/billing/export/', {'format': 'xml'}).status_code, 404)
+
+    def test_export_requires_authentication(self):
+        self.assertEqual(APIClient().get('/api/patients/export/', {'format': 'csv'}).status_code, 403)
+
+
+class ImportRecordsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp, name)
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_csv_import_in_batches_skips_invalid_rows(self):
+        get_counts()
+        path = self.write('patients.csv', (
+            'name,age,gender,phone,address,email\n'
+            'Ann,30,F,1,1 St,\n'
+            'Bob,abc,M,2,2 St,\n'
+            'Cid,40,X,3,3 St,\n'
+            'Dee,50,O,4,4 St,dee@example.com\n'
+            'Eve,60,F,5,5 St,\n'
+            'Fay,70,F,6,6 St,,extra,cells\n'
+        ))
+        out, err = StringIO(), StringIO()
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            call_command('import_records', 'patients', path, batch_size=2, stdout=out, stderr=err)
+        self.assertEqual(list(Patient.objects.order_by('name').values_list('name', flat=True)), ['Ann', 'Dee', 'Eve'])
+        self.assertEqual(Patient.objects.get(name='Dee').email, 'dee@example.com')
+        self.assertIn('Line 3:', err.getvalue())
+        self.assertIn('Line 4:', err.getvalue())
+        self.assertIn('Line 7: Row has 2 extra values', err.getvalue())
+        self.assertIn('Imported 3 patients', out.getvalue())
+        self.assertIn('rows/s', out.getvalue())
+        # One INSERT per batch rather than per row
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "patients_patient"')]
+        self.assertEqual(len(inserts), 3)
+        # Avatars are queued instead of generated, and counters stay current
+        self.assertEqual(AvatarJob.objects.filter(status='pending').count(), 3)
+        self.assertTrue(all(not image for image in Patient.objects.values_list('image', flat=True)))
+        self.assertEqual(get_counts()['patient_count'], 3)
+
+    def test_jsonl_import_and_dry_run(self):
+        path = self.write('doctors.jsonl', (
+            '{"name": "Dr. A", "phone": "1", "specialty": "GP", "available_days": "Mon"}\n'
+            '\n'
+            '{"name": "Dr. B", "phone": "2", "specialty": "GP", "available_days": "Tue", "salary": 1}\n'
+            '{"name": "Dr. C", \n'
+            '["Dr. D"]\n'
+        ))
+        err = StringIO()
+        call_command('import_records', 'doctors', path, dry_run=True, stdout=StringIO(), stderr=err)
+        self.assertFalse(Doctor.objects.exists())
+        self.assertIn('Line 3: Unknown columns: salary', err.getvalue())
+        self.assertIn('Line 4: Invalid JSON', err.getvalue())
+        self.assertIn('Line 5: Record is not an object', err.getvalue())
+        call_command('import_records', 'doctors', path, no_avatars=True, stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(list(Doctor.objects.values_list('name', flat=True)), ['Dr. A'])
+        self.assertFalse(AvatarJob.objects.exists())
+
+
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        for histogram in metrics.HISTOGRAMS:
+            histogram.clear()
+        self.admin = User.objects.create_user(username='boss', password='pw', role='admin')
+        self.client.force_login(self.admin)
+
+    def test_server_timing_header_reports_queries_and_templates(self):
+        response = self.client.get(reverse('patient_list'))
+        timing = dict(entry.split(';', 1) for entry in response['Server-Timing'].split(', '))
+        self.assertEqual(set(timing), {'total', 'db', 'template', 'app'})
+        self.assertRegex(timing['db'], r'^dur=[\d.]+;desc="\d+ queries"$')
+
+    def test_tracked_phases_exclude_nested_sql(self):
+        timings = metrics.RequestTimings()
+        token = metrics._current.set(timings)
+        try:
+            with metrics.track('pdf'), connection.execute_wrapper(metrics._record_query):
+                Patient.objects.count()
+        finally:
+            metrics._current.reset(token)
+        self.assertEqual(timings.queries, 1)
+        self.assertAlmostEqual(timings.phases['pdf'] + timings.phases['db'], timings.accounted)
+        # Outside a request nothing is recorded
+        with metrics.track('pdf'):
+            pass
+
+    def test_metrics_endpoint_exposes_histograms(self):
+        self.client.get(reverse('patient_list'))
+        self.client.get(reverse('patient_list'))
+        response = self.client.get('/metrics')
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        text = response.content.decode()
+        self.assertIn('# TYPE medicare_http_request_duration_seconds histogram', text)
+        self.assertIn('medicare_http_request_duration_seconds_count{view="patient_list",method="GET"} 2', text)
+        self.assertIn('medicare_http_request_duration_seconds_bucket{view="patient_list",method="GET",le="+Inf"} 2', text)
+        self.assertIn('medicare_http_request_phase_duration_seconds_count{view="patient_list",phase="template"} 2', text)
+
+    def test_metrics_require_admin_or_token(self):
+        self.client.logout()
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        with self.settings(METRICS_TOKEN='s3cret'):
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram('t', 'Test.', ('view',), (1, 5))
+        for value in (0.5, 1, 3, 9):
+            histogram.observe(value, view='v')
+        self.assertEqual(histogram.expose().splitlines()[2:], [
+            't_bucket{view="v",le="1"} 2',
+            't_bucket{view="v",le="5"} 3',
+            't_bucket{view="v",le="+Inf"} 4',
+            't_sum{view="v"} 13.500000',
+            't_count{view="v"} 4',
+        ])
+
+
+class SeedBenchmarkTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_seeds_linked_rows_and_keeps_counters_current(self):
+        out = StringIO()
+        call_command('seed_benchmark', patients=30, doctors=4, appointments=200, avatars=2, stdout=out)
+        self.assertEqual((Patient.objects.count(), Doctor.objects.count(), Appointment.objects.count()), (30, 4, 200))
+        self.assertTrue(Prescription.objects.exists())
+        self.assertFalse(Payment.objects.exclude(invoice__is_paid=True).exists())
+        self.assertFalse(Invoice.objects.exclude(date=F('appointment__date')).exists())
+        self.assertEqual(Patient.objects.values('image').distinct().count(), 2)
+        self.assertFalse(AvatarJob.objects.exists())
+        self.assertEqual(get_counts()['appointment_count'], 200)
+        self.assertIn('Created', out.getvalue())
+
+    def test_same_seed_gives_same_data(self):
+        def snapshot():
+            return list(Appointment.objects.order_by('pk').values_list('patient__name', 'date', 'time', 'status'))
+
+        seed_database(patients=10, doctors=2, appointments=50, avatars=0, today=date(2025, 1, 6))
+        first = snapshot()
+        Patient.objects.all().delete()
+        Doctor.objects.all().delete()
+        seed_database(patients=10, doctors=2, appointments=50, avatars=0, today=date(2025, 1, 6))
+        self.assertEqual(snapshot(), first)
+
+    def test_appointments_need_doctors_and_patients(self):
+        with self.assertRaises(CommandError):
+            call_command('seed_benchmark', patients=0, doctors=0, appointments=10, stdout=StringIO())
+
+
+class DatabaseSettingsTests(SimpleTestCase):
+    def test_sqlite_is_the_default(self):
+        config = database_settings({}, Path('/srv/app'))
+        self.assertEqual(config, {'ENGINE': 'django.db.backends.sqlite3', 'NAME': Path('/srv/app/db.sqlite3')})
+
+    def test_postgresql_keeps_checked_persistent_connections(self):
+        config = database_settings({'DB_ENGINE': 'postgresql', 'DB_HOST': 'db', 'DB_CONN_MAX_AGE': '300'}, Path('.'))
+        self.assertEqual(config['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual((config['HOST'], config['NAME']), ('db', 'medicare'))
+        self.assertEqual((config['CONN_MAX_AGE'], config['CONN_HEALTH_CHECKS']), (300, True))
+        self.assertNotIn('pool', config['OPTIONS'])
+
+    def test_pool_disables_persistent_connections(self):
+        config = database_settings({'DB_ENGINE': 'postgresql', 'DB_POOL': 'true', 'DB_POOL_MAX_SIZE': '20'}, Path('.'))
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertEqual(config['OPTIONS']['pool'], {'min_size': 2, 'max_size': 20, 'timeout': 10.0})
+
+    def test_unknown_engine_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            database_settings({'DB_ENGINE': 'oracle'}, Path('.'))
+
+
+class CacheSettingsTests(SimpleTestCase):
+    def test_local_memory_is_the_default(self):
+        config = cache_settings({}, Path('/srv/app'))
+        self.assertEqual(config['BACKEND'], 'django.core.cache.backends.locmem.LocMemCache')
+        self.assertEqual(config['KEY_PREFIX'], 'medicare')
+
+    def test_file_cache_defaults_to_the_project_directory(self):
+        config = cache_settings({'CACHE_BACKEND': 'file'}, Path('/srv/app'))
+        self.assertEqual(config['BACKEND'], 'django.core.cache.backends.filebased.FileBasedCache')
+        self.assertEqual(config['LOCATION'], '/srv/app/cache')
+
+    def test_redis_location(self):
+        config = cache_settings({'CACHE_BACKEND': 'redis', 'CACHE_LOCATION': 'redis://cache:6379/1'}, Path('.'))
+        self.assertEqual(config['BACKEND'], 'django.core.cache.backends.redis.RedisCache')
+        self.assertEqual(config['LOCATION'], 'redis://cache:6379/1')
+
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            cache_settings({'CACHE_BACKEND': 'memcached'}, Path('.'))
+
+    def test_cache_only_sessions_are_opt_in(self):
+        for backend in ('locmem', 'file', 'redis'):
+            self.assertEqual(session_engine({'CACHE_BACKEND': backend}), 'django.contrib.sessions.backends.cached_db')
+        self.assertEqual(session_engine({'SESSION_CACHE_ONLY': 'True'}), 'django.contrib.sessions.backends.cache')
+
+
+class CachedSessionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_user(username='boss', password='pw', role='admin'))
+
+    def test_sessions_are_read_from_the_cache(self):
+        self.client.get(reverse('patient_list'))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(reverse('patient_list')).status_code, 200)
+        self.assertFalse([query for query in queries if 'django_session' in query['sql']])
+
+    def test_api_requests_are_throttled_per_user(self):
+        with mock.patch.dict(UserRateThrottle.THROTTLE_RATES, {'user': '2/minute'}):
+            statuses = [self.client.get('/api/doctors/').status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.doctor = Doctor.objects.create(name='Dr. Old', phone='1', specialty='GP', available_days='Mon', image='x.png')
+
+    def test_doctor_grid_is_cached_until_a_doctor_changes(self):
+        self.assertContains(self.client.get(reverse('doctor_list')), 'Dr. Old')
+        # update() sends no signal, so the cached grid is still served
+        Doctor.objects.filter(pk=self.doctor.pk).update(name='Dr. New')
+        self.assertContains(self.client.get(reverse('doctor_list')), 'Dr. Old')
+
+        version = fragment_version('doctors.Doctor')
+        self.doctor.name = 'Dr. New'
+        self.doctor.save()
+        self.assertNotEqual(fragment_version('doctors.Doctor'), version)
+        self.assertContains(self.client.get(reverse('doctor_list')), 'Dr. New')
+
+    def test_grid_from_a_lagging_replica_is_not_served_once_it_catches_up(self):
+        # The version is bumped on commit, but the replica has not seen the edit yet
+        bump_fragment_version('doctors.Doctor')
+        self.assertContains(self.client.get(reverse('doctor_list')), 'Dr. Old')
+        Doctor.objects.filter(pk=self.doctor.pk).update(name='Dr. New', updated_at=django_timezone.now())
+        self.assertContains(self.client.get(reverse('doctor_list')), 'Dr. New')
+
+    def test_grid_is_keyed_on_the_decoded_cursor(self):
+        Doctor.objects.bulk_create(
+            Doctor(name=f'Dr. {i}', phone='1', specialty='GP', available_days='Mon', image='x.png') for i in range(30)
+        )
+        with mock.patch('django.templatetags.cache.make_template_fragment_key', wraps=make_template_fragment_key) as key:
+            self.client.get(reverse('doctor_list'), {'cursor': 'bogus'})
+            self.client.get(reverse('doctor_list'), {'cursor': 'eyJkIjogIm5leHQifQ'})
+            response = self.client.get(reverse('doctor_list'))
+            self.client.get(reverse('doctor_list') + response.context['page'].next_url)
+        cursors = [call.args[1][-1] for call in key.call_args_list]
+        # Made-up cursors read the first page and share its entry
+        self.assertEqual(cursors[:3], ['', '', ''])
+        self.assertEqual(cursors[3], response.context['page'].next_cursor)
+
+    def test_nav_links_follow_the_role(self):
+        self.client.force_login(User.objects.create_user(username='boss', password='pw', role='admin'))
+        self.assertContains(self.client.get(reverse('doctor_list')), reverse('patient_list'))
+        self.client.force_login(User.objects.create_user(username='pat', password='pw', role='patient'))
+        self.assertNotContains(self.client.get(reverse('doctor_list')), reverse('patient_list'))
+
+    def test_templates_are_compiled_once(self):
+        loader = engines.all()[0].engine.template_loaders[0]
+        self.assertEqual(type(loader).__module__, 'django.template.loaders.cached')
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin = User.objects.create_user(username='admin', password='pw', role='admin')
+        self.client.force_authenticate(self.admin)
+        self.patient = Patient.objects.create(name='John Doe', age=30, gender='M', phone='1', address='1 St', image='x.png')
+        self.doctor = Doctor.objects.create(name='Dr. House', phone='2', specialty='GP', available_days='Mon', image='x.png')
+        self.appointment = Appointment.objects.create(patient=self.patient, doctor=self.doctor, date=date(2025, 1, 1), time=time(9, 0))
+
+    def revalidate(self, path, etag, **params):
+        return self.client.get(path, params, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_list_is_not_modified_without_serializing(self):
+        with CaptureQueriesContext(connection) as full:
+            response = self.client.get('/api/appointments/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertIn('Last-Modified', response)
+        with CaptureQueriesContext(connection) as queries, \
+                mock.patch('appointments.serializers.AppointmentSerializer.to_representation') as to_representation:
+            response = self.revalidate('/api/appointments/', response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        to_representation.assert_not_called()
+        # No query beyond those of the full response
+        self.assertEqual(len(queries), len(full))
+        self.assertFalse([query for query in queries if 'MAX(' in query['sql']])
+
+    def test_cursor_pages_and_details_count_nothing(self):
+        for path, params in (('/api/appointments/', {'pagination': 'cursor', 'fields': 'id'}),
+                             (f'/api/appointments/{self.appointment.pk}/', {'expand': 'patient,doctor'})):
+            etag = self.client.get(path, params)['ETag']
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.revalidate(path, etag, **params).status_code, 304)
+            self.assertFalse([query for query in queries if 'COUNT(' in query['sql']], path)
+
+    def test_saves_and_deletes_change_the_etag(self):
+        etag = self.client.get('/api/appointments/')['ETag']
+        self.appointment.status = 'completed'
+        self.appointment.save()
+        self.assertEqual(self.revalidate('/api/appointments/', etag).status_code, 200)
+
+        etag = self.client.get('/api/appointments/')['ETag']
+        self.appointment.delete()
+        self.assertEqual(self.revalidate('/api/appointments/', etag).status_code, 200)
+
+    def test_related_changes_change_the_etag(self):
+        etag = self.client.get('/api/appointments/', {'expand': 'patient'})['ETag']
+        other = Patient.objects.create(name='Jane Roe', age=40, gender='F', phone='3', address='2 St', image='x.png')
+        # Patients the page does not show leave it alone
+        self.assertEqual(self.revalidate('/api/appointments/', etag, expand='patient').status_code, 304)
+        other.delete()
+        self.patient.name = 'John Smith'
+        self.patient.save()
+        response = self.revalidate('/api/appointments/', etag, expand='patient')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['patient']['name'], 'John Smith')
+
+    def test_etag_depends_on_the_query_string(self):
+        etag = self.client.get('/api/patients/')['ETag']
+        self.assertEqual(self.revalidate('/api/patients/', etag, fields='id').status_code, 200)
+
+    def test_retrieve_is_conditional(self):
+        path = f'/api/doctors/{self.doctor.pk}/'
+        etag = self.client.get(path)['ETag']
+        self.assertEqual(self.revalidate(path, etag).status_code, 304)
+        Doctor.objects.filter(pk=self.doctor.pk).update(name='Dr. Wilson', updated_at=django_timezone.now())
+        self.assertEqual(self.revalidate(path, etag).status_code, 200)
+        self.assertEqual(self.client.get('/api/doctors/0/').status_code, 404)
+
+    def test_doctor_page_is_conditional(self):
+        self.client.force_login(self.admin)
+        etag = self.client.get(reverse('doctor_list'))['ETag']
+        self.assertEqual(self.client.get(reverse('doctor_list'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.doctor.save()
+        self.assertEqual(self.client.get(reverse('doctor_list'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ActorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='pat', password='pw', role='patient')
+        self.patient = Patient.objects.create(user=self.user, name='Pat', age=30, gender='F', phone='1', address='A')
+
+    def test_profiles_are_resolved_once_and_cached(self):
+        with self.assertNumQueries(1):
+            actor = Actor(self.user)
+            self.assertEqual((actor.role, actor.patient_id, actor.doctor_id), ('patient', self.patient.pk, None))
+        with self.assertNumQueries(0):
+            self.assertTrue(Actor(self.user).is_patient)
+
+    def test_profiles_are_kept_briefly_in_a_per_process_cache(self):
+        self.assertEqual(profile_cache_timeout(), LOCAL_CACHE_TIMEOUT)
+        with tempfile.TemporaryDirectory() as location, override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+        }}):
+            self.assertEqual(profile_cache_timeout(), CACHE_TIMEOUT)
+
+    def test_role_checks_need_no_query(self):
+        with self.assertNumQueries(0):
+            self.assertFalse(Actor(self.user).has_role('admin', 'staff'))
+
+    def test_relinking_a_profile_refreshes_both_users(self):
+        other = User.objects.create_user(username='other', password='pw', role='patient')
+        Actor(self.user).patient_id, Actor(other).patient_id
+        self.patient.user = other
+        self.patient.save()
+        self.assertIsNone(Actor(self.user).patient_id)
+        self.assertEqual(Actor(other).patient_id, self.patient.pk)
+
+    def test_anonymous_users_have_no_role(self):
+        actor = Actor(AnonymousUser())
+        self.assertEqual((actor.role, actor.is_patient, actor.is_doctor), (None, False, False))
+        self.assertFalse(actor.has_role('admin'))
+
+    def test_pages_do_not_look_up_profiles(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('invoice_list'))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(reverse('invoice_list')).status_code, 200)
+        self.assertFalse([query for query in queries if '"patients_patient"."user_id" =' in query['sql']])
+
+
+class ReplicaSettingsTests(SimpleTestCase):
+    default = {'ENGINE': 'django.db.backends.postgresql', 'NAME': 'medicare', 'HOST': 'db', 'OPTIONS': {'connect_timeout': 5}}
+
+    def test_no_replica_unless_configured(self):
+        self.assertIsNone(replica_settings({}, self.default))
+
+    def test_replica_overrides_the_default(self):
+        config = replica_settings({'DB_REPLICA_HOST': 'db-replica'}, self.default)
+        self.assertEqual((config['HOST'], config['NAME']), ('db-replica', 'medicare'))
+        self.assertIsNot(config['OPTIONS'], self.default['OPTIONS'])
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = replicas.ReplicaRouter()
+        self.routing = replicas.RequestRouting()
+        token = replicas._current.set(self.routing)
+        self.addCleanup(replicas._current.reset, token)
+
+    def test_reads_use_the_primary_unless_the_request_opted_in(self):
+        self.assertEqual(self.router.db_for_read(Doctor), 'default')
+        self.routing.use_replica = True
+        self.assertEqual(self.router.db_for_read(Doctor), 'replica')
+
+    def test_accounts_and_sessions_stay_on_the_primary(self):
+        self.routing.use_replica = True
+        self.assertEqual(self.router.db_for_read(get_user_model()), 'default')
+
+    def test_related_lookups_follow_the_instance(self):
+        self.routing.use_replica = True
+        user = get_user_model()(username='u')
+        user._state.db = 'default'
+        self.assertEqual(self.router.db_for_read(Patient, instance=user), 'default')
+
+    def test_a_write_sends_later_reads_to_the_primary(self):
+        self.routing.use_replica = True
+        self.assertEqual(self.router.db_for_write(Appointment), 'default')
+        self.assertEqual(self.router.db_for_read(Doctor), 'default')
+
+    def test_no_request_means_the_primary(self):
+        replicas._current.set(None)
+        self.assertEqual(self.router.db_for_read(Doctor), 'default')
+
+
+@mock.patch('medicare_core.replicas.replica_configured', return_value=True)
+class ReplicaMiddlewareTests(SimpleTestCase):
+    def run_view(self, request, view):
+        seen = {}
+
+        def get_response(request):
+            middleware.process_view(request, view, (), {})
+            seen['use_replica'] = replicas._current.get().use_replica
+            return view(request)
+
+        middleware = replicas.ReplicaMiddleware(get_response)
+        response = middleware(request)
+        return seen['use_replica'], response
+
+    def test_marked_views_read_from_the_replica(self, configured):
+        use_replica, response = self.run_view(RequestFactory().get('/'), replicas.replica_reads(lambda request: HttpResponse()))
+        self.assertTrue(use_replica)
+        self.assertNotIn(replicas.PIN_COOKIE, response.cookies)
+
+    def test_unmarked_views_and_posts_use_the_primary(self, configured):
+        self.assertFalse(self.run_view(RequestFactory().get('/'), lambda request: HttpResponse())[0])
+        self.assertFalse(self.run_view(RequestFactory().post('/'), replicas.replica_reads(lambda request: HttpResponse()))[0])
+
+    def test_pinned_browsers_use_the_primary(self, configured):
+        request = RequestFactory().get('/')
+        request.COOKIES[replicas.PIN_COOKIE] = '1'
+        self.assertFalse(self.run_view(request, replicas.replica_reads(lambda request: HttpResponse()))[0])
+
+    def test_a_write_pins_the_browser(self, configured):
+        def write(request):
+            replicas.ReplicaRouter().db_for_write(Appointment)
+            return HttpResponse()
+
+        _, response = self.run_view(RequestFactory().post('/'), write)
+        cookie = response.cookies[replicas.PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PIN_SECONDS)
+        self.assertTrue(cookie['httponly'])
+
+
+@skipUnless('replica' in settings.DATABASES, 'Needs a replica database: python runtests.py --replica')
+class ReplicaRoutingTests(TransactionTestCase):
+    # The test replica is a separate, unreplicated database, so whichever
+    # one a page read from shows in what it lists
+    databases = {'default', 'replica'} if 'replica' in settings.DATABASES else {'default'}
+
+    def setUp(self):
+        cache.clear()
+        self.admin = get_user_model().objects.create_user(username='admin', password='x', role='admin', is_superuser=True)
+        self.patient = Patient.objects.create(name='Pat', age=30, gender='F', phone='1', email='pat@example.com', address='A')
+        self.doctor = Doctor.objects.create(name='Dr. Primary', phone='1', specialty='Cardiology', available_days='Mon')
+        Doctor.objects.using('replica').bulk_create([Doctor(name='Dr. Replica', phone='2', specialty='Neurology', available_days='Tue')])
+        self.client.force_login(self.admin)
+
+    def test_read_only_pages_and_api_gets_read_from_the_replica(self):
+        page = self.client.get(reverse('doctor_list')).content.decode()
+        self.assertIn('Dr. Replica', page)
+        self.assertNotIn('Dr. Primary', page)
+        names = [row['name'] for row in self.client.get('/api/doctors/').json()['results']]
+        self.assertEqual(names, ['Dr. Replica'])
+
+    def test_other_pages_read_from_the_primary(self):
+        page = self.client.get(reverse('appointment_add')).content.decode()
+        self.assertIn('Dr. Primary', page)
+
+    def test_a_booking_is_visible_at_once(self):
+        response = self.client.post(reverse('appointment_add'), {
+            'patient': self.patient.pk, 'doctor': self.doctor.pk, 'date': '2030-01-07', 'time': '10:00',
+        })
+        self.assertRedirects(response, reverse('appointment_list'), fetch_redirect_response=False)
+        self.assertIn(replicas.PIN_COOKIE, self.client.cookies)
+        self.assertContains(self.client.get(reverse('appointment_list')), 'Dr. Primary')
+
+        # Without the pin the replica, which has not seen the booking, is read
+        del self.client.cookies[replicas.PIN_COOKIE]
+        self.assertNotContains(self.client.get(reverse('appointment_list')), 'Dr. Primary')
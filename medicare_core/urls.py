@@ -10,7 +10,7 @@ from doctors.views import DoctorViewSet
 from appointments.views import AppointmentViewSet
 from prescriptions.views import PrescriptionViewSet
 from billing.views import InvoiceViewSet
-from medicare_core.views import home, contact, support, privacy
+from medicare_core.views import home, contact, support, privacy, metrics
 from patients.views import patient_list, patient_add, patient_detail
 from doctors.views import doctor_list, doctor_add
 from appointments.views import appointment_list, appointment_add, appointment_complete
@@ -62,6 +62,7 @@ urlpatterns = [
     path('contact/', contact, name='contact'),
     path('support/', support, name='support'),
     path('privacy/', privacy, name='privacy'),
+    path('metrics', metrics, name='metrics'),
 ]
 
 from django.conf import settings
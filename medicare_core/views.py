@@ -1,22 +1,17 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
-from patients.models import Patient
-from doctors.models import Doctor
-from appointments.models import Appointment
-from prescriptions.models import Prescription
+from django.utils.crypto import constant_time_compare
+from .counters import get_counts
+from .metrics import expose_metrics
 
 def home(request):
     # Redirect unauthenticated users to patient login portal
     if not request.user.is_authenticated:
         return redirect('patient_login')
     
-    context = {
-        'patient_count': Patient.objects.count(),
-        'doctor_count': Doctor.objects.count(),
-        'appointment_count': Appointment.objects.count(),
-        'prescription_count': Prescription.objects.count(),
-    }
-    return render(request, 'home.html', context)
+    return render(request, 'home.html', get_counts())
 
 def contact(request):
     return render(request, 'contact.html')
@@ -26,3 +21,13 @@ def support(request):
 
 def privacy(request):
     return render(request, 'privacy.html')
+
+def metrics(request):
+    # Prometheus scrapes with METRICS_TOKEN; otherwise only admins may look
+    if settings.METRICS_TOKEN:
+        allowed = constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {settings.METRICS_TOKEN}')
+    else:
+        allowed = request.actor.has_role('admin')
+    if not allowed:
+        return HttpResponseForbidden("You don't have permission to access this page.")
+    return HttpResponse(expose_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import OutboundEmail
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'to', 'status', 'attempts', 'run_after', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject', 'to')
@@ -0,0 +1,32 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import claim_emails, deliver_batch
+
+
+class Command(BaseCommand):
+    help = 'Sends queued emails in batches over a single SMTP connection.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100, help='Emails claimed per poll.')
+        parser.add_argument('--poll-interval', type=float, default=5.0, help='Seconds to sleep when the outbox is empty.')
+        parser.add_argument('--once', action='store_true', help='Drain the outbox once and exit.')
+
+    def handle(self, *args, **options):
+        connection = get_connection(fail_silently=False)
+        try:
+            while True:
+                email_ids = claim_emails(options['batch_size'])
+                if email_ids:
+                    sent = deliver_batch(email_ids, connection)
+                    self.stdout.write(f"Sent {sent} of {len(email_ids)} emails.")
+                    continue
+                # Don't hold the SMTP session open while idle
+                connection.close()
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        finally:
+            connection.close()
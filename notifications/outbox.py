@@ -0,0 +1,96 @@
+"""
+Transactional email outbox. Views call queue_email() inside the transaction
+that creates the appointment or payment, so an email row exists exactly when
+the change it describes was committed. `manage.py run_mail_worker` then sends
+the rows in batches over a single SMTP connection.
+
+Delivery is at-least-once: a worker that dies mid-send leaves its rows in
+'sending', and they are picked up again once they go stale
+(medicare_core.jobs.STALE_AFTER).
+"""
+from datetime import timedelta
+from smtplib import SMTPRecipientsRefused, SMTPResponseException
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.utils import timezone
+
+from medicare_core.jobs import claim, retry_or_fail
+from medicare_core.metrics import track
+from .models import OutboundEmail
+
+# How long the rest of a batch waits after the SMTP connection drops
+RELEASE_DELAY = timedelta(seconds=30)
+
+
+def queue_email(subject, body, to, from_email=None):
+    """
+    Queues an email for run_mail_worker, or sends it inline when EMAIL_ASYNC
+    is off. `to` is a list of addresses; empty addresses are dropped.
+    """
+    recipients = [address for address in to if address]
+    if not recipients:
+        return None
+    from_email = from_email or settings.DEFAULT_FROM_EMAIL or ''
+    if not getattr(settings, 'EMAIL_ASYNC', True):
+        with track('smtp'):
+            send_mail(subject, body, from_email or None, recipients, fail_silently=True)
+        return None
+    return OutboundEmail.objects.create(subject=subject, body=body, from_email=from_email, to=','.join(recipients))
+
+
+def claim_emails(limit):
+    """Marks up to `limit` due emails as sending and returns their ids."""
+    return claim(OutboundEmail, limit, 'sending')
+
+
+def deliver_batch(email_ids, connection=None):
+    """
+    Sends the claimed emails over one SMTP connection, which is left open for
+    the caller's next batch. A rejected message is retried later on its own;
+    if the connection itself fails, the rest of the batch is released without
+    using up an attempt. Returns the number sent.
+    """
+    connection = connection or get_connection(fail_silently=False)
+    emails = list(OutboundEmail.objects.filter(pk__in=email_ids).order_by('id'))
+    try:
+        # Opened here so send() reuses it instead of connecting per message
+        with track('smtp'):
+            connection.open()
+    except Exception as e:
+        _release(emails, e)
+        return 0
+
+    sent = 0
+    for index, email in enumerate(emails):
+        message = EmailMessage(
+            email.subject, email.body, email.from_email or None, email.recipients, connection=connection,
+        )
+        try:
+            with track('smtp'):
+                message.send()
+        except Exception as e:
+            _retry_or_fail(email, e)
+            if isinstance(e, (SMTPResponseException, SMTPRecipientsRefused)):
+                # The server refused this message but the session is still usable
+                continue
+            connection.close()
+            _release(emails[index + 1:], e)
+            break
+        email.status = 'sent'
+        email.sent_at = timezone.now()
+        email.last_error = ''
+        email.save(update_fields=['status', 'sent_at', 'last_error', 'updated_at'])
+        sent += 1
+    return sent
+
+
+def _release(emails, error):
+    """Puts claimed emails back without using up an attempt."""
+    OutboundEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+        status='pending', last_error=str(error), run_after=timezone.now() + RELEASE_DELAY,
+    )
+
+
+def _retry_or_fail(email, error):
+    retry_or_fail(email, error, getattr(settings, 'MAIL_MAX_ATTEMPTS', 5))
@@ -0,0 +1,101 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from billing.models import Invoice
+from medicare_core.jobs import STALE_AFTER
+from patients.models import Patient
+from .models import OutboundEmail
+from .outbox import claim_emails, deliver_batch, queue_email
+from .testing import LocalSMTPServer
+
+User = get_user_model()
+
+
+class MailWorkerTests(TestCase):
+    def test_worker_sends_batch_over_one_connection(self):
+        for i in range(5):
+            queue_email(f'Subject {i}', 'Body', [f'user{i}@example.com'], from_email='clinic@example.com')
+        with LocalSMTPServer() as smtp, override_settings(**smtp.email_settings()):
+            call_command('run_mail_worker', once=True, batch_size=2, stdout=StringIO())
+        self.assertEqual(smtp.connections, 1)
+        self.assertEqual(len(smtp.messages), 5)
+        self.assertEqual(OutboundEmail.objects.filter(status='sent').count(), 5)
+
+    def test_refused_message_is_retried_later(self):
+        queue_email('Good', 'Body', ['good@example.com'], from_email='clinic@example.com')
+        queue_email('Bad', 'Body', ['bad@example.com'], from_email='clinic@example.com')
+        with LocalSMTPServer(refuse={'bad@example.com'}) as smtp, override_settings(**smtp.email_settings()):
+            call_command('run_mail_worker', once=True, stdout=StringIO())
+        bad = OutboundEmail.objects.get(subject='Bad')
+        self.assertEqual((bad.status, bad.attempts), ('pending', 1))
+        self.assertIn('No such user', bad.last_error)
+        self.assertEqual(OutboundEmail.objects.get(subject='Good').status, 'sent')
+        # Backoff keeps it out of the next claim
+        self.assertEqual(claim_emails(10), [])
+
+    def test_unreachable_server_releases_batch(self):
+        for i in range(3):
+            queue_email(f'Subject {i}', 'Body', ['user@example.com'], from_email='clinic@example.com')
+        with LocalSMTPServer() as smtp:
+            settings = smtp.email_settings()
+        # The server is gone, so connecting fails
+        with override_settings(**settings):
+            self.assertEqual(deliver_batch(claim_emails(10)), 0)
+        self.assertEqual(OutboundEmail.objects.filter(status='pending', attempts=0).count(), 3)
+        self.assertEqual(claim_emails(10), [])
+
+    def test_stale_email_is_claimed_by_one_worker(self):
+        email = queue_email('Subject', 'Body', ['user@example.com'])
+        OutboundEmail.objects.filter(pk=email.pk).update(status='sending', updated_at=timezone.now() - STALE_AFTER * 2)
+        raced = []
+
+        def other_worker_claims_first(execute, sql, params, many, context):
+            # Another worker re-claims the row between this one's read and update
+            if sql.startswith('UPDATE') and not raced:
+                raced.append(sql)
+                OutboundEmail.objects.filter(pk=email.pk).update(updated_at=timezone.now())
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(other_worker_claims_first):
+            self.assertEqual(claim_emails(10), [])
+        self.assertTrue(raced)
+
+
+class OutboxViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='john', email='john@example.com', password='pw', role='patient')
+        self.patient = Patient.objects.create(
+            user=self.user, name='John Doe', age=30, gender='M', phone='1', address='1 St',
+            email='john@example.com', image='x.png',
+        )
+        self.client.force_login(self.user)
+
+    def test_queued_email_is_rolled_back_with_its_transaction(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            queue_email('Subject', 'Body', ['john@example.com'])
+            raise RuntimeError('booking failed')
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_payment_queues_receipt(self):
+        invoice = Invoice.objects.create(patient=self.patient, amount=50, items='Consultation')
+        self.client.post(reverse('payment_process', args=[invoice.pk, 'card']))
+        email = OutboundEmail.objects.get()
+        self.assertEqual((email.subject, email.to), ('Payment Confirmed - MediCare', 'john@example.com'))
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_no_recipient_queues_nothing(self):
+        self.assertIsNone(queue_email('Subject', 'Body', ['', None]))
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    @override_settings(EMAIL_ASYNC=False, EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+    def test_sync_mode_sends_inline(self):
+        queue_email('Subject', 'Body', ['john@example.com'])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(OutboundEmail.objects.exists())
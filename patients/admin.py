@@ -1,8 +1,13 @@
 from django.contrib import admin
 from .models import Patient
+from .search import search_patients
 
 @admin.register(Patient)
 class PatientAdmin(admin.ModelAdmin):
     list_display = ('name', 'age', 'gender', 'phone', 'created_at')
-    search_fields = ('name', 'phone')
+    search_fields = ('name', 'phone', 'email', 'medical_history')
     list_filter = ('gender',)
+
+    def get_search_results(self, request, queryset, search_term):
+        # The full-text index instead of LIKE '%term%' on every column
+        return search_patients(queryset, search_term), False
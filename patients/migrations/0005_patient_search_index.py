@@ -0,0 +1,76 @@
+from django.db import migrations
+
+# The search index as patients.search expects it at this point. The statements
+# are copied here rather than imported, so later edits to the app cannot change
+# what this migration does.
+FTS_TABLE = 'patients_patient_fts'
+
+SQLITE_INSTALL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, phone, email, medical_history,
+        content='patients_patient', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    # bm25 column weights: name, phone, email, medical_history
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', 'bm25(10.0, 10.0, 5.0, 1.0)')",
+    f"""CREATE TRIGGER IF NOT EXISTS patients_patient_fts_insert AFTER INSERT ON patients_patient BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, phone, email, medical_history)
+        VALUES (new.id, new.name, new.phone, new.email, new.medical_history);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS patients_patient_fts_delete AFTER DELETE ON patients_patient BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, phone, email, medical_history)
+        VALUES ('delete', old.id, old.name, old.phone, old.email, old.medical_history);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS patients_patient_fts_update AFTER UPDATE OF name, phone, email, medical_history ON patients_patient BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, phone, email, medical_history)
+        VALUES ('delete', old.id, old.name, old.phone, old.email, old.medical_history);
+        INSERT INTO {FTS_TABLE}(rowid, name, phone, email, medical_history)
+        VALUES (new.id, new.name, new.phone, new.email, new.medical_history);
+    END""",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS patients_patient_fts_insert",
+    "DROP TRIGGER IF EXISTS patients_patient_fts_delete",
+    "DROP TRIGGER IF EXISTS patients_patient_fts_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_INSTALL = [
+    """ALTER TABLE patients_patient ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(phone, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(email, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(medical_history, '')), 'C')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS patients_patient_search_idx ON patients_patient USING GIN (search_vector)",
+]
+
+POSTGRES_UNINSTALL = [
+    "DROP INDEX IF EXISTS patients_patient_search_idx",
+    "ALTER TABLE patients_patient DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def forwards(apps, schema_editor):
+    statements = {'sqlite': SQLITE_INSTALL, 'postgresql': POSTGRES_INSTALL}
+    for sql in statements.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql)
+
+
+def backwards(apps, schema_editor):
+    statements = {'sqlite': SQLITE_UNINSTALL, 'postgresql': POSTGRES_UNINSTALL}
+    for sql in statements.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0004_patient_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
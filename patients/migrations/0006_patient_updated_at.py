@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-18 17:22
+
+from django.db import migrations, models
+
+# Adding or removing the column rebuilds patients_patient on SQLite, which
+# drops the triggers that keep the search index from 0005 in sync. They are
+# copied here rather than imported, so later edits to the app cannot change
+# what this migration does.
+SQLITE_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS patients_patient_fts_insert AFTER INSERT ON patients_patient BEGIN
+        INSERT INTO patients_patient_fts(rowid, name, phone, email, medical_history)
+        VALUES (new.id, new.name, new.phone, new.email, new.medical_history);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS patients_patient_fts_delete AFTER DELETE ON patients_patient BEGIN
+        INSERT INTO patients_patient_fts(patients_patient_fts, rowid, name, phone, email, medical_history)
+        VALUES ('delete', old.id, old.name, old.phone, old.email, old.medical_history);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS patients_patient_fts_update AFTER UPDATE OF name, phone, email, medical_history ON patients_patient BEGIN
+        INSERT INTO patients_patient_fts(patients_patient_fts, rowid, name, phone, email, medical_history)
+        VALUES ('delete', old.id, old.name, old.phone, old.email, old.medical_history);
+        INSERT INTO patients_patient_fts(rowid, name, phone, email, medical_history)
+        VALUES (new.id, new.name, new.phone, new.email, new.medical_history);
+    END""",
+]
+
+
+def reinstall_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in SQLITE_TRIGGERS:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0005_patient_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, reinstall_search_triggers),
+        migrations.AddField(
+            model_name='patient',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(reinstall_search_triggers, migrations.RunPython.noop),
+    ]
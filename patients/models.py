@@ -17,14 +17,13 @@ class Patient(models.Model):
     medical_history = models.TextField(blank=True, null=True)
     image = models.ImageField(upload_to='patients/', blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def save(self, *args, **kwargs):
-        if not self.image:
-            from medicare_core.utils import generate_profile_image
-            img_content = generate_profile_image(self.name)
-            if img_content:
-                self.image.save(f"{self.name}_profile.png", img_content, save=False)
         super().save(*args, **kwargs)
+        if not self.image:
+            from avatars.queue import attach_avatar
+            attach_avatar(self)
 
     def __str__(self):
         return self.name
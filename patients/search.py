@@ -0,0 +1,100 @@
+"""
+Full-text patient search over name, phone, email and medical history.
+
+SQLite uses an FTS5 table that shadows patients_patient (external content)
+and is kept in sync by triggers; PostgreSQL uses a stored, generated tsvector
+column with a GIN index. Both are maintained by the database itself, so rows
+written with bulk_create() or update() are indexed too. Other databases fall
+back to case-insensitive LIKE matching. The index is created by migration
+0005_patient_search_index; a later migration that rebuilds patients_patient
+on SQLite drops its triggers and must create them again (see 0006).
+
+All search words must match. The last one matches as a prefix, as it is
+still being typed ("john smi" finds "John Smith"); the others are whole words,
+each a single index lookup instead of a merge of every word they start.
+Results are ordered by relevance with name and phone weighted highest (see
+RANK_LIMIT for the exception).
+
+At 1M patients (benchmarks/patient_search.py) single words and phone numbers
+take 20-55 ms on SQLite. Multi-word queries over common names take 65-95 ms,
+because bm25 reads the whole posting list of every word to weigh it.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework.filters import BaseFilterBackend
+
+FTS_TABLE = 'patients_patient_fts'
+SEARCH_COLUMNS = ('name', 'phone', 'email', 'medical_history')
+
+# Above this many matches SQLite results are ordered newest first instead of
+# by relevance, which keeps very broad queries fast on large rosters
+RANK_LIMIT = 10000
+
+
+def _has_more_matches_than(alias, fts_query, limit):
+    # Stops reading the index after limit + 1 matches
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            f'SELECT count(*) FROM (SELECT 1 FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s LIMIT %s)',
+            [fts_query, limit + 1],
+        )
+        return cursor.fetchone()[0] > limit
+
+
+def search_terms(query):
+    # Only word characters reach the database's query syntax
+    return re.findall(r'\w+', query or '')
+
+
+def _fts_query(terms):
+    *words, last = terms
+    return ' '.join([f'"{word}"' for word in words] + [f'"{last}"*'])
+
+
+def _ts_query(terms):
+    *words, last = terms
+    return ' & '.join(words + [f'{last}:*'])
+
+
+def search_patients(queryset, query):
+    """Filters a Patient queryset to matches for `query`, best first."""
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+    vendor = connections[queryset.db].vendor
+    # extra() keeps the match, the join and the rank in a single pass over
+    # the index; the index is not a model, so the ORM cannot express it
+    if vendor == 'sqlite':
+        fts_query = _fts_query(terms)
+        queryset = queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = patients_patient.id', f'{FTS_TABLE} MATCH %s'],
+            params=[fts_query],
+            select={'search_rank': f'{FTS_TABLE}.rank', 'search_rowid': f'{FTS_TABLE}.rowid'},
+        )
+        if _has_more_matches_than(queryset.db, fts_query, RANK_LIMIT):
+            # bm25 costs a few microseconds per match, so very broad queries
+            # list the newest matches instead, straight from the index
+            return queryset.order_by('-search_rowid')
+        return queryset.order_by('search_rank', '-id')
+    if vendor == 'postgresql':
+        ts_query = _ts_query(terms)
+        return queryset.extra(
+            where=["patients_patient.search_vector @@ to_tsquery('simple', %s)"],
+            params=[ts_query],
+            select={'search_rank': "ts_rank(patients_patient.search_vector, to_tsquery('simple', %s))"},
+            select_params=[ts_query],
+        ).order_by('-search_rank', '-id')
+    for term in terms:
+        queryset = queryset.filter(Q(*[Q(**{f'{column}__icontains': term}) for column in SEARCH_COLUMNS], _connector=Q.OR))
+    return queryset
+
+
+class PatientSearchFilter(BaseFilterBackend):
+    """DRF filter backend for `?search=` on the patient API."""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        return search_patients(queryset, request.query_params.get(self.search_param, ''))
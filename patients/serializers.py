@@ -1,7 +1,10 @@
-from rest_framework import serializers
+from medicare_core.serializers import DynamicFieldsModelSerializer
 from .models import Patient
 
-class PatientSerializer(serializers.ModelSerializer):
+class PatientSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Patient
         fields = '__all__'
+        expandable_fields = {
+            'user': 'users.serializers.UserSerializer',
+        }
@@ -1,3 +1,109 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from .models import Patient
+from . import search
+from .search import search_patients
+
+User = get_user_model()
+
+
+def create_patient(name, **kwargs):
+    fields = {'age': 30, 'gender': 'O', 'phone': '0100', 'address': '1 St', 'image': 'x.png', **kwargs}
+    return Patient.objects.create(name=name, **fields)
+
+
+class PatientSearchTests(TestCase):
+    def setUp(self):
+        self.john = create_patient('John Smith', phone='555-0101', email='john@example.com')
+        self.jane = create_patient('Jane Doe', medical_history='Allergic to penicillin; asthma since childhood')
+        self.johanna = create_patient('Johanna Jones', medical_history='Mentions John as emergency contact')
+
+    def names(self, query):
+        return [patient.name for patient in search_patients(Patient.objects.all(), query)]
+
+    def test_terms_must_all_match_and_the_last_as_a_prefix(self):
+        self.assertEqual(self.names('john smi'), ['John Smith'])
+        self.assertEqual(self.names('asthma penicil'), ['Jane Doe'])
+        # Earlier words are whole words
+        self.assertEqual(self.names('jo smith'), [])
+        self.assertEqual(self.names('555'), ['John Smith'])
+        self.assertEqual(self.names('john@example'), ['John Smith'])
+
+    def test_name_matches_rank_above_history_matches(self):
+        self.assertEqual(self.names('john'), ['John Smith', 'Johanna Jones'])
+
+    def test_index_follows_updates_deletes_and_bulk_inserts(self):
+        self.jane.name = 'Jane Roe'
+        self.jane.save()
+        self.assertEqual(self.names('roe'), ['Jane Roe'])
+        self.assertEqual(self.names('doe'), [])
+        self.john.delete()
+        self.assertEqual(self.names('smith'), [])
+        Patient.objects.bulk_create([Patient(name='Bulk Loaded', age=1, gender='O', phone='1', address='1 St', image='x.png')])
+        self.assertEqual(self.names('bulk'), ['Bulk Loaded'])
+
+    def test_broad_queries_list_newest_matches_first(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+        with mock.patch.object(search, 'RANK_LIMIT', 1):
+            self.assertEqual(self.names('john'), ['Johanna Jones', 'John Smith'])
+
+    def test_query_syntax_is_not_passed_through(self):
+        self.assertEqual(self.names('"john*) ^:'), ['John Smith', 'Johanna Jones'])
+        # Operators are just words that must also match
+        self.assertEqual(self.names('john OR jane'), [])
+        self.assertEqual(len(self.names('')), 3)
+
+    def test_search_uses_the_fts_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite FTS5 plan')
+        plan = search_patients(Patient.objects.all(), 'john').explain()
+        self.assertIn('VIRTUAL TABLE INDEX', plan)
+
+    def test_ui_and_api_search(self):
+        self.client.force_login(User.objects.create_user(username='staff', password='pw', role='staff'))
+        response = self.client.get(reverse('patient_list'), {'q': 'asthma'})
+        self.assertEqual([p.name for p in response.context['patients']], ['Jane Doe'])
+
+        api = APIClient()
+        api.force_authenticate(User.objects.create_user(username='api', password='pw', role='staff'))
+        with CaptureQueriesContext(connection) as queries:
+            response = api.get('/api/patients/', {'search': 'john', 'fields': 'id,name'})
+        self.assertEqual([row['name'] for row in response.data['results']], ['John Smith', 'Johanna Jones'])
+        # Match count, page count and the page itself
+        self.assertLessEqual(len(queries), 3)
+
+    def test_api_cursor_pages_keep_rank_order(self):
+        for i in range(4):
+            create_patient(f'John Extra {i}', medical_history='john' if i % 2 else '')
+        api = APIClient()
+        api.force_authenticate(User.objects.create_user(username='api', password='pw', role='staff'))
+        seen, url = [], '/api/patients/?search=john&pagination=cursor&page_size=2'
+        while url:
+            response = api.get(url)
+            seen += [row['name'] for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, self.names('john'))
+        self.assertEqual(len(seen), 6)
 
-# Create your tests here.
+    def test_ui_search_pages_keep_rank_order(self):
+        for i in range(4):
+            create_patient(f'John Extra {i}', medical_history='john' if i % 2 else '')
+        self.client.force_login(User.objects.create_user(username='staff', password='pw', role='staff'))
+        # Both the ranked order and the newest-first order for broad queries
+        for rank_limit in (search.RANK_LIMIT, 1):
+            with mock.patch.object(search, 'RANK_LIMIT', rank_limit), self.settings(UI_PAGE_SIZE=2):
+                expected = self.names('john')
+                seen, params = [], {'q': 'john'}
+                while params:
+                    page = self.client.get(reverse('patient_list'), params).context['page']
+                    seen += [patient.name for patient in page]
+                    params = {'q': 'john', 'cursor': page.next_cursor} if page.has_next else None
+            self.assertEqual(seen, expected)
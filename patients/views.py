@@ -2,30 +2,44 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponseForbidden
 from rest_framework import viewsets
+from medicare_core.api import OptimizedQuerysetMixin
+from medicare_core.conditional import ConditionalGetMixin
+from medicare_core.exports import ExportMixin
+from medicare_core.pagination import keyset_page
+from medicare_core.replicas import replica_reads
 from rest_framework.permissions import IsAuthenticated
 from .models import Patient
+from .search import PatientSearchFilter, search_patients
 from .serializers import PatientSerializer
 from .forms import PatientForm
 
 # API ViewSet
-class PatientViewSet(viewsets.ModelViewSet):
-    queryset = Patient.objects.all()
+class PatientViewSet(ConditionalGetMixin, ExportMixin, OptimizedQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Patient.objects.order_by('-created_at', '-id')
+    cursor_ordering = ('-created_at', '-id')
     serializer_class = PatientSerializer
     permission_classes = [IsAuthenticated]
+    filter_backends = [PatientSearchFilter]
 
 # UI Views
 @login_required
+@replica_reads
 def patient_list(request):
     # Admin/superuser, staff, and doctors can see patient list
-    if not (request.user.is_superuser or request.user.role in ['admin', 'staff', 'doctor']):
+    if not request.actor.has_role('admin', 'staff', 'doctor'):
         return HttpResponseForbidden("You don't have permission to access this page.")
     patients = Patient.objects.select_related('user').all().order_by('-created_at')
-    return render(request, 'patient_list.html', {'patients': patients})
+    query = request.GET.get('q', '').strip()
+    if query:
+        # Ranked full-text matches, best first
+        patients = search_patients(patients, query)
+    page = keyset_page(request, patients)
+    return render(request, 'patient_list.html', {'patients': page, 'page': page, 'query': query})
 
 @login_required
 def patient_add(request):
     # Admin/superuser, staff, and doctors can add patients
-    if not (request.user.is_superuser or request.user.role in ['admin', 'staff', 'doctor']):
+    if not request.actor.has_role('admin', 'staff', 'doctor'):
         return HttpResponseForbidden("You don't have permission to access this page.")
     if request.method == 'POST':
         form = PatientForm(request.POST, request.FILES)
@@ -40,7 +54,7 @@ def patient_add(request):
 def patient_detail(request, pk):
     patient = get_object_or_404(Patient, pk=pk)
     # Users can only see their own patient profile, admin/superuser/staff/doctors can see all
-    if hasattr(request.user, 'patient_profile'):
-        if patient != request.user.patient_profile and not (request.user.is_superuser or request.user.role in ['admin', 'staff', 'doctor']):
+    if request.actor.is_patient:
+        if patient.pk != request.actor.patient_id and not request.actor.has_role('admin', 'staff', 'doctor'):
             return HttpResponseForbidden("You don't have permission to access this page.")
     return render(request, 'patient_detail.html', {'patient': patient})
@@ -6,7 +6,7 @@ from faker import Faker
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'medicare_core.settings')
 django.setup()
 
-from doctors.models import Doctor
+from medicare_core.importer import import_records
 
 fake = Faker()
 
@@ -18,24 +18,22 @@ specialties = [
 
 days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
 
-def populate(n=100):
-    print(f"Creating {n} doctors...")
-    for _ in range(n):
-        name = f"Dr. {fake.name()}"
-        phone = fake.phone_number()
-        specialty = random.choice(specialties)
-        
+def fake_doctors(n):
+    for i in range(n):
         # Random available days (e.g., "Mon,Wed,Fri")
         num_days = random.randint(2, 5)
-        available_days = ",".join(random.sample(days, num_days))
-        
-        Doctor.objects.create(
-            name=name,
-            phone=phone,
-            specialty=specialty,
-            available_days=available_days
-        )
-    print(f"Successfully created {n} doctors.")
+        yield i + 1, {
+            'name': f"Dr. {fake.name()}",
+            'phone': fake.phone_number()[:15],
+            'specialty': random.choice(specialties),
+            'available_days': ",".join(random.sample(days, num_days)),
+        }
+
+def populate(n=100):
+    print(f"Creating {n} doctors...")
+    # One bulk insert per batch; avatars are queued for run_avatar_worker
+    result = import_records('doctors', fake_doctors(n))
+    print(f"Successfully created {result.created} doctors.")
 
 if __name__ == '__main__':
     populate()
@@ -1,6 +1,9 @@
 from django.contrib import admin
+from medicare_core.pdf_export import export_action
 from .models import Prescription
 
 @admin.register(Prescription)
 class PrescriptionAdmin(admin.ModelAdmin):
     list_display = ('appointment', 'created_at')
+    date_hierarchy = 'created_at'
+    actions = [export_action('prescriptions')]
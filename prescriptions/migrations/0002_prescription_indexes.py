@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0002_appointment_indexes'),
+        ('prescriptions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='prescription',
+            index=models.Index(fields=['-created_at'], name='prescription_created_idx'),
+        ),
+    ]
@@ -6,6 +6,13 @@ class Prescription(models.Model):
     medicines = models.TextField(help_text="List of medicines with dosage")
     advice = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # prescription_list, newest first
+            models.Index(fields=['-created_at'], name='prescription_created_idx'),
+        ]
 
     def __str__(self):
         return f"Prescription for {self.appointment}"
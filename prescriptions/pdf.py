@@ -0,0 +1,55 @@
+from io import BytesIO
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer
+
+from medicare_core.documents import INFO_TABLE_STYLE, STYLES, TITLE_STYLE, content_version
+
+# Bump when the layout below changes so cached PDFs are re-rendered
+LAYOUT_VERSION = 1
+
+
+def prescription_version(prescription):
+    appointment = prescription.appointment
+    return content_version(
+        LAYOUT_VERSION, prescription.pk, prescription.created_at.isoformat(),
+        appointment.patient.name, appointment.doctor.name, prescription.medicines, prescription.advice,
+    )
+
+
+def render_prescription_pdf(prescription):
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    elements = []
+
+    # Title
+    elements.append(Paragraph("MediCare Prescription", TITLE_STYLE))
+    elements.append(Spacer(1, 0.2*inch))
+
+    # Patient and Doctor Info
+    info_data = [
+        ['Patient:', prescription.appointment.patient.name, 'Date:', prescription.created_at.strftime('%Y-%m-%d')],
+        ['Doctor:', prescription.appointment.doctor.name, 'Time:', prescription.created_at.strftime('%H:%M')],
+    ]
+
+    info_table = Table(info_data, colWidths=[1*inch, 2.5*inch, 1*inch, 1.5*inch])
+    info_table.setStyle(INFO_TABLE_STYLE)
+
+    elements.append(info_table)
+    elements.append(Spacer(1, 0.3*inch))
+
+    # Medicines
+    elements.append(Paragraph("<b>Medicines:</b>", STYLES['Heading2']))
+    elements.append(Spacer(1, 0.1*inch))
+    elements.append(Paragraph(prescription.medicines.replace('\n', '<br/>'), STYLES['BodyText']))
+    elements.append(Spacer(1, 0.2*inch))
+
+    # Advice
+    if prescription.advice:
+        elements.append(Paragraph("<b>Advice:</b>", STYLES['Heading2']))
+        elements.append(Spacer(1, 0.1*inch))
+        elements.append(Paragraph(prescription.advice.replace('\n', '<br/>'), STYLES['BodyText']))
+
+    doc.build(elements)
+    return buffer.getvalue()
@@ -1,7 +1,10 @@
-from rest_framework import serializers
+from medicare_core.serializers import DynamicFieldsModelSerializer
 from .models import Prescription
 
-class PrescriptionSerializer(serializers.ModelSerializer):
+class PrescriptionSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Prescription
         fields = '__all__'
+        expandable_fields = {
+            'appointment': 'appointments.serializers.AppointmentSerializer',
+        }
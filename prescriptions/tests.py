@@ -1,3 +1,63 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import date, time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from appointments.models import Appointment
+from doctors.models import Doctor
+from medicare_core.documents import document_storage
+from patients.models import Patient
+from . import views
+from .models import Prescription
+
+User = get_user_model()
+
+
+class PrescriptionPdfTests(TestCase):
+    def setUp(self):
+        self.cache_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(DOCUMENT_CACHE_ROOT=self.cache_root)
+        self.settings_override.enable()
+        patient = Patient.objects.create(name='John Doe', age=30, gender='M', phone='1', address='1 St', image='x.png')
+        doctor = Doctor.objects.create(name='Dr. House', phone='2', specialty='GP', available_days='Mon', image='x.png')
+        appointment = Appointment.objects.create(patient=patient, doctor=doctor, date=date(2025, 1, 6), time=time(9, 0))
+        self.prescription = Prescription.objects.create(appointment=appointment, medicines='Aspirin 100mg')
+        self.url = reverse('prescription_pdf', args=[self.prescription.pk])
+        self.client.force_login(User.objects.create_user(username='staff', password='pw', role='staff'))
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.cache_root, ignore_errors=True)
+
+    def get(self, **headers):
+        response = self.client.get(self.url, headers=headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_pdf_is_rendered_once_and_revalidated(self):
+        with mock.patch.object(views, 'render_prescription_pdf', wraps=views.render_prescription_pdf) as render:
+            first, body = self.get()
+            second, again = self.get()
+            not_modified, _ = self.get(if_none_match=first['ETag'])
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(first['Content-Type'], 'application/pdf')
+        self.assertTrue(body.startswith(b'%PDF'))
+        self.assertEqual(body, again)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertIn('Last-Modified', first)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], first['ETag'])
+
+    def test_edit_renders_new_version_and_drops_old_one(self):
+        first, _ = self.get()
+        self.prescription.advice = 'Rest for two days'
+        self.prescription.save()
+        second, _ = self.get(if_none_match=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        _, files = document_storage().listdir(f'prescriptions/{self.prescription.pk}')
+        self.assertEqual(files, [f"{second['ETag'].strip(chr(34))}.pdf"])
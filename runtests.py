@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+Runs the test suite on PostgreSQL when one is available locally and on
+SQLite otherwise, without Docker. In order of preference:
+
+1. DB_ENGINE=postgresql already set: that server is used as configured.
+2. A server accepting connections on DB_HOST/DB_PORT (libpq defaults when
+   unset) as DB_USER: Django creates and drops test_<DB_NAME> on it.
+3. initdb and pg_ctl on PATH: a throwaway cluster is created in a temporary
+   directory, listening only on a Unix socket, and deleted afterwards.
+4. Otherwise SQLite.
+
+PostgreSQL needs the psycopg package. Any other arguments are passed to
+`manage.py test`.
+
+--replica runs the replica routing tests on SQLite with a second, separate
+database as DATABASES['replica'], so reads that go to the replica do not
+see rows written only to the primary. Other runs ignore DB_REPLICA_*: the
+rest of the suite only sets up the default database.
+
+Usage:
+    python runtests.py [--sqlite] [test labels...]
+    python runtests.py --replica [test labels...]
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from contextlib import contextmanager
+
+PG_DEFAULTS = {'DB_NAME': 'medicare'}
+REPLICA_TESTS = ['medicare_core.tests.ReplicaRoutingTests']
+
+
+def log(message):
+    print(f"runtests: {message}", file=sys.stderr)
+
+
+def can_connect(environ):
+    try:
+        import psycopg
+    except ImportError:
+        return False
+    try:
+        psycopg.connect(
+            dbname='postgres', user=environ.get('DB_USER') or None, password=environ.get('DB_PASSWORD') or None,
+            host=environ.get('DB_HOST') or None, port=environ.get('DB_PORT') or None, connect_timeout=2,
+        ).close()
+    except psycopg.Error:
+        return False
+    return True
+
+
+@contextmanager
+def throwaway_cluster():
+    """Starts a temporary PostgreSQL cluster and yields its DB_* settings, or None."""
+    if not (shutil.which('initdb') and shutil.which('pg_ctl')):
+        yield None
+        return
+    if hasattr(os, 'geteuid') and os.geteuid() == 0:
+        log("initdb refuses to run as root; not starting a throwaway cluster.")
+        yield None
+        return
+    workdir = tempfile.mkdtemp(prefix='medicare-pg-')
+    data = os.path.join(workdir, 'data')
+    try:
+        subprocess.run(
+            ['initdb', '-D', data, '-U', 'postgres', '-A', 'trust', '--no-sync'],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+        # No TCP listener, and no fsync: the data is thrown away anyway
+        options = f"-c listen_addresses='' -k {workdir} -c fsync=off -c full_page_writes=off"
+        subprocess.run(
+            ['pg_ctl', '-D', data, '-o', options, '-l', os.path.join(workdir, 'server.log'), '-w', 'start'],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        log(f"could not start a throwaway cluster ({e}).")
+        shutil.rmtree(workdir, ignore_errors=True)
+        yield None
+        return
+    try:
+        yield {'DB_HOST': workdir, 'DB_PORT': '5432', 'DB_USER': 'postgres', 'DB_PASSWORD': ''}
+    finally:
+        subprocess.run(['pg_ctl', '-D', data, '-m', 'immediate', 'stop'], stdout=subprocess.DEVNULL)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+@contextmanager
+def test_database(force_sqlite):
+    """Sets the DB_* environment for the chosen database and yields its name."""
+    if force_sqlite:
+        os.environ['DB_ENGINE'] = 'sqlite'
+        yield 'SQLite'
+        return
+    if os.environ.get('DB_ENGINE', '').lower() == 'postgresql':
+        yield 'PostgreSQL (configured)'
+        return
+    try:
+        import psycopg  # noqa: F401
+    except ImportError:
+        log("psycopg is not installed; using SQLite.")
+        os.environ['DB_ENGINE'] = 'sqlite'
+        yield 'SQLite'
+        return
+    if can_connect(os.environ):
+        os.environ.update({'DB_ENGINE': 'postgresql', **{k: v for k, v in PG_DEFAULTS.items() if k not in os.environ}})
+        yield 'PostgreSQL (local server)'
+        return
+    with throwaway_cluster() as cluster:
+        if cluster is None:
+            os.environ['DB_ENGINE'] = 'sqlite'
+            yield 'SQLite'
+        else:
+            os.environ.update({'DB_ENGINE': 'postgresql', **PG_DEFAULTS, **cluster})
+            yield 'PostgreSQL (throwaway cluster)'
+
+
+def main(argv):
+    replica = '--replica' in argv
+    force_sqlite = '--sqlite' in argv or replica
+    args = [arg for arg in argv if arg not in ('--sqlite', '--replica')]
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'medicare_core.settings')
+    os.environ.setdefault('SECRET_KEY', 'test-only-secret-key')
+    for name in [name for name in os.environ if name.startswith('DB_REPLICA_')]:
+        del os.environ[name]
+    if replica:
+        # The test runner gives the replica an in-memory database of its own
+        os.environ['DB_REPLICA_NAME'] = 'replica.sqlite3'
+        args = args or REPLICA_TESTS
+
+    with test_database(force_sqlite) as name:
+        log(f"running tests on {name}.")
+        # A child process, so the cluster is stopped even if the tests crash
+        return subprocess.call([sys.executable, 'manage.py', 'test', *args], cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
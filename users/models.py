@@ -9,6 +9,7 @@ class User(AbstractUser):
         ('patient', 'Patient'), 
     )
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='staff')
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return f"{self.username} ({self.role})"
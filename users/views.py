@@ -1,5 +1,7 @@
 from django.shortcuts import render, redirect
 from rest_framework import viewsets
+from medicare_core.api import OptimizedQuerysetMixin
+from medicare_core.conditional import ConditionalGetMixin
 from django.contrib.auth import get_user_model, login, logout, authenticate
 from django.contrib.auth.forms import AuthenticationForm
 from .serializers import UserSerializer
@@ -7,8 +9,9 @@ from .forms import CustomUserCreationForm
 
 User = get_user_model()
 
-class UserViewSet(viewsets.ModelViewSet):
-    queryset = User.objects.all()
+class UserViewSet(ConditionalGetMixin, OptimizedQuerysetMixin, viewsets.ModelViewSet):
+    queryset = User.objects.order_by('-id')
+    cursor_ordering = ('-id',)
     serializer_class = UserSerializer
 
 def login_view(request):
@@ -66,7 +69,7 @@ def admin_signup_view(request):
             user = form.save(commit=False)
             user.role = 'admin'
             user.save()
-            login(request, user)
+            login(request, user, backend='django.contrib.auth.backends.ModelBackend')
             return redirect('home')
     else:
         form = CustomUserCreationForm()
@@ -117,7 +120,7 @@ def patient_signup_view(request):
                 address=form.cleaned_data['address']
             )
             
-            login(request, user)
+            login(request, user, backend='django.contrib.auth.backends.ModelBackend')
             from django.contrib import messages
             messages.success(request, 'Account created successfully! Welcome to MediCare.')
             return redirect('home')
@@ -145,7 +148,7 @@ def doctor_signup_view(request):
                 available_days=form.cleaned_data['available_days']
             )
             
-            login(request, user)
+            login(request, user, backend='django.contrib.auth.backends.ModelBackend')
             return redirect('home')
     else:
         from .forms import DoctorSignupForm
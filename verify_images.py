@@ -1,6 +1,7 @@
 import os
 import django
 from django.conf import settings
+from django.core.management import call_command
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'medicare_core.settings')
 django.setup()
@@ -16,6 +17,8 @@ def test_image_generation():
         specialty="Magic",
         available_days="Mon,Fri"
     )
+    call_command('run_avatar_worker', once=True)
+    doctor.refresh_from_db()
     if doctor.image:
         print(f"SUCCESS: Doctor image generated at {doctor.image.url}")
     else:
@@ -29,6 +32,8 @@ def test_image_generation():
         phone="9876543210",
         address="Stark Tower"
     )
+    call_command('run_avatar_worker', once=True)
+    patient.refresh_from_db()
     if patient.image:
         print(f"SUCCESS: Patient image generated at {patient.image.url}")
     else: